@@ -0,0 +1,29 @@
+"""Общий клиент Telegram Bot API"""
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+
+from ..core.config import config
+
+class TelegramSession(AiohttpSession):
+    """HTTP-сессия Bot API с настроенным пулом соединений
+    
+    Соединения с api.telegram.org переиспользуются (keep-alive), их число
+    ограничено, а адрес сервера кешируется, поэтому массовые рассылки не
+    тратят время на DNS и TLS-рукопожатия.
+    """
+    
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        # Для прокси коннектор настраивает aiogram
+        if self._proxy is None:
+            self._connector_init.update(
+                limit=config.TELEGRAM_CONNECTION_LIMIT,
+                ttl_dns_cache=config.TELEGRAM_DNS_CACHE_TTL,
+                keepalive_timeout=config.TELEGRAM_KEEPALIVE_TIMEOUT
+            )
+
+def create_bot() -> Bot:
+    """Создание экземпляра бота (один на процесс, передается в сервисы и задачи)"""
+    return Bot(token=config.BOT_TOKEN, session=TelegramSession())
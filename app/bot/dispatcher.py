@@ -0,0 +1,19 @@
+"""Сборка диспетчера бота"""
+from aiogram import Dispatcher
+from aiogram.fsm.storage.base import BaseStorage
+
+from .handlers import register_all_handlers
+from .middlewares.auth_middleware import AuthMiddleware
+
+def create_dispatcher(storage: BaseStorage) -> Dispatcher:
+    """Создание диспетчера с промежуточным ПО и обработчиками"""
+    dp = Dispatcher(storage=storage)
+    
+    # Учет активности пользователей
+    auth_middleware = AuthMiddleware()
+    dp.message.outer_middleware(auth_middleware)
+    dp.callback_query.outer_middleware(auth_middleware)
+    
+    # Регистрация обработчиков
+    register_all_handlers(dp)
+    return dp
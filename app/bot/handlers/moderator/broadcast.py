@@ -8,6 +8,7 @@ from ...keyboards.moderator.mod_menu import (
     get_broadcast_confirmation_keyboard
 )
 from ....core.services.broadcast_service import BroadcastService
+from ....core.signals import process_signals, BROADCAST_QUEUED
 from ....core.config import config
 from ...filters.role_filter import moderator_filter
 from ...states.moderator import ModeratorStates
@@ -105,7 +106,7 @@ def _get_filter_text(filters: dict):
     if not filters:
         filter_text += "Всем пользователям\n"
     
-    filter_text += "\n📝 Теперь введите текст сообщения для рассылки:"
+    filter_text += "\n📝 Теперь введите текст сообщения для рассылки или отправьте фото/видео с подписью:"
     
     return filter_text
 
@@ -151,15 +152,25 @@ async def process_broadcast_message(message: Message, state: FSMContext):
         await state.set_state(ModeratorStates.broadcast_message)
         return
     
-    await state.update_data(message_text=message.text)
+    # Фото или видео рассылается с подписью по file_id, который Telegram уже выдал
+    photo = message.photo[-1].file_id if message.photo else None
+    video = message.video.file_id if message.video else None
+    message_text = message.text or message.caption or ""
+    if not message_text and not (photo or video):
+        await message.answer("📝 Отправьте текст, фото или видео с подписью для рассылки")
+        return
+    
+    await state.update_data(message_text=message_text, photo=photo, video=video)
     
     # Показываем предпросмотр
     preview_text = (
         "📋 *Предпросмотр рассылки*\n\n"
         "*Сообщение:*\n"
-        f"{message.text}\n\n"
-        "*Фильтры:* "
+        f"{message_text}\n\n"
     )
+    if photo or video:
+        preview_text += f"*Вложение:* {'фото' if photo else 'видео'}\n"
+    preview_text += "*Фильтры:* "
     
     filters = data.get('filters', {})
     if not filters:
@@ -192,25 +203,23 @@ async def confirm_broadcast(callback: CallbackQuery, state: FSMContext):
     """Подтверждение и отправка рассылки"""
     data = await state.get_data()
     
-    await callback.message.edit_text("📤 Отправка рассылки... Пожалуйста, подождите.")
-    
-    # Отправляем рассылку
+    # Рассылку выполняет фоновый воркер, прогресс появится в этом же сообщении
     try:
-        result = await broadcast_service.send_broadcast(
+        job_id = await broadcast_service.enqueue_broadcast(
             message_text=data['message_text'],
-            filters=data.get('filters', {})
+            created_by=callback.from_user.id,
+            filters=data.get('filters', {}),
+            photo=data.get('photo'),
+            video=data.get('video'),
+            chat_id=callback.message.chat.id,
+            message_id=callback.message.message_id
         )
+        process_signals.publish(BROADCAST_QUEUED)
         
-        result_text = (
-            "✅ *Рассылка завершена!*\n\n"
-            f"📊 Статистика:\n"
-            f"• Отправлено: {result['sent']}\n"
-            f"• Ошибок: {result['errors']}\n"
-            f"• Всего пользователей: {result['total_users']}"
+        await callback.message.edit_text(
+            f"📤 Рассылка #{job_id} поставлена в очередь. Прогресс будет отображаться в этом сообщении."
         )
         
-        await callback.message.edit_text(result_text, parse_mode="MarkdownV2")
-        
     except Exception as e:
         await callback.message.edit_text(
             f"❌ *Ошибка при отправке рассылки*\n\n"
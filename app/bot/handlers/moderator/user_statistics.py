@@ -17,7 +17,10 @@ async def show_global_statistics(message: Message):
     
     stats_text = (
         "📈 *Общая статистика системы*\n\n"
-        f"👥 *Пользователи:* {stats['user_statistics']['total_registered']}\n\n"
+        f"👥 *Пользователи:* {stats['user_statistics']['total_registered']}\n"
+        f"🟢 Активны за сутки: {stats['user_statistics']['active_day']}, "
+        f"за неделю: {stats['user_statistics']['active_week']}\n"
+        f"🚫 Заблокировали бота: {stats['user_statistics']['undeliverable']}\n\n"
     )
     
     # Статистика по полу
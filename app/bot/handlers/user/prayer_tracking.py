@@ -54,35 +54,22 @@ async def increase_prayer(callback: CallbackQuery):
     if len(callback.data.split("_")) > 3:
         prayer_type += "_" + callback.data.split("_")[3]
     
-    # Проверяем текущее состояние
-    prayer = await prayer_service.prayer_repo.get_prayer(callback.from_user.id, prayer_type)
-    
-    if not prayer:
-        await callback.answer("❌ Данные не найдены", show_alert=True)
+    # Уменьшаем восполненные (увеличиваем оставшиеся), а если восполненных нет - добавляем к пропущенным
+    updated_prayer = await prayer_service.update_prayer_count(
+        callback.from_user.id, prayer_type, -1, strict=True
+    )
+    if updated_prayer:
+        await send_action_message_and_update_menu(callback, prayer_type, "decrease_completed", updated_prayer)
         return
     
-    # Если восполненных <= 0, добавляем к пропущенным
-    if prayer.completed <= 0:
-        success = await prayer_service.increase_missed_prayers(
-            callback.from_user.id, prayer_type, 1
-        )
-        
-        if success:
-            updated_prayer = await prayer_service.prayer_repo.get_prayer(callback.from_user.id, prayer_type)
-            await send_action_message_and_update_menu(callback, prayer_type, "increase_missed", updated_prayer)
-        else:
-            await callback.answer("❌ Ошибка обновления", show_alert=True)
+    updated_prayer = await prayer_service.increase_missed_prayers(
+        callback.from_user.id, prayer_type, 1
+    )
+    
+    if updated_prayer:
+        await send_action_message_and_update_menu(callback, prayer_type, "increase_missed", updated_prayer)
     else:
-        # Уменьшаем восполненные (увеличиваем оставшиеся)
-        success = await prayer_service.update_prayer_count(
-            callback.from_user.id, prayer_type, -1
-        )
-        
-        if success:
-            updated_prayer = await prayer_service.prayer_repo.get_prayer(callback.from_user.id, prayer_type)
-            await send_action_message_and_update_menu(callback, prayer_type, "decrease_completed", updated_prayer)
-        else:
-            await callback.answer("❌ Ошибка обновления", show_alert=True)
+        await callback.answer("❌ Ошибка обновления", show_alert=True)
 
 @router.callback_query(F.data.startswith("prayer_dec_"))
 async def decrease_prayer(callback: CallbackQuery):
@@ -91,21 +78,15 @@ async def decrease_prayer(callback: CallbackQuery):
     if len(callback.data.split("_")) > 3:
         prayer_type += "_" + callback.data.split("_")[3]
     
-    # Проверяем, есть ли что восполнять
-    prayer = await prayer_service.prayer_repo.get_prayer(callback.from_user.id, prayer_type)
-    if not prayer or prayer.remaining <= 0:
-        await callback.answer("❌ Нет намазов для восполнения", show_alert=True)
-        return
-    
-    success = await prayer_service.update_prayer_count(
-        callback.from_user.id, prayer_type, 1
+    # Изменение не применяется, если восполнять нечего
+    updated_prayer = await prayer_service.update_prayer_count(
+        callback.from_user.id, prayer_type, 1, strict=True
     )
     
-    if success:
-        updated_prayer = await prayer_service.prayer_repo.get_prayer(callback.from_user.id, prayer_type)
+    if updated_prayer:
         await send_action_message_and_update_menu(callback, prayer_type, "increase_completed", updated_prayer)
     else:
-        await callback.answer("❌ Ошибка обновления", show_alert=True)
+        await callback.answer("❌ Нет намазов для восполнения", show_alert=True)
 
 async def send_action_message_and_update_menu(callback_query, prayer_type: str, action_type: str, prayer_data):
     """Отправка уведомления о действии и обновление компактного меню"""
@@ -205,17 +186,17 @@ async def show_prayer_info(callback: CallbackQuery):
 @router.callback_query(F.data == "show_stats")
 async def show_stats_from_tracking(callback: CallbackQuery):
     """Показ статистики из интерфейса отслеживания"""
-    stats = await prayer_service.get_user_statistics(callback.from_user.id)
+    totals = await prayer_service.get_user_totals(callback.from_user.id)
     
     stats_text = (
         "📊 *Ваша статистика:*\n\n"
-        f"📝 Всего пропущено: *{stats['total_missed']}*\n"
-        f"✅ Восполнено: *{stats['total_completed']}*\n"
-        f"⏳ Осталось: *{stats['total_remaining']}*\n\n"
+        f"📝 Всего пропущено: *{totals.prayers_missed}*\n"
+        f"✅ Восполнено: *{totals.prayers_completed}*\n"
+        f"⏳ Осталось: *{totals.prayers_remaining}*\n\n"
     )
     
-    if stats['total_completed'] > 0:
-        progress = (stats['total_completed'] / stats['total_missed']) * 100
+    if totals.prayers_completed > 0:
+        progress = (totals.prayers_completed / totals.prayers_missed) * 100
         stats_text += escape_markdown(f"📈 Прогресс: {progress:.1f}%")
     
     await callback.answer()
@@ -282,42 +263,36 @@ async def fast_adjust_prayer(callback: CallbackQuery):
     
     logger.critical(prayer_type)
     
-    prayer = await prayer_service.prayer_repo.get_prayer(callback.from_user.id, prayer_type)
-    if not prayer:
-        await callback.answer("❌ Данные не найдены", show_alert=True)
-        return
-    
-    success = False
+    updated_prayer = None
     action_type = ""
     
     if amount > 0:
-        # Увеличиваем оставшиеся (либо уменьшаем восполненные, либо добавляем к пропущенным)
-        if prayer.completed >= amount:
-            # Уменьшаем восполненные
-            success = await prayer_service.update_prayer_count(
-                callback.from_user.id, prayer_type, -amount
-            )
-            action_type = "decrease_completed"
-        else:
-            # Добавляем к пропущенным
-            success = await prayer_service.increase_missed_prayers(
+        # Увеличиваем оставшиеся: уменьшаем восполненные, а если их меньше amount - добавляем к пропущенным
+        updated_prayer = await prayer_service.update_prayer_count(
+            callback.from_user.id, prayer_type, -amount, strict=True
+        )
+        action_type = "decrease_completed"
+        if not updated_prayer:
+            updated_prayer = await prayer_service.increase_missed_prayers(
                 callback.from_user.id, prayer_type, amount
             )
             action_type = "increase_missed"
     else:
-        # Уменьшаем оставшиеся (увеличиваем восполненные)
-        if prayer.remaining >= abs(amount):
-            success = await prayer_service.update_prayer_count(
-                callback.from_user.id, prayer_type, abs(amount)
-            )
-            action_type = "increase_completed"
-        else:
-            await callback.answer(f"❌ Недостаточно намазов для восполнения (доступно: {prayer.remaining})", show_alert=True)
+        # Уменьшаем оставшиеся (увеличиваем восполненные), если их хватает
+        updated_prayer = await prayer_service.update_prayer_count(
+            callback.from_user.id, prayer_type, abs(amount), strict=True
+        )
+        action_type = "increase_completed"
+        if not updated_prayer:
+            # Остаток читается только для сообщения об ошибке
+            prayer = await prayer_service.prayer_repo.get_prayer(callback.from_user.id, prayer_type)
+            if not prayer:
+                await callback.answer("❌ Данные не найдены", show_alert=True)
+            else:
+                await callback.answer(f"❌ Недостаточно намазов для восполнения (доступно: {prayer.remaining})", show_alert=True)
             return
     
-    if success:
-        updated_prayer = await prayer_service.prayer_repo.get_prayer(callback.from_user.id, prayer_type)
-        
+    if updated_prayer:
         # Показываем результат изменения
         prayer_name = config.PRAYER_TYPES[prayer_type]
         
@@ -14,7 +14,7 @@ from ....core.config import escape_markdown
 from ....core.services.user_service import UserService
 from ....core.services.prayer_service import PrayerService
 from ...states.settings import SettingsStates
-from ...utils.text_messages import text_message
+from ...utils.text_messages import text_message, MarkdownBuilder
 
 
 router = Router()
@@ -216,63 +216,52 @@ async def export_data(callback: CallbackQuery):
     user = await user_service.get_or_create_user(callback.from_user.id)
     stats = await prayer_service.get_user_statistics(callback.from_user.id)
     
-    telegram_id = user.telegram_id
-    display_name = escape_markdown(user.display_name)
-    gender = escape_markdown('Мужской' if user.gender == 'male' else 'Женский' if user.gender == 'female' else 'Не указан')
-    birth_date = escape_markdown(user.birth_date.strftime('%d.%m.%Y') if user.birth_date else 'Не указана')
-    city = escape_markdown(user.city or 'Не указан')
-    role = escape_markdown(user.role)
-    created_at = escape_markdown(user.created_at.strftime('%d.%m.%Y %H:%M') if hasattr(user, 'created_at') and user.created_at else 'Неизвестно')
-    notifications_enabled = escape_markdown('Включены' if user.notifications_enabled else 'Отключены')
+    gender = 'Мужской' if user.gender == 'male' else 'Женский' if user.gender == 'female' else 'Не указан'
+    birth_date = user.birth_date.strftime('%d.%m.%Y') if user.birth_date else 'Не указана'
+    created_at = user.created_at.strftime('%d.%m.%Y %H:%M') if hasattr(user, 'created_at') and user.created_at else 'Неизвестно'
+    notifications_enabled = 'Включены' if user.notifications_enabled else 'Отключены'
     
-
-        
-    export_text = (
-        f"📊 *Экспорт данных пользователя*\n\n"
-        f"*👤 Профиль:*\n"
-        f"• Telegram ID: `{telegram_id}`\n"
-        f"• Имя: {display_name}\n"
-        f"• Пол: {gender}\n"
-        f"• Дата рождения: {birth_date}\n"
-        f"• Город: {city}\n"
-        f"• Роль: {role}\n"
-        f"• Дата регистрации: {created_at}\n"
-        f"• Ежедневные уведомления: {notifications_enabled}\n\n"
-    )
+    export = MarkdownBuilder()
+    export.raw("📊 *Экспорт данных пользователя*\n\n")
+    export.raw("*👤 Профиль:*\n")
+    export.raw("• Telegram ID: ").code(user.telegram_id).raw("\n")
+    export.raw("• Имя: ").line(user.display_name)
+    export.raw("• Пол: ").line(gender)
+    export.raw("• Дата рождения: ").line(birth_date)
+    export.raw("• Город: ").line(user.city or 'Не указан')
+    export.raw("• Роль: ").line(user.role)
+    export.raw("• Дата регистрации: ").line(created_at)
+    export.raw("• Ежедневные уведомления: ").line(notifications_enabled).raw("\n")
     
     # Статистика намазов
-    export_text += (
-        f"*🕌 Статистика намазов:*\n"
-        f"• Всего пропущено: {stats['total_missed']}\n"
-        f"• Восполнено: {stats['total_completed']}\n"
-        f"• Осталось: {stats['total_remaining']}\n"
-    )
+    export.raw("*🕌 Статистика намазов:*\n")
+    export.raw("• Всего пропущено: ").line(stats['total_missed'])
+    export.raw("• Восполнено: ").line(stats['total_completed'])
+    export.raw("• Осталось: ").line(stats['total_remaining'])
     
     if stats['total_missed'] > 0:
         progress = (stats['total_completed'] / stats['total_missed']) * 100
-        export_text += escape_markdown(f"• Прогресс восполнения: {progress:.1f}%\n")
+        export.line(f"• Прогресс восполнения: {progress:.1f}%")
     
-    export_text += "\n*📋 Детали по намазам:*\n"
+    export.raw("\n*📋 Детали по намазам:*\n")
     for prayer_name, data in stats['prayers'].items():
         if data['total'] > 0:
             prayer_progress = (data['completed'] / data['total']) * 100 if data['total'] > 0 else 0
-            export_text += escape_markdown(f"• {prayer_name}: {data['completed']}/{data['total']} ({prayer_progress:.1f}%)\n")
+            export.line(f"• {prayer_name}: {data['completed']}/{data['total']} ({prayer_progress:.1f}%)")
     
     # Статистика постов
     missed_fasts = user.fasting_missed_days or 0
     completed_fasts = user.fasting_completed_days or 0
     remaining_fasts = max(0, missed_fasts - completed_fasts)
     
-    export_text += (
-        f"\n*📿 Статистика постов:*\n"
-        f"• Всего пропущено дней: {missed_fasts}\n"
-        f"• Восполнено дней: {completed_fasts}\n"
-        f"• Осталось дней: {remaining_fasts}\n"
-    )
+    export.raw("\n*📿 Статистика постов:*\n")
+    export.line(f"• Всего пропущено дней: {missed_fasts}")
+    export.line(f"• Восполнено дней: {completed_fasts}")
+    export.line(f"• Осталось дней: {remaining_fasts}")
     
     if missed_fasts > 0:
         fast_progress = (completed_fasts / missed_fasts) * 100
-        export_text += escape_markdown(f"• Прогресс восполнения: {fast_progress:.1f}%\n")
+        export.line(f"• Прогресс восполнения: {fast_progress:.1f}%")
     
     # # Специальная информация для женщин
     # if False:
@@ -305,9 +294,8 @@ async def export_data(callback: CallbackQuery):
             
     #         # Дополнительные расчеты для женщин
     #         if user.birth_date and user.hayd_average_days:
-    #             from ....core.services.calculation_service import CalculationService
-    #             calc_service = CalculationService()
-    #             age = calc_service.calculate_age(user.birth_date)
+    #             from ...utils.date_utils import calculate_age
+    #             age = calculate_age(user.birth_date)
                 
     #             # Примерное количество циклов за репродуктивный период
     #             reproductive_years = max(0, age - 9)  # с 9 лет (совершеннолетие для девочек)
@@ -320,33 +308,29 @@ async def export_data(callback: CallbackQuery):
     #                 f"• Примерное количество циклов: ~{approximate_cycles}\n"
     #             )
 
-    adult_date = escape_markdown(user.adult_date.strftime('%d.%m.%Y') if user.adult_date else 'Не установлена')
-    prayer_start_date = escape_markdown(user.prayer_start_date.strftime('%d.%m.%Y') if user.prayer_start_date else 'Не установлена')
-    last_activity = escape_markdown(user.last_activity.strftime('%d.%m.%Y %H:%M') if hasattr(user, 'last_activity') and user.last_activity else 'Неизвестно')
-    is_registered = escape_markdown('Завершена' if user.is_registered else 'Не завершена')
-    export_date = escape_markdown((datetime.now() + timedelta(hours=3)).strftime('%d.%m.%Y %H:%M:%S'))
-    version = escape_markdown(__version__)
+    prayer_start_date = user.prayer_start_date.strftime('%d.%m.%Y') if user.prayer_start_date else 'Не установлена'
+    last_activity = user.last_activity.strftime('%d.%m.%Y %H:%M') if hasattr(user, 'last_activity') and user.last_activity else 'Неизвестно'
+    is_registered = 'Завершена' if user.is_registered else 'Не завершена'
+    export_date = (datetime.now() + timedelta(hours=3)).strftime('%d.%m.%Y %H:%M:%S')
 
     # Системная информация
-    export_text += (
-        f"\n*⚙️ Системная информация:*\n"
-        # f"• Дата совершеннолетия: {adult_date}\n"
-        f"• Дата начала намазов: {prayer_start_date}\n" if user.gender == 'male' else f""
-        f"• Последняя активность: {last_activity}\n"
-        f"• Статус регистрации: {is_registered}\n"
-    )
+    if user.gender == 'male':
+        export.raw("\n*⚙️ Системная информация:*\n")
+        export.raw("• Дата начала намазов: ").line(prayer_start_date)
+    else:
+        export.raw("• Последняя активность: ").line(last_activity)
+        export.raw("• Статус регистрации: ").line(is_registered)
     
     # Информация об экспорте
-    export_text += (
-        f"\n*📤 Информация об экспорте:*\n"
-        f"• Дата экспорта: {export_date}\n"
-        f"• Версия системы: Яшел Трекер v{version}\n"
-        f"• Формат данных: Полный экспорт\n"
-        f"\n💾 Сохрани эти данные в надежном месте\.\n"
-        f"📋 Эти данные можно использовать для восстановления прогресса при необходимости\."
-    )
+    export.raw("\n*📤 Информация об экспорте:*\n")
+    export.raw("• Дата экспорта: ").line(export_date)
+    export.raw("• Версия системы: ").line(f"Яшел Трекер v{__version__}")
+    export.line("• Формат данных: Полный экспорт")
+    export.line()
+    export.line("💾 Сохрани эти данные в надежном месте.")
+    export.text("📋 Эти данные можно использовать для восстановления прогресса при необходимости.")
     
-    await callback.message.edit_text(export_text, parse_mode="MarkdownV2")
+    await callback.message.edit_text(export.build(), parse_mode="MarkdownV2")
 
 @router.callback_query(F.data == "reset_all_data")
 async def confirm_reset_all_data(callback: CallbackQuery):
@@ -20,16 +20,14 @@ calc_service = CalculationService()
 
 async def _generate_statistics_text(user_id: int) -> tuple[str, InlineKeyboardMarkup]:
     """Генерация текста статистики для пользователя"""
-    stats = await prayer_service.get_user_statistics(user_id)
-    user = await user_service.get_or_create_user(user_id)
+    totals = await prayer_service.get_user_totals(user_id)
     
-    # Получаем данные о постах
-    fasting_missed = user.fasting_missed_days or 0
-    fasting_completed = user.fasting_completed_days or 0
-    fasting_remaining = max(0, fasting_missed - fasting_completed)
+    fasting_missed = totals.fasting_missed
+    fasting_completed = totals.fasting_completed
+    fasting_remaining = totals.fasting_remaining
     
     # Если нет данных ни о намазах, ни о постах
-    if stats['total_missed'] == 0 and fasting_missed == 0:
+    if not totals.has_data:
         return (
             "📊 *Твоя статистика:*\n\n"
             "📭 Данных пока нет\n\n"
@@ -42,14 +40,14 @@ async def _generate_statistics_text(user_id: int) -> tuple[str, InlineKeyboardMa
     stats_text = "📊 *Твоя статистика*\n\n"
     
     # Намазы
-    if stats['total_missed'] > 0:
-        prayer_progress = (stats['total_completed'] / stats['total_missed']) * 100 if stats['total_missed'] > 0 else 0
+    if totals.prayers_missed > 0:
+        prayer_progress = (totals.prayers_completed / totals.prayers_missed) * 100 if totals.prayers_missed > 0 else 0
         progress_bar = "▓" * int(prayer_progress / 10) + "░" * (10 - int(prayer_progress / 10))
         
         stats_text += (
-            f"🕌 *Намазы:* {stats['total_completed']}/{stats['total_missed']}\n"
+            f"🕌 *Намазы:* {totals.prayers_completed}/{totals.prayers_missed}\n"
             f"📊 [{progress_bar}] {prayer_progress:.0f}%\n"
-            f"⏳ Осталось: *{stats['total_remaining']}*\n\n"
+            f"⏳ Осталось: *{totals.prayers_remaining}*\n\n"
         )
     
     # Посты
@@ -64,8 +62,8 @@ async def _generate_statistics_text(user_id: int) -> tuple[str, InlineKeyboardMa
         )
     
     # Общий прогресс и мотивация
-    total_items = stats['total_missed'] + fasting_missed
-    total_completed = stats['total_completed'] + fasting_completed
+    total_items = totals.prayers_missed + fasting_missed
+    total_completed = totals.prayers_completed + fasting_completed
     
     if total_items > 0:
         overall_progress = (total_completed / total_items) * 100
@@ -2,13 +2,13 @@ from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery, TelegramObject
 
-from ...core.services.user_service import UserService
+from ...core.services.activity_tracker import activity_tracker
 
 class AuthMiddleware(BaseMiddleware):
     """Middleware для аутентификации пользователей"""
     
     def __init__(self):
-        self.user_service = UserService()
+        self.activity_tracker = activity_tracker
     
     async def __call__(
         self,
@@ -23,13 +23,7 @@ class AuthMiddleware(BaseMiddleware):
             user = event.from_user
         
         if user:
-            # Обновляем активность пользователя
-            try:
-                await self.user_service.update_last_activity(user.id)
-            except Exception as e:
-                # Логируем ошибку, но не прерываем выполнение
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f"Ошибка обновления активности пользователя {user.id}: {e}")
+            # Активность копится в памяти и записывается в БД пакетами
+            self.activity_tracker.touch(user.id)
         
         return await handler(event, data)
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""Распределение обработки обновлений по процессам-воркерам
+
+Фронтальный процесс получает обновления (polling или webhook) и передает
+их воркеру по хешу telegram_id, поэтому все обновления пользователя
+обрабатывает один и тот же воркер в порядке поступления. Каждый воркер
+держит собственный пул подключений к БД, кеши и хранилище FSM; сигналы
+process_signals (изменение ролей, новая рассылка) воркеры отправляют
+фронтальному процессу по общей очереди, а он передает их остальным.
+
+Единственный писатель db_manager единственный только внутри процесса:
+писатели разных процессов упорядочивает блокировка файла SQLite (WAL),
+а конфликт ждет до DB_BUSY_TIMEOUT_MS. Инвалидация кеша профилей между
+процессами не передается, поэтому с воркерами этот кеш выключен
+(см. user_cache).
+"""
+import asyncio
+import logging
+import multiprocessing
+import signal
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from ..core.config import config
+from ..core.database.connection import db_manager
+from ..core.database.repositories.admin_repository import AdminRepository
+from ..core.services.activity_tracker import activity_tracker
+from ..core.signals import process_signals
+from .client import create_bot
+from .dispatcher import create_dispatcher
+from .storage import SQLiteStorage
+
+logger = logging.getLogger(__name__)
+
+# spawn: воркер не наследует event loop и подключения фронтального процесса
+_mp_context = multiprocessing.get_context("spawn")
+
+
+def get_update_user_id(update: Update) -> int:
+    """Идентификатор пользователя (или чата), которому принадлежит обновление"""
+    event = update.event
+    from_user = getattr(event, "from_user", None)
+    if from_user is not None:
+        return from_user.id
+    
+    chat = getattr(event, "chat", None)
+    if chat is not None:
+        return chat.id
+    return update.update_id
+
+
+class ShardingDispatcher(Dispatcher):
+    """Диспетчер фронтального процесса: не обрабатывает обновления, а раздает их воркерам
+    
+    Обработчики регистрируются и здесь, чтобы polling и webhook запрашивали
+    у Telegram те же типы обновлений, что обрабатывают воркеры.
+    """
+    
+    def __init__(self, workers: int, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.workers = max(1, workers)
+        self._queues: List[Any] = [_mp_context.Queue() for _ in range(self.workers)]
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * self.workers
+        # Сигналы от воркеров: (номер воркера, имя сигнала)
+        self._signals: Any = _mp_context.Queue()
+        self._signals_task: Optional[asyncio.Task] = None
+    
+    def start_workers(self):
+        """Запуск процессов-воркеров и пересылки сигналов между ними"""
+        for index in range(self.workers):
+            self._start_worker(index)
+        process_signals.set_forwarder(self._forward_signal)
+        self._signals_task = asyncio.create_task(self._relay_signals())
+        logger.info(f"Запущено воркеров обработки обновлений: {self.workers}")
+    
+    def _forward_signal(self, name: str, origin: Optional[int] = None):
+        """Передача сигнала всем воркерам, кроме отправившего"""
+        for index, queue in enumerate(self._queues):
+            if index != origin:
+                queue.put(("signal", name))
+    
+    async def _relay_signals(self):
+        """Обработка сигналов воркеров в этом процессе и передача остальным воркерам"""
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self._signals.get)
+            if message is None:
+                break
+            origin, name = message
+            process_signals.dispatch(name)
+            self._forward_signal(name, origin)
+    
+    def _start_worker(self, index: int):
+        """Запуск (или перезапуск) воркера с указанным номером"""
+        process = _mp_context.Process(
+            target=run_worker, args=(index, self._queues[index], self._signals),
+            name=f"yashel-worker-{index}", daemon=True
+        )
+        process.start()
+        self._processes[index] = process
+    
+    async def feed_update(self, bot: Bot, update: Update, **kwargs: Any) -> Any:
+        """Передача обновления воркеру, отвечающему за пользователя"""
+        index = get_update_user_id(update) % self.workers
+        
+        process = self._processes[index]
+        if process is None or not process.is_alive():
+            logger.error(f"Воркер {index} не работает, перезапуск")
+            self._start_worker(index)
+        
+        self._queues[index].put(update.model_dump_json(by_alias=True, exclude_unset=True))
+        return True
+    
+    async def stop_workers(self, timeout: float = 30.0):
+        """Остановка воркеров после обработки уже переданных обновлений"""
+        for queue in self._queues:
+            queue.put(None)
+        
+        loop = asyncio.get_running_loop()
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                logger.warning(f"Воркер {index} не остановился вовремя, завершаем принудительно")
+                process.terminate()
+        
+        process_signals.set_forwarder(None)
+        if self._signals_task is not None:
+            self._signals.put(None)
+            await self._signals_task
+            self._signals_task = None
+        logger.info("Воркеры обработки обновлений остановлены")
+
+
+def run_worker(index: int, queue: Any, signals: Any):
+    """Точка входа процесса-воркера"""
+    # Останавливается по сигналу фронтального процесса, а не по Ctrl+C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        level=logging.INFO if config.DEBUG else logging.WARNING,
+        format=f'%(asctime)s - worker-{index} - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(_worker_loop(index, queue, signals))
+
+
+async def _worker_loop(index: int, queue: Any, signals: Any):
+    """Обработка обновлений воркером: параллельно для разных пользователей, по порядку для одного"""
+    await db_manager.init_pool()
+    await AdminRepository().load_roles()
+    process_signals.set_forwarder(lambda name: signals.put((index, name)))
+    
+    bot = create_bot()
+    storage = SQLiteStorage()
+    dp = create_dispatcher(storage)
+    activity_tracker.start()
+    
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max(1, config.WORKER_CONCURRENCY))
+    user_locks: Dict[int, asyncio.Lock] = {}
+    user_pending: Dict[int, int] = {}
+    tasks = set()
+    
+    async def _process(update: Update, user_id: int):
+        """Обработка одного обновления под блокировкой пользователя
+        
+        Слот семафора занимается только после блокировки пользователя: задачи,
+        ждущие своей очереди у одного пользователя, не занимают слоты остальных.
+        """
+        try:
+            async with user_locks[user_id]:
+                async with semaphore:
+                    await dp.feed_update(bot, update)
+        except Exception as e:
+            logger.error(f"Ошибка обработки обновления {update.update_id}: {e}", exc_info=True)
+        finally:
+            user_pending[user_id] -= 1
+            if not user_pending[user_id]:
+                del user_pending[user_id]
+                del user_locks[user_id]
+    
+    logger.info(f"Воркер {index} запущен")
+    try:
+        while True:
+            raw = await loop.run_in_executor(None, queue.get)
+            if raw is None:
+                break
+            if isinstance(raw, tuple):
+                # Сигнал из другого процесса
+                process_signals.dispatch(raw[1])
+                continue
+            
+            try:
+                update = Update.model_validate_json(raw, context={"bot": bot})
+            except Exception as e:
+                logger.error(f"Некорректное обновление в очереди воркера: {e}")
+                continue
+            
+            # Блокировка создается до запуска задачи, чтобы сохранить порядок обновлений пользователя
+            user_id = get_update_user_id(update)
+            user_pending[user_id] = user_pending.get(user_id, 0) + 1
+            user_locks.setdefault(user_id, asyncio.Lock())
+            
+            task = asyncio.create_task(_process(update, user_id))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        if tasks:
+            await asyncio.wait(set(tasks), timeout=30)
+        await activity_tracker.stop()
+        await storage.close()
+        await bot.session.close()
+        await db_manager.close()
+        logger.info(f"Воркер {index} остановлен")
@@ -0,0 +1,6 @@
+"""Хранилища состояний FSM"""
+from .sqlite_storage import SQLiteStorage
+
+__all__ = [
+    'SQLiteStorage'
+]
@@ -0,0 +1,266 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Set
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from ...core.config import config
+from ...core.database.connection import db_manager
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_value(value: Any) -> Any:
+    """Кодирование дат, которых нет в JSON"""
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    raise TypeError(f"Тип {type(value).__name__} не поддерживается хранилищем FSM")
+
+
+def _decode_object(obj: Dict[str, Any]) -> Any:
+    """Восстановление дат при чтении JSON"""
+    if len(obj) == 1:
+        if "$d" in obj:
+            return date.fromisoformat(obj["$d"])
+        if "$dt" in obj:
+            return datetime.fromisoformat(obj["$dt"])
+    return obj
+
+
+def dump_data(data: Dict[str, Any]) -> Optional[str]:
+    """Сериализация данных состояния в компактный JSON"""
+    if not data:
+        return None
+    return json.dumps(data, default=_encode_value, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_data(raw: Optional[str]) -> Dict[str, Any]:
+    """Десериализация данных состояния"""
+    if not raw:
+        return {}
+    return json.loads(raw, object_hook=_decode_object)
+
+
+class _Record:
+    """Состояние и данные одного ключа в кеше"""
+    
+    __slots__ = ("state", "data", "updated_at")
+    
+    def __init__(self, state: Optional[str] = None, data: Optional[Dict[str, Any]] = None,
+                 updated_at: Optional[float] = None):
+        self.state = state
+        self.data = data or {}
+        self.updated_at = updated_at or time.time()
+
+
+class SQLiteStorage(BaseStorage):
+    """Хранилище FSM в базе данных проекта
+    
+    Состояния переживают перезапуск бота. Последние ключи держатся
+    в ограниченном LRU-кеше, а изменения копятся и записываются одной
+    транзакцией через FSM_FLUSH_DELAY секунд, поэтому несколько вызовов
+    update_data в одном обработчике дают одну запись. Состояния, не
+    менявшиеся дольше FSM_STATE_TTL_HOURS, удаляются.
+    """
+    
+    def __init__(self, ttl: Optional[float] = None, cache_size: Optional[int] = None,
+                 flush_delay: Optional[float] = None):
+        self.ttl = config.FSM_STATE_TTL_HOURS * 3600 if ttl is None else ttl
+        self.cache_size = max(1, config.FSM_CACHE_SIZE if cache_size is None else cache_size)
+        self.flush_delay = config.FSM_FLUSH_DELAY if flush_delay is None else flush_delay
+        
+        self._cache: "OrderedDict[str, _Record]" = OrderedDict()
+        self._dirty: Set[str] = set()
+        self._flushing: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_failures = 0
+        self._closed = False
+        self._last_cleanup = 0.0
+    
+    @staticmethod
+    def _build_key(key: StorageKey) -> str:
+        """Строковый ключ записи"""
+        parts = [str(key.bot_id), str(key.chat_id), str(key.user_id)]
+        if key.thread_id:
+            parts.append(str(key.thread_id))
+        if key.destiny != "default":
+            parts.append(key.destiny)
+        return ":".join(parts)
+    
+    def _is_expired(self, record: _Record) -> bool:
+        """Не менялась ли запись дольше TTL"""
+        return self.ttl > 0 and time.time() - record.updated_at > self.ttl
+    
+    async def _get_record(self, key: StorageKey) -> _Record:
+        """Запись из кеша или из БД"""
+        storage_key = self._build_key(key)
+        record = self._cache.get(storage_key)
+        
+        if record is None:
+            async with db_manager.connection() as connection:
+                cursor = await connection.execute(
+                    "SELECT state, data, updated_at FROM fsm_states WHERE key = ?", (storage_key,)
+                )
+                row = await cursor.fetchone()
+            
+            # Пока шел запрос, запись могла появиться в кеше из другого обработчика
+            record = self._cache.get(storage_key)
+            if record is None:
+                if row:
+                    record = _Record(row["state"], load_data(row["data"]), row["updated_at"])
+                else:
+                    record = _Record()
+                self._remember(storage_key, record)
+        else:
+            self._cache.move_to_end(storage_key)
+        
+        if self._is_expired(record):
+            # Устаревшее состояние считается сброшенным
+            record.state = None
+            record.data = {}
+            record.updated_at = time.time()
+        return record
+    
+    def _remember(self, storage_key: str, record: _Record):
+        """Добавление записи в кеш с вытеснением давно не используемых"""
+        self._cache[storage_key] = record
+        self._cache.move_to_end(storage_key)
+        self._trim_cache(keep=storage_key)
+    
+    def _trim_cache(self, keep: Optional[str] = None):
+        """Вытеснение из кеша; несохраненные записи и keep не вытесняются"""
+        while len(self._cache) > self.cache_size:
+            for candidate in self._cache:
+                if candidate != keep and candidate not in self._dirty \
+                        and candidate not in self._flushing:
+                    del self._cache[candidate]
+                    break
+            else:
+                break
+    
+    def _mark_dirty(self, key: StorageKey, record: _Record):
+        """Отметка об изменении и планирование отложенной записи"""
+        record.updated_at = time.time()
+        self._dirty.add(self._build_key(key))
+        self._schedule_flush()
+    
+    def _schedule_flush(self):
+        """Планирование записи, если есть несохраненные изменения и запись еще не запланирована
+        
+        Вызывается и из самой записи: изменения, сделанные во время нее, и
+        изменения, которые не удалось записать, не ждут следующего обращения
+        к хранилищу. После ошибок пауза растет вдвое до FSM_FLUSH_MAX_RETRY_DELAY.
+        """
+        if self._closed or not self._dirty:
+            return
+        task = self._flush_task
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            return
+        
+        delay = self.flush_delay
+        if self._flush_failures:
+            delay = min(max(delay, 1.0) * 2 ** (self._flush_failures - 1), config.FSM_FLUSH_MAX_RETRY_DELAY)
+        self._flush_task = asyncio.create_task(self._delayed_flush(delay))
+    
+    async def _delayed_flush(self, delay: float):
+        """Запись изменений после короткой паузы, чтобы объединить их"""
+        await asyncio.sleep(delay)
+        await self.flush()
+    
+    async def flush(self):
+        """Запись накопленных изменений одной транзакцией"""
+        if not self._dirty:
+            return
+        
+        dirty, self._dirty = self._dirty, set()
+        self._flushing |= dirty
+        upserts = []
+        deletes = []
+        for storage_key in dirty:
+            record = self._cache[storage_key]
+            if record.state is None and not record.data:
+                deletes.append((storage_key,))
+            else:
+                upserts.append((storage_key, record.state, dump_data(record.data), record.updated_at))
+        
+        cleanup_before = None
+        if self.ttl > 0 and time.time() - self._last_cleanup > min(self.ttl, 3600):
+            cleanup_before = time.time() - self.ttl
+        
+        async def _write(connection):
+            if upserts:
+                await connection.executemany("""
+                    INSERT INTO fsm_states (key, state, data, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        state = excluded.state,
+                        data = excluded.data,
+                        updated_at = excluded.updated_at
+                """, upserts)
+            if deletes:
+                await connection.executemany("DELETE FROM fsm_states WHERE key = ?", deletes)
+            if cleanup_before is not None:
+                cursor = await connection.execute(
+                    "DELETE FROM fsm_states WHERE updated_at < ?", (cleanup_before,)
+                )
+                return cursor.rowcount
+            return 0
+        
+        written = False
+        try:
+            expired = await db_manager.write(_write)
+            written = True
+        except Exception as e:
+            logger.error(f"Ошибка записи состояний FSM: {e}")
+            return
+        finally:
+            self._flushing -= dirty
+            if written:
+                self._flush_failures = 0
+            else:
+                self._dirty |= dirty
+                self._flush_failures += 1
+            self._trim_cache()
+            self._schedule_flush()
+        
+        if cleanup_before is not None:
+            self._last_cleanup = time.time()
+            if expired:
+                logger.info(f"Удалено устаревших состояний FSM: {expired}")
+    
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get_record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(key, record)
+    
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = await self._get_record(key)
+        return record.state
+    
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._get_record(key)
+        record.data = data.copy()
+        self._mark_dirty(key, record)
+    
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = await self._get_record(key)
+        return record.data.copy()
+    
+    async def close(self) -> None:
+        """Запись несохраненных изменений перед остановкой"""
+        self._closed = True
+        task = self._flush_task
+        if task is not None and not task.done():
+            # Идущая запись дожидается завершения, запланированная заменяется записью ниже
+            if not self._flushing:
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+        self._cache.clear()
@@ -1,7 +1,78 @@
-from ...core.config import escape_markdown
+import random
+from string import Formatter
+
+from ...core.config import escape_markdown, escape_markdown_uncached
 
 """Текстовые сообщения бота"""
 
+class MarkdownTemplate:
+    """Шаблон сообщения MarkdownV2 с подстановками {name}
+    
+    Шаблон разбирается один раз при создании: статический текст
+    экранируется сразу (символами chars, чтобы разметка вроде *жирного*
+    сохранилась), а render только вставляет полностью экранированные
+    значения на места подстановок и склеивает части.
+    """
+    
+    def __init__(self, template: str, chars: str = ".!?()-"):
+        self._parts = []
+        # Позиции подстановок в _parts и имена их значений
+        self._slots = []
+        self.fields = []
+        for literal, field, _spec, _conversion in Formatter().parse(template):
+            if literal:
+                self._parts.append(escape_markdown(literal, chars))
+            if field is not None:
+                self._slots.append((len(self._parts), field))
+                self._parts.append("")
+                self.fields.append(field)
+    
+    def render(self, **values) -> str:
+        """Подстановка экранированных значений (без кеша: значения у каждого получателя свои)"""
+        parts = self._parts.copy()
+        for index, field in self._slots:
+            parts[index] = escape_markdown_uncached(str(values[field]))
+        return "".join(parts)
+
+class MarkdownBuilder:
+    """Сборка сообщения MarkdownV2 из фрагментов
+    
+    text/bold/code экранируют переданные значения, raw добавляет готовую
+    разметку как есть. Методы возвращают сам builder для цепочек вызовов.
+    """
+    
+    def __init__(self):
+        self._parts = []
+    
+    def text(self, value) -> "MarkdownBuilder":
+        """Обычный текст"""
+        self._parts.append(escape_markdown(str(value)))
+        return self
+    
+    def raw(self, markup: str) -> "MarkdownBuilder":
+        """Готовая разметка без экранирования"""
+        self._parts.append(markup)
+        return self
+    
+    def bold(self, value) -> "MarkdownBuilder":
+        """Жирный текст"""
+        self._parts.append('*' + escape_markdown(str(value)) + '*')
+        return self
+    
+    def code(self, value) -> "MarkdownBuilder":
+        """Моноширинный текст (внутри экранируются только ` и \\)"""
+        self._parts.append('`' + escape_markdown(str(value), '\\`') + '`')
+        return self
+    
+    def line(self, value="") -> "MarkdownBuilder":
+        """Текст с переводом строки"""
+        self._parts.append(escape_markdown(str(value)) + '\n')
+        return self
+    
+    def build(self) -> str:
+        """Итоговый текст сообщения"""
+        return "".join(self._parts)
+
 class Messages:
     """Класс с текстовыми сообщениями"""
     
@@ -362,4 +433,20 @@ class Messages:
         ),
     ]
     
+    # Напоминания, экранированные один раз для всех рассылок
+    ESCAPED_REMINDER_MESSAGES = [escape_markdown(text, ".?!-()[]") for text in reminder_messages]
+    
+    DAILY_REMINDER = MarkdownTemplate(
+        "🌙 Доброй ночи, {name}!\n\n"
+        "📊 Твоя статистика на сегодня:\n"
+        "⏳ Осталось восполнить: *{remaining}* намазов\n\n"
+        "🤲 Не забывай о восполнении намазов каждый день.\n"
+        "Пусть Аллах облегчит этот путь!\n\n",
+        ".!?()-"
+    )
+    
+    def get_random_reminder(self) -> str:
+        """Случайное напоминание, готовое к отправке в MarkdownV2"""
+        return random.choice(self.ESCAPED_REMINDER_MESSAGES)
+    
 text_message = Messages ()
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""Прием обновлений через webhook (aiohttp)"""
+import asyncio
+import hmac
+import logging
+import signal
+from typing import Any, Awaitable, Callable, Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from ..core.config import config
+from ..core.database.connection import db_manager
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# Функция обработки одного обновления: feed(bot, update)
+FeedFunction = Callable[[Bot, Update], Awaitable[Any]]
+
+
+class WebhookServer:
+    """HTTP-сервер для приема обновлений от Telegram
+    
+    Проверяет секретный токен, отвечает Telegram сразу и обрабатывает
+    обновления в фоне, не более max_concurrency одновременно: когда все
+    слоты заняты, ответ задерживается, и Telegram сам снижает темп.
+    """
+    
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, feed: Optional[FeedFunction] = None,
+                 max_concurrency: int = None, secret_token: str = None):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.feed = feed or self._feed_dispatcher
+        self.secret_token = config.WEBHOOK_SECRET if secret_token is None else secret_token
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency or config.WEBHOOK_MAX_CONCURRENCY))
+        self._tasks: Set[asyncio.Task] = set()
+        self._accepting = True
+    
+    def create_app(self) -> web.Application:
+        """Создание aiohttp-приложения с маршрутами webhook и health"""
+        app = web.Application()
+        app.router.add_post(config.WEBHOOK_PATH, self.handle_update)
+        app.router.add_get("/health", self.handle_health)
+        return app
+    
+    async def _feed_dispatcher(self, bot: Bot, update: Update):
+        """Передача обновления диспетчеру текущего процесса"""
+        await self.dispatcher.feed_update(bot, update)
+    
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """Прием обновления от Telegram"""
+        if self.secret_token:
+            token = request.headers.get(SECRET_HEADER, "")
+            if not hmac.compare_digest(token, self.secret_token):
+                return web.Response(status=401)
+        
+        if not self._accepting:
+            # Telegram повторит доставку после перезапуска
+            return web.Response(status=503)
+        
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception as e:
+            logger.warning(f"Некорректное обновление от Telegram: {e}")
+            return web.Response(status=400)
+        
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+    
+    async def _process(self, update: Update):
+        """Обработка обновления в фоне"""
+        try:
+            await self.feed(self.bot, update)
+        except Exception as e:
+            logger.error(f"Ошибка обработки обновления {update.update_id}: {e}", exc_info=True)
+        finally:
+            self._semaphore.release()
+    
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """Проверка работоспособности для балансировщика"""
+        db_ok = await db_manager.health_check()
+        return web.json_response(
+            {"status": "ok" if db_ok else "degraded", "database": db_ok, "in_flight": len(self._tasks)},
+            status=200 if db_ok else 503
+        )
+    
+    async def drain(self, timeout: float = 30.0):
+        """Прекращение приема обновлений и ожидание обработки принятых"""
+        self._accepting = False
+        if not self._tasks:
+            return
+        
+        logger.info(f"Ожидание обработки принятых обновлений: {len(self._tasks)}")
+        done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        if pending:
+            logger.warning(f"Не успели обработать обновлений до остановки: {len(pending)}")
+            for task in pending:
+                task.cancel()
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot, feed: Optional[FeedFunction] = None):
+    """Запуск бота в режиме webhook до получения сигнала остановки"""
+    if not config.WEBHOOK_URL:
+        raise RuntimeError("Для режима webhook нужно указать WEBHOOK_URL")
+    
+    server = WebhookServer(dispatcher, bot, feed=feed)
+    runner = web.AppRunner(server.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host=config.WEBHOOK_HOST, port=config.WEBHOOK_PORT)
+    await site.start()
+    
+    await bot.set_webhook(
+        url=config.WEBHOOK_URL.rstrip("/") + config.WEBHOOK_PATH,
+        secret_token=config.WEBHOOK_SECRET or None,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+        max_connections=config.WEBHOOK_MAX_CONNECTIONS
+    )
+    logger.info(f"Webhook запущен на {config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}{config.WEBHOOK_PATH}")
+    
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: остановка по KeyboardInterrupt
+            pass
+    
+    try:
+        await stop_event.wait()
+    finally:
+        logger.info("🛑 Остановка webhook-сервера")
+        await server.drain()
+        await runner.cleanup()
@@ -0,0 +1,118 @@
+"""Кеши в памяти процесса"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Ограниченный LRU-кеш с временем жизни записей
+    
+    Ведет счетчики попаданий и промахов. Поколение кеша увеличивается при
+    каждой инвалидации: значение, прочитанное из БД до инвалидации,
+    не попадет в кеш (см. generation и set). При ttl <= 0 кеш выключен.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Получение значения или default при промахе"""
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        
+        self.misses += 1
+        return default
+    
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """Сохранение значения
+        
+        Если передано поколение и с тех пор была инвалидация, значение
+        считается устаревшим и не сохраняется.
+        """
+        if self.ttl <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def invalidate(self, key: Hashable):
+        """Удаление записи после изменения данных"""
+        self.generation += 1
+        self._data.pop(key, None)
+    
+    def clear(self):
+        """Полная очистка кеша"""
+        self.generation += 1
+        self._data.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики кеша"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+class RoleCache:
+    """Карта ролей привилегированных пользователей (telegram_id -> роль)
+    
+    Пользователи, которых нет в карте, имеют обычную роль. Карта
+    помечается устаревшей при изменении ролей и, если задан интервал,
+    периодически перечитывается. Как и в TTLCache, поколение растет при
+    каждой инвалидации: карта, прочитанная до нее, не заменит текущую.
+    """
+    
+    def __init__(self, refresh_interval: float = 0):
+        self.refresh_interval = refresh_interval
+        self.loaded_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+        self.generation = 0
+        self._roles: Dict[int, str] = {}
+    
+    @property
+    def is_stale(self) -> bool:
+        """Нужно ли перечитать карту из БД"""
+        if self.loaded_at is None:
+            return True
+        return self.refresh_interval > 0 and time.monotonic() - self.loaded_at > self.refresh_interval
+    
+    def replace(self, roles: Dict[int, str], generation: Optional[int] = None) -> bool:
+        """Замена карты целиком после загрузки из БД
+        
+        Если передано поколение и с тех пор была инвалидация, карта
+        считается устаревшей и не сохраняется (возвращается False).
+        """
+        if generation is not None and generation != self.generation:
+            return False
+        
+        self._roles = roles
+        self.loaded_at = time.monotonic()
+        return True
+    
+    def get(self, telegram_id: int, default: str) -> str:
+        """Роль пользователя"""
+        return self._roles.get(telegram_id, default)
+    
+    def invalidate(self):
+        """Отметка об изменении ролей"""
+        self.generation += 1
+        self.loaded_at = None
@@ -1,13 +1,22 @@
 import os
+from functools import lru_cache
 from typing import List
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def escape_markdown(text, chars ='\\`*_{}[]()#+.-!|>~^='):
-    # special_chars = '\\`*_{}[]()#+.-!|>~^='
+# Спецсимволы MarkdownV2
+MARKDOWN_SPECIAL_CHARS = '\\`*_{}[]()#+.-!|>~^='
+
+def escape_markdown_uncached(text, chars=MARKDOWN_SPECIAL_CHARS):
+    """Экранирование символов chars для MarkdownV2 без кеша
+    
+    Заменяются только символы, которые есть в тексте: на русском тексте
+    с эмодзи это быстрее и str.translate, и регулярного выражения.
+    """
     for char in chars:
-        text = text.replace(char, '\\' + char)
+        if char in text:
+            text = text.replace(char, '\\' + char)
     return text
 
 
@@ -17,6 +26,27 @@ class Config:
     # Telegram Bot
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
     
+    # Режим получения обновлений: polling или webhook
+    BOT_MODE: str = os.getenv("BOT_MODE", "polling").lower()
+    
+    # Webhook (используется при BOT_MODE=webhook)
+    WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "")
+    WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+    WEBHOOK_HOST: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8080"))
+    WEBHOOK_MAX_CONCURRENCY: int = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "50"))
+    WEBHOOK_MAX_CONNECTIONS: int = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+    
+    # Пул HTTP-соединений с Bot API (общий для всего процесса)
+    TELEGRAM_CONNECTION_LIMIT: int = int(os.getenv("TELEGRAM_CONNECTION_LIMIT", "100"))
+    TELEGRAM_KEEPALIVE_TIMEOUT: float = float(os.getenv("TELEGRAM_KEEPALIVE_TIMEOUT", "60"))
+    TELEGRAM_DNS_CACHE_TTL: int = int(os.getenv("TELEGRAM_DNS_CACHE_TTL", "300"))
+    
+    # Процессы-воркеры для обработки обновлений (0 - обработка в основном процессе)
+    WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", "0"))
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "50"))
+    
     # Администраторы
     ADMIN_IDS: List[int] = [
         int(id_str.strip()) for id_str in os.getenv("ADMIN_IDS", "").split(",") if id_str.strip()
@@ -25,6 +55,33 @@ class Config:
     # База данных
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///data/yashel_tracker.db")
     
+    # Размер пула подключений к БД
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    
+    # Профиль PRAGMA для SQLite
+    DB_BUSY_TIMEOUT_MS: int = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    DB_CACHE_SIZE_KB: int = int(os.getenv("DB_CACHE_SIZE_KB", "20000"))
+    DB_MMAP_SIZE: int = int(os.getenv("DB_MMAP_SIZE", str(128 * 1024 * 1024)))
+    
+    # Кеш профилей пользователей в памяти процесса
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "300"))
+    
+    # Период перечитывания карты ролей в секундах (0 - только при изменении ролей)
+    ROLE_CACHE_REFRESH_SECONDS: float = float(os.getenv("ROLE_CACHE_REFRESH_SECONDS", "600"))
+    
+    # Период записи активности пользователей в БД (секунды)
+    ACTIVITY_FLUSH_INTERVAL: float = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "30"))
+    
+    # Хранилище состояний FSM в SQLite
+    FSM_STATE_TTL_HOURS: int = int(os.getenv("FSM_STATE_TTL_HOURS", "72"))
+    FSM_CACHE_SIZE: int = int(os.getenv("FSM_CACHE_SIZE", "5000"))
+    FSM_FLUSH_DELAY: float = float(os.getenv("FSM_FLUSH_DELAY", "0.2"))
+    FSM_FLUSH_MAX_RETRY_DELAY: float = float(os.getenv("FSM_FLUSH_MAX_RETRY_DELAY", "60"))
+    
+    # Размер кеша экранированных строк MarkdownV2 (escape_markdown)
+    MARKDOWN_ESCAPE_CACHE_SIZE: int = int(os.getenv("MARKDOWN_ESCAPE_CACHE_SIZE", "2048"))
+    
     # Отладка
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     
@@ -40,9 +97,38 @@ class Config:
     HAYD_MAX_DAYS: int = 10
     NIFAS_MAX_DAYS: int = 40
     
+    # Массовая доставка сообщений (лимиты Telegram: ~30 сообщений/с, 1 сообщение/с в чат)
+    DELIVERY_CONCURRENCY: int = int(os.getenv("DELIVERY_CONCURRENCY", "20"))
+    DELIVERY_RATE_LIMIT: float = float(os.getenv("DELIVERY_RATE_LIMIT", "25"))
+    DELIVERY_PER_CHAT_INTERVAL: float = float(os.getenv("DELIVERY_PER_CHAT_INTERVAL", "1.0"))
+    DELIVERY_MAX_RETRIES: int = int(os.getenv("DELIVERY_MAX_RETRIES", "3"))
+    
+    # Очередь рассылок: размер страницы получателей (контрольная точка после каждой),
+    # период опроса очереди и интервал обновления прогресса у модератора (секунды)
+    BROADCAST_PAGE_SIZE: int = int(os.getenv("BROADCAST_PAGE_SIZE", "200"))
+    BROADCAST_POLL_INTERVAL: float = float(os.getenv("BROADCAST_POLL_INTERVAL", "5"))
+    BROADCAST_PROGRESS_INTERVAL: float = float(os.getenv("BROADCAST_PROGRESS_INTERVAL", "5"))
+    # Наибольшая пауза перед повтором после ошибки очереди рассылок (секунды)
+    BROADCAST_MAX_RETRY_DELAY: float = float(os.getenv("BROADCAST_MAX_RETRY_DELAY", "60"))
+    
     # Время для ежедневных напоминаний (час в формате 24ч)
     DAILY_REMINDER_HOUR: int = 17  # 20:00
     
+    # Напоминания по местному времени пользователя (ЧЧ:ММ, кратно интервалу); планировщик проверяет
+    # пояса каждые REMINDER_BUCKET_MINUTES минут
+    EVENING_REMINDER_LOCAL_TIME: str = os.getenv("EVENING_REMINDER_LOCAL_TIME", "20:00")
+    DAILY_STATISTICS_LOCAL_TIME: str = os.getenv("DAILY_STATISTICS_LOCAL_TIME", "22:00")
+    REMINDER_BUCKET_MINUTES: int = int(os.getenv("REMINDER_BUCKET_MINUTES", "15"))
+    # За сколько минут до отправки собирается снимок аудитории (меньше интервала)
+    REMINDER_AUDIENCE_LEAD_MINUTES: int = int(os.getenv("REMINDER_AUDIENCE_LEAD_MINUTES", "5"))
+    # Интервалы, пропущенные из-за опоздания или сбоя, досылаются следующим запуском,
+    # если опоздание не больше REMINDER_CATCHUP_MINUTES минут
+    REMINDER_CATCHUP_MINUTES: int = int(os.getenv("REMINDER_CATCHUP_MINUTES", "120"))
+    # Допустимое опоздание запуска фоновой задачи (секунды), после него запуск пропускается
+    JOB_MISFIRE_GRACE_SECONDS: int = int(os.getenv("JOB_MISFIRE_GRACE_SECONDS", "300"))
+    # Смещение от UTC (минуты) для пользователей с неизвестным городом (Москва)
+    DEFAULT_UTC_OFFSET: int = int(os.getenv("DEFAULT_UTC_OFFSET", "180"))
+    
     # Виды намазов
     PRAYER_TYPES = {
         'fajr': 'Фаджр',
@@ -63,3 +149,9 @@ class Config:
         ADMIN = "admin"
 
 config = Config()
+
+# Повторяющиеся строки (тексты меню, справки, подписи) экранируются один раз
+@lru_cache(maxsize=config.MARKDOWN_ESCAPE_CACHE_SIZE)
+def escape_markdown(text, chars=MARKDOWN_SPECIAL_CHARS):
+    """Экранирование символов chars для MarkdownV2 с кешем результатов"""
+    return escape_markdown_uncached(text, chars)
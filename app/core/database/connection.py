@@ -1,25 +1,207 @@
+import asyncio
 import aiosqlite
 import logging
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, TypeVar
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+WriteOperation = Callable[[aiosqlite.Connection], Awaitable[T]]
+
 class DatabaseConnection:
-    """Менеджер подключения к базе данных"""
+    """Менеджер подключения к базе данных
+    
+    Чтение идет через пул подключений только для чтения, а все изменения
+    выполняет единственный писатель, владеющий отдельным подключением.
+    Писатель один на процесс: с воркерами (WORKER_PROCESSES > 0) записи
+    разных процессов упорядочивает блокировка SQLite с ожиданием busy_timeout.
+    """
     
     def __init__(self):
         self.db_path = config.DATABASE_URL.replace("sqlite:///", "")
+        self.pool_size = max(1, config.DB_POOL_SIZE)
+        self._pool: Optional[asyncio.Queue] = None
+        self._connections: List[aiosqlite.Connection] = []
+        self._pool_lock = asyncio.Lock()
+        self._write_connection: Optional[aiosqlite.Connection] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._closed = False
     
-    async def get_connection(self) -> aiosqlite.Connection:
-        """Получение нового подключения к БД"""
+    async def _open_connection(self, read_only: bool = False) -> aiosqlite.Connection:
+        """Открытие нового подключения к БД с профилем PRAGMA"""
         connection = await aiosqlite.connect(self.db_path)
         connection.row_factory = aiosqlite.Row
+        
+        await connection.execute(f"PRAGMA busy_timeout = {int(config.DB_BUSY_TIMEOUT_MS)}")
+        await connection.execute("PRAGMA synchronous = NORMAL")
+        await connection.execute(f"PRAGMA cache_size = -{int(config.DB_CACHE_SIZE_KB)}")
+        await connection.execute(f"PRAGMA mmap_size = {int(config.DB_MMAP_SIZE)}")
+        await connection.execute("PRAGMA temp_store = MEMORY")
+        if read_only:
+            await connection.execute("PRAGMA query_only = ON")
         return connection
     
+    async def init_pool(self):
+        """Создание писателя и пула читающих подключений (один раз при старте)"""
+        async with self._pool_lock:
+            self._check_open()
+            if self._pool is not None:
+                return
+            
+            try:
+                # Режим WAL сохраняется в файле БД, поэтому достаточно включить его один раз
+                self._write_connection = await self._open_connection()
+                cursor = await self._write_connection.execute("PRAGMA journal_mode = WAL")
+                journal_mode = (await cursor.fetchone())[0]
+                if journal_mode.lower() != "wal":
+                    logger.warning(f"Не удалось включить WAL, режим журнала: {journal_mode}")
+                
+                pool = asyncio.Queue(maxsize=self.pool_size)
+                for _ in range(self.pool_size):
+                    connection = await self._open_connection(read_only=True)
+                    self._connections.append(connection)
+                    pool.put_nowait(connection)
+            except Exception:
+                await self._close_connections()
+                raise
+            
+            self._pool = pool
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+            logger.info(f"Пул подключений к БД создан (читателей: {self.pool_size}, режим: {journal_mode})")
+    
+    def _check_open(self):
+        """Ошибка при обращении к БД после close(), вместо тихого пересоздания пула"""
+        if self._closed:
+            raise RuntimeError("Пул подключений к БД закрыт")
+    
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Получение читающего подключения из пула на время блока async with"""
+        self._check_open()
+        if self._pool is None:
+            await self.init_pool()
+        
+        pool = self._pool
+        connection = await pool.get()
+        try:
+            yield connection
+        finally:
+            try:
+                # Незавершенная транзакция не должна достаться следующему потребителю
+                if connection.in_transaction:
+                    await connection.rollback()
+            finally:
+                pool.put_nowait(connection)
+    
+    async def write(self, operation: WriteOperation) -> T:
+        """Выполнение изменяющей операции через единственного писателя
+        
+        Операция получает подключение писателя и выполняется в отдельной
+        транзакции: при успехе изменения фиксируются, при ошибке откатываются.
+        """
+        self._check_open()
+        if self._writer_task is None:
+            await self.init_pool()
+        
+        future = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait((operation, future))
+        return await future
+    
+    async def _writer_loop(self):
+        """Последовательное выполнение всех изменений в БД"""
+        connection = self._write_connection
+        while True:
+            operation, future = await self._write_queue.get()
+            if operation is None:
+                break
+            if future.cancelled():
+                continue
+            
+            try:
+                result = await operation(connection)
+                await connection.commit()
+            except Exception as e:
+                try:
+                    if connection.in_transaction:
+                        await connection.rollback()
+                except Exception as rollback_error:
+                    logger.error(f"Ошибка отката транзакции: {rollback_error}")
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+    
+    async def health_check(self) -> bool:
+        """Проверка доступности базы данных через читающее подключение
+        
+        Очередь писателя не используется: проверка не должна ждать
+        накопившиеся изменения и не должна их задерживать.
+        """
+        try:
+            async with self.connection() as connection:
+                cursor = await connection.execute("SELECT 1")
+                await cursor.fetchone()
+            return True
+        except Exception as e:
+            logger.error(f"Проверка подключения к БД не пройдена: {e}")
+            return False
+    
+    async def close(self, timeout: float = 5.0):
+        """Остановка писателя и закрытие пула подключений
+        
+        После закрытия connection() и write() вызывают RuntimeError.
+        """
+        async with self._pool_lock:
+            self._closed = True
+            if self._pool is None:
+                return
+            
+            # Писатель завершает уже поставленные в очередь изменения
+            self._write_queue.put_nowait((None, None))
+            try:
+                await asyncio.wait_for(self._writer_task, timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Писатель БД не успел завершить работу до закрытия")
+                self._writer_task.cancel()
+            self._writer_task = None
+            
+            # Ждем возврата выданных подключений, чтобы не оборвать запросы
+            for _ in range(len(self._connections)):
+                try:
+                    await asyncio.wait_for(self._pool.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    logger.warning("Не все подключения к БД были возвращены в пул до закрытия")
+                    break
+            
+            await self._close_connections()
+            self._pool = None
+            logger.info("Пул подключений к БД закрыт")
+    
+    async def _close_connections(self):
+        """Закрытие всех открытых подключений"""
+        connections = list(self._connections)
+        if self._write_connection is not None:
+            connections.append(self._write_connection)
+        
+        for connection in connections:
+            try:
+                await connection.close()
+            except Exception as e:
+                logger.warning(f"Ошибка закрытия подключения к БД: {e}")
+        self._connections.clear()
+        self._write_connection = None
+    
     async def initialize_database(self):
         """Инициализация базы данных"""
-        connection = await self.get_connection()
+        await self.write(self._create_schema)
+    
+    async def _create_schema(self, connection: aiosqlite.Connection):
+        """Создание таблиц и индексов"""
         try:
             # Создание таблицы пользователей (исправленная структура)
             await connection.execute("""
@@ -42,7 +224,11 @@ class DatabaseConnection:
                     hayd_average_days REAL DEFAULT NULL,
                     childbirth_count INTEGER DEFAULT 0,
                     childbirth_data TEXT DEFAULT NULL,
-                    daily_notifications_enabled INTEGER DEFAULT 1
+                    daily_notifications_enabled INTEGER DEFAULT 1,
+                    delivery_status TEXT DEFAULT 'active',
+                    delivery_failures INTEGER DEFAULT 0,
+                    delivery_failed_at DATETIME,
+                    utc_offset INTEGER
                 )
             """)
             
@@ -56,6 +242,27 @@ class DatabaseConnection:
                 # Поле уже существует
                 pass
             
+            # Статус доставки: пользователи, заблокировавшие бота, исключаются из рассылок
+            for column in (
+                "delivery_status TEXT DEFAULT 'active'",
+                "delivery_failures INTEGER DEFAULT 0",
+                "delivery_failed_at DATETIME"
+            ):
+                try:
+                    await connection.execute(f"ALTER TABLE users ADD COLUMN {column}")
+                    logger.info(f"Добавлено поле {column.split()[0]} в таблицу users")
+                except:
+                    # Поле уже существует
+                    pass
+            
+            # Смещение от UTC в минутах (определяется по городу, NULL - пояс по умолчанию)
+            try:
+                await connection.execute("ALTER TABLE users ADD COLUMN utc_offset INTEGER")
+                logger.info("Добавлено поле utc_offset в таблицу users")
+            except:
+                # Поле уже существует
+                pass
+            
             # Создание таблицы намазов
             await connection.execute("""
                 CREATE TABLE IF NOT EXISTS prayers (
@@ -100,10 +307,139 @@ class DatabaseConnection:
                 )
             """)
             
+            # Итоги пользователей по намазам и постам (поддерживаются триггерами)
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS user_totals (
+                    user_id INTEGER PRIMARY KEY,
+                    prayers_missed INTEGER NOT NULL DEFAULT 0,
+                    prayers_completed INTEGER NOT NULL DEFAULT 0,
+                    prayers_remaining INTEGER NOT NULL DEFAULT 0,
+                    fasting_missed INTEGER NOT NULL DEFAULT 0,
+                    fasting_completed INTEGER NOT NULL DEFAULT 0,
+                    fasting_remaining INTEGER NOT NULL DEFAULT 0,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            await self._create_user_totals_triggers(connection)
+            
+            # Сводная статистика для модераторов (поддерживается триггерами)
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS global_stats (
+                    dimension TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    value INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (dimension, bucket)
+                )
+            """)
+            # Счетчик исключенных из рассылок появился позже остальных счетчиков
+            cursor = await connection.execute("""
+                SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_users_undeliverable_update'
+            """)
+            backfill_undeliverable = await cursor.fetchone() is None
+            await self._create_global_stats_triggers(connection)
+            
+            # Состояния FSM (данные хранятся в компактном JSON)
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS fsm_states (
+                    key TEXT PRIMARY KEY,
+                    state TEXT,
+                    data TEXT,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            
+            # Очередь рассылок и статус доставки каждому получателю
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS broadcast_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_by INTEGER NOT NULL,
+                    chat_id INTEGER,
+                    message_id INTEGER,
+                    message_text TEXT NOT NULL,
+                    photo TEXT,
+                    video TEXT,
+                    filters TEXT,
+                    exclude_disabled_notifications BOOLEAN DEFAULT FALSE,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    cursor INTEGER NOT NULL DEFAULT -1,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    sent INTEGER NOT NULL DEFAULT 0,
+                    errors INTEGER NOT NULL DEFAULT 0,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    started_at DATETIME,
+                    finished_at DATETIME
+                )
+            """)
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS broadcast_recipients (
+                    job_id INTEGER NOT NULL,
+                    telegram_id INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    PRIMARY KEY (job_id, telegram_id),
+                    FOREIGN KEY (job_id) REFERENCES broadcast_jobs (id)
+                ) WITHOUT ROWID
+            """)
+            
+            # file_id загруженных в Telegram медиафайлов (ключ - источник файла)
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS media_cache (
+                    key TEXT PRIMARY KEY,
+                    file_id TEXT NOT NULL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Снимок аудитории напоминаний, собираемый заранее для ближайших часовых поясов
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS reminder_audience (
+                    utc_offset INTEGER NOT NULL,
+                    telegram_id INTEGER NOT NULL,
+                    display_name TEXT NOT NULL,
+                    remaining INTEGER NOT NULL,
+                    built_at REAL NOT NULL,
+                    PRIMARY KEY (utc_offset, telegram_id)
+                ) WITHOUT ROWID
+            """)
+            
+            # История запусков фоновых задач (время, задержка старта, производительность)
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS job_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    scheduled_at DATETIME,
+                    started_at DATETIME,
+                    finished_at DATETIME,
+                    lag REAL,
+                    duration REAL,
+                    processed INTEGER DEFAULT 0,
+                    rate REAL,
+                    error TEXT
+                )
+            """)
+            
+            # Последняя обработанная плановая отметка задачи (например, интервал напоминаний)
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS job_checkpoints (
+                    job_id TEXT PRIMARY KEY,
+                    checkpoint DATETIME NOT NULL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
             # Создание индексов
             await connection.execute("""
                 CREATE INDEX IF NOT EXISTS idx_users_telegram_id ON users(telegram_id)
             """)
+            await connection.execute("""
+                CREATE INDEX IF NOT EXISTS idx_users_registered_gender_birth_date
+                ON users(is_registered, gender, birth_date)
+            """)
+            # Аудитория рассылок: страницы по telegram_id без сортировки, фильтры проверяются по индексу
+            await connection.execute("""
+                CREATE INDEX IF NOT EXISTS idx_users_audience
+                ON users(is_registered, delivery_status, telegram_id, gender, birth_date, daily_notifications_enabled)
+            """)
             await connection.execute("""
                 CREATE INDEX IF NOT EXISTS idx_prayers_user_id ON prayers(user_id)
             """)
@@ -113,6 +449,56 @@ class DatabaseConnection:
             await connection.execute("""
                 CREATE INDEX IF NOT EXISTS idx_admins_telegram_id ON admins(telegram_id)
             """)
+            await connection.execute("""
+                CREATE INDEX IF NOT EXISTS idx_fsm_states_updated_at ON fsm_states(updated_at)
+            """)
+            await connection.execute("""
+                CREATE INDEX IF NOT EXISTS idx_users_last_activity ON users(last_activity)
+            """)
+            await connection.execute("""
+                CREATE INDEX IF NOT EXISTS idx_users_utc_offset ON users(utc_offset, telegram_id)
+            """)
+            await connection.execute("""
+                CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_status ON broadcast_jobs(status)
+            """)
+            await connection.execute("""
+                CREATE INDEX IF NOT EXISTS idx_job_runs_job_id ON job_runs(job_id, started_at)
+            """)
+            
+            # Итоги для пользователей, появившихся до таблицы user_totals
+            await connection.execute("""
+                INSERT OR IGNORE INTO user_totals (
+                    user_id, prayers_missed, prayers_completed, prayers_remaining,
+                    fasting_missed, fasting_completed, fasting_remaining
+                )
+                SELECT u.telegram_id,
+                       COALESCE(SUM(p.total_missed), 0),
+                       COALESCE(SUM(p.completed), 0),
+                       COALESCE(SUM(MAX(0, p.total_missed - p.completed)), 0),
+                       COALESCE(u.fasting_missed_days, 0),
+                       COALESCE(u.fasting_completed_days, 0),
+                       MAX(0, COALESCE(u.fasting_missed_days, 0) - COALESCE(u.fasting_completed_days, 0))
+                FROM users u
+                LEFT JOIN prayers p ON p.user_id = u.telegram_id
+                WHERE u.telegram_id NOT IN (SELECT user_id FROM user_totals)
+                GROUP BY u.telegram_id
+            """)
+            
+            # Первичное заполнение сводной статистики для существующих БД
+            cursor = await connection.execute("SELECT 1 FROM global_stats LIMIT 1")
+            if await cursor.fetchone() is None:
+                from .repositories.global_stats_repository import COMPUTED_GLOBAL_STATS_QUERY
+                await connection.execute(f"""
+                    INSERT INTO global_stats (dimension, bucket, value)
+                    SELECT dimension, bucket, value FROM ({COMPUTED_GLOBAL_STATS_QUERY})
+                    WHERE value != 0
+                """)
+            elif backfill_undeliverable:
+                await connection.execute("""
+                    INSERT INTO global_stats (dimension, bucket, value)
+                    SELECT 'undeliverable', '', COUNT(*) FROM users WHERE delivery_status != 'active'
+                    ON CONFLICT(dimension, bucket) DO UPDATE SET value = excluded.value
+                """)
             
             await connection.commit()
             logger.info("База данных инициализирована")
@@ -120,8 +506,116 @@ class DatabaseConnection:
         except Exception as e:
             logger.error(f"Ошибка инициализации базы данных: {e}")
             raise
-        finally:
-            await connection.close()
+
+    async def _create_user_totals_triggers(self, connection: aiosqlite.Connection):
+        """Триггеры, поддерживающие таблицу user_totals при каждой записи"""
+        # Итоги по намазам пересчитываются из строк пользователя (не больше девяти, по индексу)
+        prayer_totals_upsert = """
+            INSERT INTO user_totals (user_id, prayers_missed, prayers_completed, prayers_remaining)
+            SELECT {ref}.user_id,
+                   COALESCE(SUM(total_missed), 0),
+                   COALESCE(SUM(completed), 0),
+                   COALESCE(SUM(MAX(0, total_missed - completed)), 0)
+            FROM prayers WHERE user_id = {ref}.user_id
+            ON CONFLICT(user_id) DO UPDATE SET
+                prayers_missed = excluded.prayers_missed,
+                prayers_completed = excluded.prayers_completed,
+                prayers_remaining = excluded.prayers_remaining,
+                updated_at = CURRENT_TIMESTAMP;
+        """
+        fasting_totals_upsert = """
+            INSERT INTO user_totals (user_id, fasting_missed, fasting_completed, fasting_remaining)
+            VALUES (
+                NEW.telegram_id,
+                COALESCE(NEW.fasting_missed_days, 0),
+                COALESCE(NEW.fasting_completed_days, 0),
+                MAX(0, COALESCE(NEW.fasting_missed_days, 0) - COALESCE(NEW.fasting_completed_days, 0))
+            )
+            ON CONFLICT(user_id) DO UPDATE SET
+                fasting_missed = excluded.fasting_missed,
+                fasting_completed = excluded.fasting_completed,
+                fasting_remaining = excluded.fasting_remaining,
+                updated_at = CURRENT_TIMESTAMP;
+        """
+        triggers = {
+            "trg_prayers_totals_insert": ("AFTER INSERT ON prayers", prayer_totals_upsert.format(ref="NEW")),
+            "trg_prayers_totals_update": (
+                "AFTER UPDATE OF total_missed, completed ON prayers", prayer_totals_upsert.format(ref="NEW")
+            ),
+            "trg_prayers_totals_delete": ("AFTER DELETE ON prayers", prayer_totals_upsert.format(ref="OLD")),
+            "trg_users_totals_insert": ("AFTER INSERT ON users", fasting_totals_upsert),
+            "trg_users_totals_update": (
+                "AFTER UPDATE OF fasting_missed_days, fasting_completed_days ON users", fasting_totals_upsert
+            ),
+            "trg_users_totals_delete": (
+                "AFTER DELETE ON users", "DELETE FROM user_totals WHERE user_id = OLD.telegram_id;"
+            ),
+        }
+        for name, (event, body) in triggers.items():
+            await connection.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+    
+    async def _create_global_stats_triggers(self, connection: aiosqlite.Connection):
+        """Триггеры, инкрементально поддерживающие таблицу global_stats"""
+        def _add(dimension: str, bucket: str, value: str, condition: str) -> str:
+            return f"""
+                INSERT INTO global_stats (dimension, bucket, value)
+                SELECT '{dimension}', {bucket}, {value} WHERE {condition}
+                ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+            """
+        
+        def _user_stats(ref: str, sign: str) -> str:
+            # Вклад зарегистрированного пользователя в счетчики по профилю
+            registered = f"{ref}.is_registered = TRUE"
+            statements = [_add("users", "''", sign, registered)]
+            for dimension in ("gender", "city", "birth_date"):
+                statements.append(_add(
+                    dimension, f"{ref}.{dimension}", sign,
+                    f"{registered} AND COALESCE({ref}.{dimension}, '') != ''"
+                ))
+            return "".join(statements)
+        
+        def _undeliverable(ref: str, sign: str) -> str:
+            # Пользователи, исключенные из рассылок (не зависит от регистрации)
+            return _add("undeliverable", "''", sign, f"{ref}.delivery_status != 'active'")
+        
+        prayer_users_first = "(SELECT COUNT(*) FROM prayers WHERE user_id = NEW.user_id) = 1"
+        prayer_users_last = "NOT EXISTS (SELECT 1 FROM prayers WHERE user_id = OLD.user_id)"
+        
+        triggers = {
+            "trg_users_stats_insert": ("AFTER INSERT ON users", _user_stats("NEW", "1")),
+            "trg_users_stats_update": (
+                "AFTER UPDATE OF is_registered, gender, city, birth_date ON users",
+                _user_stats("OLD", "-1") + _user_stats("NEW", "1")
+            ),
+            "trg_users_stats_delete": ("AFTER DELETE ON users", _user_stats("OLD", "-1")),
+            "trg_users_undeliverable_insert": ("AFTER INSERT ON users", _undeliverable("NEW", "1")),
+            # Запись активности переписывает статус тем же значением - такие строки пропускаются
+            "trg_users_undeliverable_update": (
+                "AFTER UPDATE OF delivery_status ON users"
+                " WHEN OLD.delivery_status IS NOT NEW.delivery_status",
+                _undeliverable("OLD", "-1") + _undeliverable("NEW", "1")
+            ),
+            "trg_users_undeliverable_delete": ("AFTER DELETE ON users", _undeliverable("OLD", "-1")),
+            "trg_prayers_stats_insert": (
+                "AFTER INSERT ON prayers",
+                _add("prayer_missed", "NEW.prayer_type", "NEW.total_missed", "1")
+                + _add("prayer_completed", "NEW.prayer_type", "NEW.completed", "1")
+                + _add("prayer_users", "''", "1", prayer_users_first)
+            ),
+            "trg_prayers_stats_update": (
+                "AFTER UPDATE OF total_missed, completed ON prayers",
+                _add("prayer_missed", "NEW.prayer_type", "NEW.total_missed - OLD.total_missed", "1")
+                + _add("prayer_completed", "NEW.prayer_type", "NEW.completed - OLD.completed", "1")
+            ),
+            "trg_prayers_stats_delete": (
+                "AFTER DELETE ON prayers",
+                _add("prayer_missed", "OLD.prayer_type", "-OLD.total_missed", "1")
+                + _add("prayer_completed", "OLD.prayer_type", "-OLD.completed", "1")
+                + _add("prayer_users", "''", "-1", prayer_users_last)
+            ),
+        }
+        for name, (event, body) in triggers.items():
+            await connection.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
 
 # Создание глобального экземпляра
 db_manager = DatabaseConnection()
\ No newline at end of file
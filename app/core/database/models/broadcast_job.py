@@ -0,0 +1,46 @@
+from typing import Any, Dict, Optional
+from .base import BaseModel
+
+class BroadcastJob(BaseModel):
+    """Задание рассылки в очереди"""
+    
+    def __init__(
+        self,
+        created_by: int,
+        message_text: str,
+        filters: Optional[Dict[str, Any]] = None,
+        photo: Optional[str] = None,
+        video: Optional[str] = None,
+        exclude_disabled_notifications: bool = False,
+        chat_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        id: Optional[int] = None,
+        status: str = "pending",  # pending -> running -> done / failed
+        cursor: int = -1,  # telegram_id последнего обработанного получателя
+        total: int = 0,
+        sent: int = 0,
+        errors: int = 0
+    ):
+        super().__init__()
+        self.id = id
+        self.created_by = created_by
+        self.message_text = message_text
+        self.filters = filters or {}
+        self.photo = photo
+        self.video = video
+        self.exclude_disabled_notifications = exclude_disabled_notifications
+        
+        # Сообщение модератора, в котором показывается прогресс
+        self.chat_id = chat_id
+        self.message_id = message_id
+        
+        self.status = status
+        self.cursor = cursor
+        self.total = total
+        self.sent = sent
+        self.errors = errors
+    
+    @property
+    def processed(self) -> int:
+        """Количество обработанных получателей"""
+        return self.sent + self.errors
@@ -1,5 +1,5 @@
 from datetime import datetime, date
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, NamedTuple
 from .base import BaseModel
 import json
 
@@ -22,7 +22,8 @@ class User(BaseModel):
         hayd_average_days: Optional[float] = None,
         childbirth_count: int = -1,
         childbirth_data: Optional[str] = None,
-        daily_notifications_enabled: int = 1  # Новое поле: 1 - включены, 0 - отключены
+        daily_notifications_enabled: int = 1,  # Новое поле: 1 - включены, 0 - отключены
+        utc_offset: Optional[int] = None  # Смещение от UTC в минутах (None - по городу)
     ):
         super().__init__()
         self.telegram_id = telegram_id
@@ -47,6 +48,7 @@ class User(BaseModel):
         
         # Настройки уведомлений
         self.daily_notifications_enabled = daily_notifications_enabled
+        self.utc_offset = utc_offset
     
     @property
     def fasting_remaining_days(self) -> int:
@@ -74,11 +76,48 @@ class User(BaseModel):
     @property
     def display_name(self) -> str:
         """Отображаемое имя пользователя"""
-        if self.username:
-            return self.username
-        elif self.gender == 'male':
-            return 'брат'
-        elif self.gender == 'female':
-            return 'сестра' 
-        else:
-            return 'пользователь'
\ No newline at end of file
+        return get_display_name(self.username, self.gender)
+
+
+class UserRecipient(NamedTuple):
+    """Получатель рассылки: минимальный набор полей без полной модели User"""
+    
+    telegram_id: int
+    username: Optional[str]
+    gender: Optional[str]
+    
+    @property
+    def display_name(self) -> str:
+        """Отображаемое имя пользователя"""
+        return get_display_name(self.username, self.gender)
+
+
+class ReminderAudienceEntry(NamedTuple):
+    """Получатель из снимка аудитории напоминаний (таблица reminder_audience)"""
+    
+    telegram_id: int
+    display_name: str
+    remaining: int
+
+
+def get_display_name(username: Optional[str], gender: Optional[str]) -> str:
+    """Отображаемое имя по username и полу"""
+    if username:
+        return username
+    elif gender == 'male':
+        return 'брат'
+    elif gender == 'female':
+        return 'сестра'
+    else:
+        return 'пользователь'
+
+
+# То же правило, что в get_display_name, для вычисления имени в SQL (таблица users)
+DISPLAY_NAME_SQL = """
+    CASE
+        WHEN COALESCE(username, '') != '' THEN username
+        WHEN gender = 'male' THEN 'брат'
+        WHEN gender = 'female' THEN 'сестра'
+        ELSE 'пользователь'
+    END
+"""
@@ -0,0 +1,28 @@
+from .base import BaseModel
+
+class UserTotals(BaseModel):
+    """Денормализованные итоги пользователя по намазам и постам"""
+    
+    def __init__(
+        self,
+        user_id: int,
+        prayers_missed: int = 0,
+        prayers_completed: int = 0,
+        prayers_remaining: int = 0,
+        fasting_missed: int = 0,
+        fasting_completed: int = 0,
+        fasting_remaining: int = 0
+    ):
+        super().__init__()
+        self.user_id = user_id
+        self.prayers_missed = prayers_missed
+        self.prayers_completed = prayers_completed
+        self.prayers_remaining = prayers_remaining
+        self.fasting_missed = fasting_missed
+        self.fasting_completed = fasting_completed
+        self.fasting_remaining = fasting_remaining
+    
+    @property
+    def has_data(self) -> bool:
+        """Есть ли данные о намазах или постах"""
+        return self.prayers_missed > 0 or self.fasting_missed > 0
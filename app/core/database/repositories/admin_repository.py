@@ -1,29 +1,37 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from ..connection import db_manager
 from ..models.admin import Admin
+from ...cache import RoleCache
+from ...config import config
+from ...signals import process_signals, ROLES_CHANGED
+
+# Общая для процесса карта ролей: проверка роли без запросов к БД.
+# Изменение ролей в любом процессе помечает карты всех процессов устаревшими
+role_cache = RoleCache(config.ROLE_CACHE_REFRESH_SECONDS)
+process_signals.subscribe(ROLES_CHANGED, role_cache.invalidate)
 
 class AdminRepository:
     """Репозиторий для работы с администраторами"""
     
     async def add_admin(self, admin: Admin) -> bool:
         """Добавление администратора"""
-        connection = await db_manager.get_connection()
-        try:
+        async def _insert(connection):
             await connection.execute("""
                 INSERT INTO admins (telegram_id, role, added_by, is_active)
                 VALUES (?, ?, ?, ?)
             """, (admin.telegram_id, admin.role, admin.added_by, admin.is_active))
-            await connection.commit()
+        
+        try:
+            await db_manager.write(_insert)
             return True
         except Exception:
             return False
         finally:
-            await connection.close()
+            process_signals.publish(ROLES_CHANGED)
     
     async def get_admin(self, telegram_id: int) -> Optional[Admin]:
         """Получение администратора по telegram_id"""
-        connection = await db_manager.get_connection()
-        try:
+        async with db_manager.connection() as connection:
             cursor = await connection.execute("""
                 SELECT * FROM admins WHERE telegram_id = ? AND is_active = TRUE
             """, (telegram_id,))
@@ -37,26 +45,24 @@ class AdminRepository:
                 added_by=row['added_by'],
                 is_active=row['is_active']
             )
-        finally:
-            await connection.close()
     
     async def remove_admin(self, telegram_id: int) -> bool:
         """Удаление администратора"""
-        connection = await db_manager.get_connection()
-        try:
+        async def _deactivate(connection):
             await connection.execute("""
                 UPDATE admins SET is_active = FALSE, updated_at = CURRENT_TIMESTAMP
                 WHERE telegram_id = ?
             """, (telegram_id,))
-            await connection.commit()
-            return True
+        
+        try:
+            await db_manager.write(_deactivate)
         finally:
-            await connection.close()
+            process_signals.publish(ROLES_CHANGED)
+        return True
     
     async def get_all_admins(self) -> List[Admin]:
         """Получение всех активных администраторов"""
-        connection = await db_manager.get_connection()
-        try:
+        async with db_manager.connection() as connection:
             cursor = await connection.execute("""
                 SELECT * FROM admins WHERE is_active = TRUE ORDER BY created_at
             """)
@@ -71,5 +77,35 @@ class AdminRepository:
                     is_active=row['is_active']
                 ))
             return admins
-        finally:
-            await connection.close()
\ No newline at end of file
+    
+    async def load_roles(self) -> Dict[int, str]:
+        """Загрузка карты ролей привилегированных пользователей
+        
+        Роль администратора из таблицы admins действует, только если она
+        активна и в профиле пользователя тоже указана привилегированная роль.
+        Если роли изменились во время чтения, карта не сохраняется и
+        остается устаревшей до следующего обращения.
+        """
+        generation = role_cache.generation
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute("""
+                SELECT u.telegram_id,
+                       CASE WHEN a.telegram_id IS NOT NULL THEN a.role ELSE u.role END AS role
+                FROM users u
+                LEFT JOIN admins a ON a.telegram_id = u.telegram_id AND a.is_active = TRUE
+                WHERE u.role IN (?, ?)
+            """, (config.Roles.ADMIN, config.Roles.MODERATOR))
+            rows = await cursor.fetchall()
+        
+        roles = {row['telegram_id']: row['role'] for row in rows}
+        role_cache.replace(roles, generation)
+        return roles
+    
+    async def get_effective_role(self, telegram_id: int) -> str:
+        """Действующая роль пользователя по карте ролей"""
+        if role_cache.is_stale:
+            async with role_cache.lock:
+                # Карта, прочитанная одновременно с изменением ролей, не сохраняется - читаем снова
+                while role_cache.is_stale:
+                    await self.load_roles()
+        return role_cache.get(telegram_id, config.Roles.USER)
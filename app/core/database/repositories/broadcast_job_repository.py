@@ -0,0 +1,123 @@
+import json
+from typing import Iterable, List, Optional
+from ..connection import db_manager
+from ..models.broadcast_job import BroadcastJob
+import logging
+logger = logging.getLogger(__name__)
+
+class BroadcastJobRepository:
+    """Репозиторий очереди рассылок (таблицы broadcast_jobs и broadcast_recipients)"""
+    
+    async def create_job(self, job: BroadcastJob) -> int:
+        """Постановка рассылки в очередь"""
+        async def _insert(connection):
+            cursor = await connection.execute("""
+                INSERT INTO broadcast_jobs (
+                    created_by, chat_id, message_id, message_text, photo, video,
+                    filters, exclude_disabled_notifications
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                job.created_by, job.chat_id, job.message_id, job.message_text,
+                job.photo, job.video, json.dumps(job.filters, ensure_ascii=False),
+                job.exclude_disabled_notifications
+            ))
+            return cursor.lastrowid
+        
+        job.id = await db_manager.write(_insert)
+        return job.id
+    
+    async def get_next_job(self) -> Optional[BroadcastJob]:
+        """Самое раннее незавершенное задание"""
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute("""
+                SELECT * FROM broadcast_jobs
+                WHERE status IN ('pending', 'running')
+                ORDER BY id LIMIT 1
+            """)
+            row = await cursor.fetchone()
+        
+        if not row:
+            return None
+        
+        return BroadcastJob(
+            id=row['id'],
+            created_by=row['created_by'],
+            chat_id=row['chat_id'],
+            message_id=row['message_id'],
+            message_text=row['message_text'],
+            photo=row['photo'],
+            video=row['video'],
+            filters=json.loads(row['filters']) if row['filters'] else {},
+            exclude_disabled_notifications=bool(row['exclude_disabled_notifications']),
+            status=row['status'],
+            cursor=row['cursor'],
+            total=row['total'],
+            sent=row['sent'],
+            errors=row['errors']
+        )
+    
+    async def add_recipients(self, job_id: int, telegram_ids: List[int]):
+        """Добавление получателей задания (повторное добавление игнорируется)"""
+        async def _insert(connection):
+            await connection.executemany("""
+                INSERT OR IGNORE INTO broadcast_recipients (job_id, telegram_id) VALUES (?, ?)
+            """, [(job_id, telegram_id) for telegram_id in telegram_ids])
+        
+        await db_manager.write(_insert)
+    
+    async def start_job(self, job_id: int) -> int:
+        """Перевод задания в работу после сбора получателей, возвращает их количество"""
+        async def _start(connection):
+            cursor = await connection.execute("""
+                UPDATE broadcast_jobs
+                SET status = 'running',
+                    total = (SELECT COUNT(*) FROM broadcast_recipients WHERE job_id = ?),
+                    started_at = COALESCE(started_at, CURRENT_TIMESTAMP)
+                WHERE id = ?
+                RETURNING total
+            """, (job_id, job_id))
+            row = await cursor.fetchone()
+            return row['total'] if row else 0
+        
+        return await db_manager.write(_start)
+    
+    async def get_pending_recipients(self, job_id: int, after: int, limit: int) -> List[int]:
+        """Следующая страница неотправленных получателей после контрольной точки"""
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute("""
+                SELECT telegram_id FROM broadcast_recipients
+                WHERE job_id = ? AND telegram_id > ? AND status = 'pending'
+                ORDER BY telegram_id
+                LIMIT ?
+            """, (job_id, after, limit))
+            rows = await cursor.fetchall()
+        return [row['telegram_id'] for row in rows]
+    
+    async def save_progress(self, job_id: int, sent_ids: Iterable[int],
+                            failed_ids: Iterable[int], cursor: int):
+        """Сохранение статусов страницы и контрольной точки одной транзакцией"""
+        sent_ids = list(sent_ids)
+        failed_ids = list(failed_ids)
+        
+        async def _save(connection):
+            await connection.executemany("""
+                UPDATE broadcast_recipients SET status = ? WHERE job_id = ? AND telegram_id = ?
+            """, [('sent', job_id, telegram_id) for telegram_id in sent_ids] +
+                 [('failed', job_id, telegram_id) for telegram_id in failed_ids])
+            await connection.execute("""
+                UPDATE broadcast_jobs
+                SET cursor = ?, sent = sent + ?, errors = errors + ?
+                WHERE id = ?
+            """, (cursor, len(sent_ids), len(failed_ids), job_id))
+        
+        await db_manager.write(_save)
+    
+    async def finish_job(self, job_id: int, status: str = "done"):
+        """Завершение задания"""
+        async def _finish(connection):
+            await connection.execute("""
+                UPDATE broadcast_jobs SET status = ?, finished_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (status, job_id))
+        
+        await db_manager.write(_finish)
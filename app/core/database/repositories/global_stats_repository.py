@@ -0,0 +1,113 @@
+from datetime import date
+from typing import Dict, List, Tuple
+from ..connection import db_manager
+import logging
+logger = logging.getLogger(__name__)
+
+# Полный пересчет сводной статистики из исходных таблиц
+COMPUTED_GLOBAL_STATS_QUERY = """
+    SELECT 'users' AS dimension, '' AS bucket, COUNT(*) AS value
+    FROM users WHERE is_registered = TRUE
+    UNION ALL
+    SELECT 'gender', gender, COUNT(*) FROM users
+    WHERE is_registered = TRUE AND COALESCE(gender, '') != ''
+    GROUP BY gender
+    UNION ALL
+    SELECT 'city', city, COUNT(*) FROM users
+    WHERE is_registered = TRUE AND COALESCE(city, '') != ''
+    GROUP BY city
+    UNION ALL
+    SELECT 'birth_date', birth_date, COUNT(*) FROM users
+    WHERE is_registered = TRUE AND COALESCE(birth_date, '') != ''
+    GROUP BY birth_date
+    UNION ALL
+    SELECT 'undeliverable', '', COUNT(*) FROM users
+    WHERE delivery_status != 'active'
+    UNION ALL
+    SELECT 'prayer_users', '', COUNT(DISTINCT user_id) FROM prayers
+    UNION ALL
+    SELECT 'prayer_missed', prayer_type, SUM(total_missed) FROM prayers
+    GROUP BY prayer_type
+    UNION ALL
+    SELECT 'prayer_completed', prayer_type, SUM(completed) FROM prayers
+    GROUP BY prayer_type
+"""
+
+class GlobalStatsRepository:
+    """Репозиторий сводной статистики (таблица global_stats)
+    
+    Таблицу инкрементально поддерживают триггеры на users и prayers
+    (включая число пользователей, исключенных из рассылок),
+    периодическая сверка пересчитывает ее целиком и сообщает о расхождениях.
+    """
+    
+    async def get_all(self) -> Dict[str, Dict[str, int]]:
+        """Получение всех ненулевых счетчиков, сгруппированных по измерениям"""
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute("""
+                SELECT dimension, bucket, value FROM global_stats
+                WHERE value != 0 AND dimension != 'birth_date'
+            """)
+            rows = await cursor.fetchall()
+        
+        result: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            result.setdefault(row['dimension'], {})[row['bucket']] = row['value']
+        return result
+    
+    async def get_age_groups(self, groups: List[Tuple[str, date]], oldest_group: str) -> Dict[str, int]:
+        """Количество пользователей по возрастным группам
+        
+        groups - пары (название группы, дата рождения, после которой
+        пользователь моложе верхней границы группы) по возрастанию возраста.
+        """
+        cases = " ".join("WHEN bucket > ? THEN ?" for _ in groups)
+        params = []
+        for label, birth_date_after in groups:
+            params.extend([birth_date_after.isoformat(), label])
+        params.append(oldest_group)
+        
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute(f"""
+                SELECT CASE {cases} ELSE ? END AS age_group, SUM(value) AS count
+                FROM global_stats
+                WHERE dimension = 'birth_date' AND value > 0
+                GROUP BY age_group
+            """, params)
+            rows = await cursor.fetchall()
+        return {row['age_group']: row['count'] for row in rows}
+    
+    async def reconcile(self) -> int:
+        """Сверка и пересчет сводной статистики, возвращает число исправленных счетчиков"""
+        async def _reconcile(connection):
+            cursor = await connection.execute(f"""
+                SELECT COUNT(*) FROM (
+                    SELECT DISTINCT dimension, bucket FROM (
+                    SELECT dimension, bucket, value FROM global_stats WHERE value != 0
+                    EXCEPT
+                    SELECT dimension, bucket, value FROM ({COMPUTED_GLOBAL_STATS_QUERY}) WHERE value != 0
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT dimension, bucket, value FROM ({COMPUTED_GLOBAL_STATS_QUERY}) WHERE value != 0
+                        EXCEPT
+                        SELECT dimension, bucket, value FROM global_stats WHERE value != 0
+                    )
+                    )
+                )
+            """)
+            drifted = (await cursor.fetchone())[0]
+            
+            await connection.execute("DELETE FROM global_stats")
+            await connection.execute(f"""
+                INSERT INTO global_stats (dimension, bucket, value)
+                SELECT dimension, bucket, value FROM ({COMPUTED_GLOBAL_STATS_QUERY})
+                WHERE value != 0
+            """)
+            return drifted
+        
+        drifted = await db_manager.write(_reconcile)
+        if drifted:
+            logger.warning(f"Сводная статистика расходилась с данными, исправлено счетчиков: {drifted}")
+        else:
+            logger.info("Сводная статистика согласована с данными")
+        return drifted
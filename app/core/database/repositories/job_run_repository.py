@@ -0,0 +1,81 @@
+import datetime
+from typing import Optional
+from ..connection import db_manager
+import logging
+logger = logging.getLogger(__name__)
+
+def _format(value: Optional[datetime.datetime]) -> Optional[str]:
+    """Время в UTC в формате CURRENT_TIMESTAMP"""
+    if value is None:
+        return None
+    return value.astimezone(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+class JobRunRepository:
+    """Репозиторий истории запусков фоновых задач (таблица job_runs)"""
+    
+    async def start_run(self, job_id: str, scheduled_at: datetime.datetime,
+                        started_at: datetime.datetime) -> int:
+        """Запись о начале выполнения задачи"""
+        lag = (started_at - scheduled_at).total_seconds()
+        
+        async def _insert(connection):
+            cursor = await connection.execute("""
+                INSERT INTO job_runs (job_id, status, scheduled_at, started_at, lag)
+                VALUES (?, 'running', ?, ?, ?)
+            """, (job_id, _format(scheduled_at), _format(started_at), lag))
+            return cursor.lastrowid
+        
+        return await db_manager.write(_insert)
+    
+    async def finish_run(self, run_id: int, status: str, duration: float,
+                         processed: int = 0, error: Optional[str] = None):
+        """Запись результата выполнения задачи"""
+        rate = processed / duration if duration > 0 else None
+        
+        async def _update(connection):
+            await connection.execute("""
+                UPDATE job_runs
+                SET status = ?, finished_at = CURRENT_TIMESTAMP, duration = ?,
+                    processed = ?, rate = ?, error = ?
+                WHERE id = ?
+            """, (status, duration, processed, rate, error, run_id))
+        
+        await db_manager.write(_update)
+    
+    async def record_skipped(self, job_id: str, status: str, scheduled_at: datetime.datetime):
+        """Запись о пропущенном запуске (опоздание больше допустимого или задача еще выполняется)"""
+        async def _insert(connection):
+            await connection.execute("""
+                INSERT INTO job_runs (job_id, status, scheduled_at, lag)
+                VALUES (?, ?, ?, ?)
+            """, (
+                job_id, status, _format(scheduled_at),
+                (datetime.datetime.now(datetime.timezone.utc) - scheduled_at).total_seconds()
+            ))
+        
+        await db_manager.write(_insert)
+    
+    async def get_checkpoint(self, job_id: str) -> Optional[datetime.datetime]:
+        """Последняя обработанная плановая отметка задачи (UTC)"""
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute(
+                "SELECT checkpoint FROM job_checkpoints WHERE job_id = ?", (job_id,)
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        return datetime.datetime.strptime(row['checkpoint'], "%Y-%m-%d %H:%M:%S").replace(
+            tzinfo=datetime.timezone.utc
+        )
+    
+    async def save_checkpoint(self, job_id: str, checkpoint: datetime.datetime):
+        """Сохранение обработанной плановой отметки задачи (отметка только растет)"""
+        async def _upsert(connection):
+            await connection.execute("""
+                INSERT INTO job_checkpoints (job_id, checkpoint) VALUES (?, ?)
+                ON CONFLICT(job_id) DO UPDATE SET
+                    checkpoint = MAX(checkpoint, excluded.checkpoint),
+                    updated_at = CURRENT_TIMESTAMP
+            """, (job_id, _format(checkpoint)))
+        
+        await db_manager.write(_upsert)
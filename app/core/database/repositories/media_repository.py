@@ -0,0 +1,37 @@
+from typing import Optional
+from ..connection import db_manager
+import logging
+logger = logging.getLogger(__name__)
+
+class MediaRepository:
+    """Репозиторий file_id загруженных медиафайлов (таблица media_cache)"""
+    
+    async def get_file_id(self, key: str) -> Optional[str]:
+        """Получение сохраненного file_id по ключу источника"""
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute("""
+                SELECT file_id FROM media_cache WHERE key = ?
+            """, (key,))
+            row = await cursor.fetchone()
+        return row['file_id'] if row else None
+    
+    async def save_file_id(self, key: str, file_id: str):
+        """Сохранение file_id после загрузки файла"""
+        async def _upsert(connection):
+            await connection.execute("""
+                INSERT INTO media_cache (key, file_id) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    file_id = excluded.file_id,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (key, file_id))
+        
+        await db_manager.write(_upsert)
+    
+    async def delete_file_id(self, key: str, file_id: str):
+        """Удаление недействительного file_id (если его еще не заменили)"""
+        async def _delete(connection):
+            await connection.execute("""
+                DELETE FROM media_cache WHERE key = ? AND file_id = ?
+            """, (key, file_id))
+        
+        await db_manager.write(_delete)
@@ -7,8 +7,7 @@ class PrayerHistoryRepository:
     
     async def add_history_record(self, history: PrayerHistory) -> bool:
         """Добавление записи в историю"""
-        connection = await db_manager.get_connection()
-        try:
+        async def _insert(connection):
             await connection.execute("""
                 INSERT INTO prayer_history (
                     user_id, prayer_type, action, amount, 
@@ -19,15 +18,13 @@ class PrayerHistoryRepository:
                 history.amount, history.previous_value, history.new_value,
                 history.comment
             ))
-            await connection.commit()
-            return True
-        finally:
-            await connection.close()
+        
+        await db_manager.write(_insert)
+        return True
     
     async def get_user_history(self, user_id: int, limit: int = 50) -> List[PrayerHistory]:
         """Получение истории пользователя"""
-        connection = await db_manager.get_connection()
-        try:
+        async with db_manager.connection() as connection:
             cursor = await connection.execute("""
                 SELECT * FROM prayer_history 
                 WHERE user_id = ? 
@@ -48,5 +45,3 @@ class PrayerHistoryRepository:
                     comment=row['comment']
                 ))
             return history
-        finally:
-            await connection.close()
\ No newline at end of file
@@ -8,36 +8,74 @@ class PrayerRepository:
     async def create_or_update_prayer(self, user_id: int, prayer_type: str, 
                                       total_missed: int = 0, completed: int = 0) -> bool:
         """Создание или обновление намаза"""
-        connection = await db_manager.get_connection()
-        try:
-            # Сначала проверяем, существует ли запись
-            cursor = await connection.execute("""
-                SELECT id FROM prayers WHERE user_id = ? AND prayer_type = ?
-            """, (user_id, prayer_type))
-            existing = await cursor.fetchone()
-            
-            if existing:
-                # Обновляем существующую запись
-                await connection.execute("""
-                    UPDATE prayers SET total_missed = ?, completed = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE user_id = ? AND prayer_type = ?
-                """, (total_missed, completed, user_id, prayer_type))
+        async def _upsert(connection):
+            await connection.execute("""
+                INSERT INTO prayers (user_id, prayer_type, total_missed, completed)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id, prayer_type) DO UPDATE SET
+                    total_missed = excluded.total_missed,
+                    completed = excluded.completed,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (user_id, prayer_type, total_missed, completed))
+        
+        await db_manager.write(_upsert)
+        return True
+    
+    async def bulk_set_prayers(self, user_id: int, prayers_data: Dict[str, int],
+                               reset_completed: bool, action: str,
+                               comment: Optional[str] = None) -> bool:
+        """Пакетная установка количества пропущенных намазов
+        
+        Все типы намазов и записи истории пишутся одной транзакцией.
+        При reset_completed=True восполненные обнуляются, иначе сохраняются.
+        """
+        if not prayers_data:
+            return True
+        
+        items = list(prayers_data.items())
+        completed_expression = "0" if reset_completed else "prayers.completed"
+        
+        async def _upsert(connection):
+            # Историю пишем до обновления, чтобы сохранить предыдущие значения
+            if reset_completed:
+                await connection.executemany("""
+                    INSERT INTO prayer_history (
+                        user_id, prayer_type, action, amount,
+                        previous_value, new_value, comment
+                    ) VALUES (?, ?, ?, ?, 0, ?, ?)
+                """, [
+                    (user_id, prayer_type, action, count, count, comment)
+                    for prayer_type, count in items
+                ])
             else:
-                # Создаем новую запись
-                await connection.execute("""
-                    INSERT INTO prayers (user_id, prayer_type, total_missed, completed)
-                    VALUES (?, ?, ?, ?)
-                """, (user_id, prayer_type, total_missed, completed))
+                await connection.executemany("""
+                    INSERT INTO prayer_history (
+                        user_id, prayer_type, action, amount,
+                        previous_value, new_value, comment
+                    ) VALUES (?, ?, ?, ?, COALESCE((
+                        SELECT total_missed FROM prayers
+                        WHERE user_id = ? AND prayer_type = ?
+                    ), 0), ?, ?)
+                """, [
+                    (user_id, prayer_type, action, count, user_id, prayer_type, count, comment)
+                    for prayer_type, count in items
+                ])
             
-            await connection.commit()
-            return True
-        finally:
-            await connection.close()
+            await connection.executemany(f"""
+                INSERT INTO prayers (user_id, prayer_type, total_missed, completed)
+                VALUES (?, ?, ?, 0)
+                ON CONFLICT(user_id, prayer_type) DO UPDATE SET
+                    total_missed = excluded.total_missed,
+                    completed = {completed_expression},
+                    updated_at = CURRENT_TIMESTAMP
+            """, [(user_id, prayer_type, count) for prayer_type, count in items])
+        
+        await db_manager.write(_upsert)
+        return True
     
     async def get_user_prayers(self, user_id: int) -> List[Prayer]:
         """Получение всех намазов пользователя"""
-        connection = await db_manager.get_connection()
-        try:
+        async with db_manager.connection() as connection:
             cursor = await connection.execute("""
                 SELECT * FROM prayers WHERE user_id = ?
             """, (user_id,))
@@ -52,13 +90,10 @@ class PrayerRepository:
                     completed=row['completed']
                 ))
             return prayers
-        finally:
-            await connection.close()
     
     async def get_prayer(self, user_id: int, prayer_type: str) -> Optional[Prayer]:
         """Получение конкретного намаза"""
-        connection = await db_manager.get_connection()
-        try:
+        async with db_manager.connection() as connection:
             cursor = await connection.execute("""
                 SELECT * FROM prayers WHERE user_id = ? AND prayer_type = ?
             """, (user_id, prayer_type))
@@ -72,37 +107,105 @@ class PrayerRepository:
                 total_missed=row['total_missed'],
                 completed=row['completed']
             )
-        finally:
-            await connection.close()
     
-    async def update_completed_prayers(self, user_id: int, prayer_type: str, 
-                                       amount: int) -> bool:
-        """Обновление количества совершенных намазов"""
-        connection = await db_manager.get_connection()
-        try:
+    async def apply_completed_change(self, user_id: int, prayer_type: str,
+                                     change: int, strict: bool = False) -> Optional[Prayer]:
+        """Атомарное изменение количества восполненных намазов
+        
+        Запись в историю и обновление счетчика выполняются в одной транзакции.
+        Без strict отсутствующая запись создается в той же транзакции, а новое
+        значение ограничивается диапазоном [0, total_missed]. Со strict
+        изменение применяется, только если значение остается в этом диапазоне.
+        Возвращает обновленный намаз или None, если изменение не применено.
+        """
+        action = 'add' if change > 0 else 'remove'
+        new_value = "completed + ?" if strict else "MAX(0, MIN(total_missed, completed + ?))"
+        in_range = "completed + ? BETWEEN 0 AND total_missed" if strict else "1"
+        range_params = (change,) if strict else ()
+        
+        async def _apply(connection):
+            if not strict:
+                await connection.execute("""
+                    INSERT INTO prayers (user_id, prayer_type) VALUES (?, ?)
+                    ON CONFLICT(user_id, prayer_type) DO NOTHING
+                """, (user_id, prayer_type))
+            
+            # История пишется только при фактическом изменении значения
+            await connection.execute(f"""
+                INSERT INTO prayer_history (
+                    user_id, prayer_type, action, amount, previous_value, new_value
+                )
+                SELECT user_id, prayer_type, ?, ?, completed, {new_value}
+                FROM prayers
+                WHERE user_id = ? AND prayer_type = ? AND {in_range}
+                  AND {new_value} != completed
+            """, (action, abs(change), change, user_id, prayer_type, *range_params, change))
+            
+            cursor = await connection.execute(f"""
+                UPDATE prayers
+                SET completed = {new_value},
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE user_id = ? AND prayer_type = ? AND {in_range}
+                RETURNING user_id, prayer_type, total_missed, completed
+            """, (change, user_id, prayer_type, *range_params))
+            rows = await cursor.fetchall()
+            if not rows:
+                return None
+            
+            return Prayer(
+                user_id=rows[0]['user_id'],
+                prayer_type=rows[0]['prayer_type'],
+                total_missed=rows[0]['total_missed'],
+                completed=rows[0]['completed']
+            )
+        
+        return await db_manager.write(_apply)
+    
+    async def add_missed_prayers(self, user_id: int, prayer_type: str,
+                                 amount: int, comment: Optional[str] = None) -> Prayer:
+        """Атомарное увеличение количества пропущенных намазов с записью в историю"""
+        async def _apply(connection):
             await connection.execute("""
-                UPDATE prayers SET completed = completed + ?, updated_at = CURRENT_TIMESTAMP
-                WHERE user_id = ? AND prayer_type = ?
-            """, (amount, user_id, prayer_type))
-            await connection.commit()
-            return True
-        finally:
-            await connection.close()
+                INSERT INTO prayer_history (
+                    user_id, prayer_type, action, amount,
+                    previous_value, new_value, comment
+                )
+                SELECT ?, ?, 'add_missed', ?, COALESCE(p.total_missed, 0),
+                       COALESCE(p.total_missed, 0) + ?, ?
+                FROM (SELECT 1) AS one
+                LEFT JOIN prayers p ON p.user_id = ? AND p.prayer_type = ?
+            """, (user_id, prayer_type, amount, amount, comment, user_id, prayer_type))
+            
+            cursor = await connection.execute("""
+                INSERT INTO prayers (user_id, prayer_type, total_missed, completed)
+                VALUES (?, ?, ?, 0)
+                ON CONFLICT(user_id, prayer_type) DO UPDATE SET
+                    total_missed = total_missed + excluded.total_missed,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING user_id, prayer_type, total_missed, completed
+            """, (user_id, prayer_type, amount))
+            row = (await cursor.fetchall())[0]
+            
+            return Prayer(
+                user_id=row['user_id'],
+                prayer_type=row['prayer_type'],
+                total_missed=row['total_missed'],
+                completed=row['completed']
+            )
+        
+        return await db_manager.write(_apply)
     
     async def reset_user_prayers(self, user_id: int) -> bool:
         """Сброс всех намазов пользователя"""
-        connection = await db_manager.get_connection()
-        try:
+        async def _delete(connection):
             await connection.execute("DELETE FROM prayers WHERE user_id = ?", (user_id,))
-            await connection.commit()
-            return True
-        finally:
-            await connection.close()
+        
+        await db_manager.write(_delete)
+        return True
     
     async def get_statistics(self) -> Dict:
         """Получение общей статистики"""
-        connection = await db_manager.get_connection()
-        try:
+        async with db_manager.connection() as connection:
             # Общее количество пользователей с намазами
             cursor = await connection.execute("""
                 SELECT COUNT(DISTINCT user_id) as total_users FROM prayers
@@ -124,5 +227,3 @@ class PrayerRepository:
                 'total_users': total_users,
                 'prayer_statistics': [dict(row) for row in prayer_stats]
             }
-        finally:
-            await connection.close()
\ No newline at end of file
@@ -0,0 +1,73 @@
+import time
+from typing import AsyncIterator, List
+from ..connection import db_manager
+from ..models.user import DISPLAY_NAME_SQL, ReminderAudienceEntry
+from .user_repository import UserRepository
+import logging
+logger = logging.getLogger(__name__)
+
+class ReminderAudienceRepository:
+    """Репозиторий снимка аудитории напоминаний (таблица reminder_audience)
+    
+    Снимок по часовому поясу собирается одним INSERT ... SELECT заранее,
+    отправка только читает его по первичному ключу.
+    """
+    
+    async def build(self, utc_offset: int) -> int:
+        """Пересборка снимка для часового пояса, возвращает число получателей"""
+        conditions, params = UserRepository.reminder_audience_filter([utc_offset])
+        
+        async def _build(connection):
+            await connection.execute(
+                "DELETE FROM reminder_audience WHERE utc_offset = ?", (utc_offset,)
+            )
+            cursor = await connection.execute(f"""
+                INSERT INTO reminder_audience (utc_offset, telegram_id, display_name, remaining, built_at)
+                SELECT ?, u.telegram_id, {DISPLAY_NAME_SQL}, t.prayers_remaining, ?
+                FROM users u
+                JOIN user_totals t ON t.user_id = u.telegram_id
+                WHERE {conditions}
+            """, [utc_offset, time.time()] + params)
+            return cursor.rowcount
+        
+        return await db_manager.write(_build)
+    
+    async def is_fresh(self, utc_offset: int, max_age: float) -> bool:
+        """Есть ли снимок для часового пояса не старше max_age секунд"""
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute("""
+                SELECT 1 FROM reminder_audience
+                WHERE utc_offset = ? AND built_at >= ?
+                LIMIT 1
+            """, (utc_offset, time.time() - max_age))
+            return await cursor.fetchone() is not None
+    
+    async def iter_audience(self, utc_offset: int, page_size: int = 1000) -> AsyncIterator[ReminderAudienceEntry]:
+        """Постраничное чтение снимка часового пояса"""
+        last_telegram_id = -1
+        while True:
+            async with db_manager.connection() as connection:
+                cursor = await connection.execute("""
+                    SELECT telegram_id, display_name, remaining FROM reminder_audience
+                    WHERE utc_offset = ? AND telegram_id > ?
+                    ORDER BY telegram_id
+                    LIMIT ?
+                """, (utc_offset, last_telegram_id, page_size))
+                rows = await cursor.fetchall()
+            
+            for row in rows:
+                yield ReminderAudienceEntry(row['telegram_id'], row['display_name'], row['remaining'])
+            
+            if len(rows) < page_size:
+                return
+            last_telegram_id = rows[-1]['telegram_id']
+    
+    async def delete(self, utc_offsets: List[int]):
+        """Удаление использованных снимков"""
+        async def _delete(connection):
+            await connection.execute(
+                f"DELETE FROM reminder_audience WHERE utc_offset IN ({', '.join('?' for _ in utc_offsets)})",
+                utc_offsets
+            )
+        
+        await db_manager.write(_delete)
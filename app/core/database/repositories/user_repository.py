@@ -1,25 +1,35 @@
-from typing import Optional, List
+from typing import AsyncIterator, Dict, Optional, List, Tuple
+import copy
 import datetime
 from ..connection import db_manager
-from ..models.user import User
+from ..models.user import User, UserRecipient
+from ...cache import TTLCache
+from ...timezones import get_city_utc_offset
+from ...config import config
+from ...signals import process_signals, ROLES_CHANGED
 import logging
 logger = logging.getLogger(__name__)
 
+# Общий для всех экземпляров репозитория кеш профилей. С воркерами профиль
+# может изменить другой процесс (инвалидация туда не доходит), поэтому кеш выключен
+user_cache = TTLCache(
+    config.USER_CACHE_SIZE, 0 if config.WORKER_PROCESSES > 0 else config.USER_CACHE_TTL
+)
+
 class UserRepository:
     """Репозиторий для работы с пользователями"""
     
     async def create_user(self, user: User) -> Optional[int]:
         """Создание пользователя"""
-        connection = await db_manager.get_connection()
-        try:
+        async def _insert(connection):
             cursor = await connection.execute("""
                 INSERT INTO users (
                     telegram_id, username, gender, birth_date, city, role, 
                     is_registered, prayer_start_date, adult_date, last_activity,
                     fasting_missed_days, fasting_completed_days,
                     hayd_average_days, childbirth_count, childbirth_data,
-                    daily_notifications_enabled
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    daily_notifications_enabled, utc_offset
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 user.telegram_id, user.username, user.gender, 
                 user.birth_date.isoformat() if user.birth_date else None,
@@ -29,17 +39,33 @@ class UserRepository:
                 user.last_activity,
                 user.fasting_missed_days, user.fasting_completed_days,
                 user.hayd_average_days, user.childbirth_count, user.childbirth_data,
-                user.daily_notifications_enabled
+                user.daily_notifications_enabled,
+                user.utc_offset if user.utc_offset is not None else get_city_utc_offset(user.city)
             ))
-            await connection.commit()
             return cursor.lastrowid
+        
+        try:
+            return await db_manager.write(_insert)
         finally:
-            await connection.close()
+            user_cache.invalidate(user.telegram_id)
+            if user.role != config.Roles.USER:
+                process_signals.publish(ROLES_CHANGED)
     
     async def get_user_by_telegram_id(self, telegram_id: int) -> Optional[User]:
-        """Получение пользователя по telegram_id"""
-        connection = await db_manager.get_connection()
-        try:
+        """Получение пользователя по telegram_id (через кеш профилей)"""
+        user = user_cache.get(telegram_id)
+        if user is not None:
+            return copy.copy(user)
+        
+        generation = user_cache.generation
+        user = await self._fetch_user(telegram_id)
+        if user is not None:
+            user_cache.set(telegram_id, copy.copy(user), generation)
+        return user
+    
+    async def _fetch_user(self, telegram_id: int) -> Optional[User]:
+        """Чтение пользователя из БД"""
+        async with db_manager.connection() as connection:
             cursor = await connection.execute(
                 "SELECT * FROM users WHERE telegram_id = ?", (telegram_id,)
             )
@@ -47,7 +73,7 @@ class UserRepository:
             if not row:
                 return None
             
-            logger.info(f"Получен пользователь: {dict(row)}")
+            logger.debug(f"Получен пользователь: {dict(row)}")
 
             dict_row = dict(row)
             
@@ -66,10 +92,9 @@ class UserRepository:
                 hayd_average_days=dict_row.get('hayd_average_days'),
                 childbirth_count=dict_row.get('childbirth_count', 0),
                 childbirth_data=dict_row.get('childbirth_data'),
-                daily_notifications_enabled=dict_row.get('daily_notifications_enabled', 1)
+                daily_notifications_enabled=dict_row.get('daily_notifications_enabled', 1),
+                utc_offset=dict_row.get('utc_offset')
             )
-        finally:
-            await connection.close()
     
     async def update_user(self, telegram_id: int, **kwargs) -> bool:
         """Обновление пользователя"""
@@ -82,122 +107,177 @@ class UserRepository:
                 if hasattr(kwargs[key], 'isoformat'):
                     kwargs[key] = kwargs[key].isoformat()
         
+        # Часовой пояс следует за городом, если не задан явно
+        if 'city' in kwargs and 'utc_offset' not in kwargs:
+            kwargs['utc_offset'] = get_city_utc_offset(kwargs['city'])
+        
         # Добавляем updated_at
         kwargs['updated_at'] = datetime.datetime.now().isoformat()
             
         set_clause = ", ".join([f"{key} = ?" for key in kwargs.keys()])
         values = list(kwargs.values()) + [telegram_id]
         
-        connection = await db_manager.get_connection()
-        try:
+        async def _update(connection):
             await connection.execute(f"""
                 UPDATE users SET {set_clause}
                 WHERE telegram_id = ?
             """, values)
-            await connection.commit()
-            return True
+        
+        try:
+            await db_manager.write(_update)
         finally:
-            await connection.close()
+            user_cache.invalidate(telegram_id)
+            if 'role' in kwargs:
+                process_signals.publish(ROLES_CHANGED)
+        return True
 
-                    # fasting_missed_days=dict_row.get('fasting_missed_days', 0),
-                    # fasting_completed_days=dict_row.get('fasting_completed_days', 0),
-                    # hayd_average_days=dict_row.get('hayd_average_days'),
-                    # childbirth_count=dict_row.get('childbirth_count', 0),
-                    # childbirth_data=dict_row.get('childbirth_data')
-    async def get_users_by_filters(self, gender: str = None, city: str = None, 
-                                   min_age: int = None, max_age: int = None,
-                                   exclude_disabled_notifications: bool = False) -> List[User]:
-        """Получение пользователей по фильтрам"""
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        query = "SELECT * FROM users WHERE is_registered = TRUE"
-        params = []
+    async def bulk_update_last_activity(self, activity: Dict[int, datetime.datetime]):
+        """Запись времени последней активности для многих пользователей одной транзакцией"""
+        params = [
+            (last_activity.isoformat(sep=' '), telegram_id)
+            for telegram_id, last_activity in activity.items()
+        ]
+        
+        # Пользователь снова взаимодействует с ботом - возвращаем его в рассылки
+        async def _update(connection):
+            await connection.executemany("""
+                UPDATE users SET last_activity = ?, delivery_status = 'active'
+                WHERE telegram_id = ?
+            """, params)
         
-        logger.info(f"Начальный запрос: {query}")
+        await db_manager.write(_update)
+    
+    async def mark_undeliverable(self, statuses: Dict[int, str]):
+        """Отметка пользователей, которым невозможно доставить сообщение
+        
+        statuses - telegram_id -> статус доставки ('blocked', 'chat_not_found').
+        Такие пользователи пропускаются массовыми рассылками, пока снова
+        не напишут боту.
+        """
+        params = [(status, telegram_id) for telegram_id, status in statuses.items()]
+        
+        async def _update(connection):
+            await connection.executemany("""
+                UPDATE users
+                SET delivery_status = ?,
+                    delivery_failures = delivery_failures + 1,
+                    delivery_failed_at = CURRENT_TIMESTAMP
+                WHERE telegram_id = ?
+            """, params)
+        
+        await db_manager.write(_update)
+    
+    async def backfill_utc_offsets(self) -> int:
+        """Определение часового пояса по городу для пользователей без пояса"""
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute("""
+                SELECT DISTINCT city FROM users
+                WHERE utc_offset IS NULL AND COALESCE(city, '') != ''
+            """)
+            cities = [row['city'] for row in await cursor.fetchall()]
+        
+        params = [
+            (offset, city) for city, offset in
+            ((city, get_city_utc_offset(city)) for city in cities)
+            if offset is not None
+        ]
+        if not params:
+            return 0
+        
+        async def _update(connection):
+            await connection.executemany("""
+                UPDATE users SET utc_offset = ? WHERE utc_offset IS NULL AND city = ?
+            """, params)
+        
+        await db_manager.write(_update)
+        user_cache.clear()
+        logger.info(f"Часовой пояс определен для городов: {len(params)}")
+        return len(params)
+    
+    async def count_active_users(self, since: datetime.datetime) -> int:
+        """Количество пользователей, активных начиная с since"""
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute(
+                "SELECT COUNT(*) FROM users WHERE last_activity >= ?", (since.isoformat(sep=' '),)
+            )
+            return (await cursor.fetchone())[0]
+    
+    async def iter_users_by_filters(self, gender: str = None, city: str = None,
+                                    birth_date_from: datetime.date = None,
+                                    birth_date_to: datetime.date = None,
+                                    exclude_disabled_notifications: bool = False,
+                                    page_size: int = 500) -> AsyncIterator[UserRecipient]:
+        """Потоковая выборка пользователей по фильтрам
+        
+        Результат читается страницами по telegram_id (keyset), возраст
+        задается границами даты рождения и фильтруется в SQL, поэтому память
+        не зависит от размера аудитории. Индекс idx_users_audience отдает
+        строки уже в порядке telegram_id, а пол, дату рождения и уведомления
+        проверяет без чтения строк, так что страница не сортируется.
+        """
+        conditions = ["is_registered = TRUE", "delivery_status = 'active'"]
+        params = []
         
         if gender:
-            query += " AND gender = ?"
+            conditions.append("gender = ?")
             params.append(gender)
-            logger.info(f"Добавлен фильтр по полу: {gender}")
         
         if city:
-            query += " AND city LIKE ?"
+            conditions.append("city LIKE ?")
             params.append(f"%{city}%")
-            logger.info(f"Добавлен фильтр по городу: {city}")
+        
+        if birth_date_from is not None or birth_date_to is not None:
+            conditions.append("birth_date BETWEEN ? AND ?")
+            params.extend([
+                (birth_date_from or datetime.date.min).isoformat(),
+                (birth_date_to or datetime.date.max).isoformat()
+            ])
         
         if exclude_disabled_notifications:
-            query += " AND daily_notifications_enabled = 1"
-            logger.info("Исключены пользователи с отключенными уведомлениями")
+            conditions.append("daily_notifications_enabled = 1")
         
-        logger.info(f"Финальный запрос: {query}")
-        logger.info(f"Параметры: {params}")
+        query = f"""
+            SELECT telegram_id, username, gender FROM users
+            WHERE {" AND ".join(conditions)} AND telegram_id > ?
+            ORDER BY telegram_id
+            LIMIT ?
+        """
+        logger.debug(f"Выборка пользователей по фильтрам: {conditions}, параметры: {params}")
         
-        connection = await db_manager.get_connection()
-        try:
-            cursor = await connection.execute(query, params)
-            rows = await cursor.fetchall()
+        last_telegram_id = -1
+        while True:
+            async with db_manager.connection() as connection:
+                cursor = await connection.execute(query, params + [last_telegram_id, page_size])
+                rows = await cursor.fetchall()
             
-            logger.info(f"Найдено пользователей в БД (до фильтрации по возрасту): {len(rows)}")
-            
-            users = []
             for row in rows:
-                try:
-                    dict_row = dict(row)
-                    user = User(
-                        telegram_id=row['telegram_id'],
-                        username=row['username'],
-                        gender=row['gender'],
-                        birth_date=datetime.datetime.strptime(row['birth_date'], "%Y-%m-%d").date() if row['birth_date'] else None,
-                        city=row['city'],
-                        role=row['role'],
-                        is_registered=bool(row['is_registered']),
-                        prayer_start_date=datetime.datetime.strptime(row['prayer_start_date'], "%Y-%m-%d").date() if row['prayer_start_date'] else None,
-                        adult_date=datetime.datetime.strptime(row['adult_date'], "%Y-%m-%d").date() if row['adult_date'] else None,
-                        fasting_missed_days=dict_row.get('fasting_missed_days', 0),
-                        fasting_completed_days=dict_row.get('fasting_completed_days', 0),
-                        hayd_average_days=dict_row.get('hayd_average_days'),
-                        childbirth_count=dict_row.get('childbirth_count', 0),
-                        childbirth_data=dict_row.get('childbirth_data'),
-                        daily_notifications_enabled=dict_row.get('daily_notifications_enabled', 1)
-                    )
-                    
-                    # Фильтрация по возрасту на уровне Python
-                    if (min_age is not None or max_age is not None) and user.birth_date:
-                        from ...services.calculation_service import CalculationService
-                        calc_service = CalculationService()
-                        age = calc_service.calculate_age(user.birth_date)
-                        
-                        logger.debug(f"Пользователь {user.telegram_id}: возраст {age}")
-                        
-                        if min_age is not None and age < min_age:
-                            logger.debug(f"Пользователь {user.telegram_id} исключен: возраст {age} < {min_age}")
-                            continue
-                        if max_age is not None and age > max_age:
-                            logger.debug(f"Пользователь {user.telegram_id} исключен: возраст {age} > {max_age}")
-                            continue
-                    
-                    users.append(user)
-                    logger.debug(f"Добавлен пользователь {user.telegram_id}: {user.gender}, {user.city}")
-                    
-                except Exception as e:
-                    logger.error(f"Ошибка обработки пользователя {row.get('telegram_id', 'unknown')}: {e}")
-                    continue
-                
-            logger.info(f"Итого пользователей после всех фильтров: {len(users)}")
-            return users
+                yield UserRecipient(
+                    telegram_id=row['telegram_id'],
+                    username=row['username'],
+                    gender=row['gender']
+                )
             
-        except Exception as e:
-            logger.error(f"Ошибка в get_users_by_filters: {e}", exc_info=True)
-            return []
-        finally:
-            await connection.close()
-
-    
-    async def get_all_registered_users(self) -> List[User]:
-        """Получение всех зарегистрированных пользователей"""
-        return await self.get_users_by_filters()
+            if len(rows) < page_size:
+                return
+            last_telegram_id = rows[-1]['telegram_id']
     
-    async def get_users_with_notifications_enabled(self) -> List[User]:
-        """Получение пользователей с включенными уведомлениями"""
-        return await self.get_users_by_filters(exclude_disabled_notifications=False)
\ No newline at end of file
+    @staticmethod
+    def reminder_audience_filter(utc_offsets: Optional[List[int]] = None) -> Tuple[str, list]:
+        """Условие WHERE (users u JOIN user_totals t) для получателей напоминаний и его параметры"""
+        conditions = [
+            "u.is_registered = TRUE",
+            "u.daily_notifications_enabled = 1",
+            "u.delivery_status = 'active'",
+            "t.prayers_remaining > 0"
+        ]
+        params: list = []
+        
+        if utc_offsets is not None:
+            offset_condition = f"u.utc_offset IN ({', '.join('?' for _ in utc_offsets)})"
+            if config.DEFAULT_UTC_OFFSET in utc_offsets:
+                # Пользователи с неизвестным городом получают напоминания по поясу по умолчанию
+                offset_condition = f"({offset_condition} OR u.utc_offset IS NULL)"
+            conditions.append(offset_condition)
+            params.extend(utc_offsets)
+        
+        return " AND ".join(conditions), params
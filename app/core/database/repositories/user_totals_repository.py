@@ -0,0 +1,105 @@
+from typing import List, Optional
+from ..connection import db_manager
+from ..models.user_totals import UserTotals
+import logging
+logger = logging.getLogger(__name__)
+
+# Итоги, посчитанные заново из исходных таблиц users и prayers
+COMPUTED_TOTALS_QUERY = """
+    SELECT ids.user_id,
+           COALESCE(p.prayers_missed, 0) AS prayers_missed,
+           COALESCE(p.prayers_completed, 0) AS prayers_completed,
+           COALESCE(p.prayers_remaining, 0) AS prayers_remaining,
+           COALESCE(u.fasting_missed_days, 0) AS fasting_missed,
+           COALESCE(u.fasting_completed_days, 0) AS fasting_completed,
+           MAX(0, COALESCE(u.fasting_missed_days, 0) - COALESCE(u.fasting_completed_days, 0)) AS fasting_remaining
+    FROM (
+        SELECT telegram_id AS user_id FROM users
+        UNION
+        SELECT user_id FROM prayers
+    ) ids
+    LEFT JOIN users u ON u.telegram_id = ids.user_id
+    LEFT JOIN (
+        SELECT user_id,
+               SUM(total_missed) AS prayers_missed,
+               SUM(completed) AS prayers_completed,
+               SUM(MAX(0, total_missed - completed)) AS prayers_remaining
+        FROM prayers
+        GROUP BY user_id
+    ) p ON p.user_id = ids.user_id
+"""
+
+class UserTotalsRepository:
+    """Репозиторий итогов пользователей (таблица user_totals)
+    
+    Таблицу поддерживают триггеры на prayers и users, репозиторий только
+    читает ее, проверяет согласованность и при необходимости пересобирает.
+    """
+    
+    async def get_user_totals(self, user_id: int) -> UserTotals:
+        """Получение итогов пользователя одной строкой"""
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute(
+                "SELECT * FROM user_totals WHERE user_id = ?", (user_id,)
+            )
+            row = await cursor.fetchone()
+        
+        if not row:
+            return UserTotals(user_id=user_id)
+        
+        return UserTotals(
+            user_id=row['user_id'],
+            prayers_missed=row['prayers_missed'],
+            prayers_completed=row['prayers_completed'],
+            prayers_remaining=row['prayers_remaining'],
+            fasting_missed=row['fasting_missed'],
+            fasting_completed=row['fasting_completed'],
+            fasting_remaining=row['fasting_remaining']
+        )
+    
+    async def find_inconsistent_users(self, limit: int = 100) -> List[int]:
+        """Пользователи, у которых сохраненные итоги расходятся с исходными данными"""
+        async with db_manager.connection() as connection:
+            cursor = await connection.execute(f"""
+                SELECT c.user_id
+                FROM ({COMPUTED_TOTALS_QUERY}) c
+                LEFT JOIN user_totals t ON t.user_id = c.user_id
+                WHERE t.user_id IS NULL
+                   OR t.prayers_missed != c.prayers_missed
+                   OR t.prayers_completed != c.prayers_completed
+                   OR t.prayers_remaining != c.prayers_remaining
+                   OR t.fasting_missed != c.fasting_missed
+                   OR t.fasting_completed != c.fasting_completed
+                   OR t.fasting_remaining != c.fasting_remaining
+                ORDER BY c.user_id
+                LIMIT ?
+            """, (limit,))
+            rows = await cursor.fetchall()
+        return [row['user_id'] for row in rows]
+    
+    async def rebuild(self, user_id: Optional[int] = None) -> int:
+        """Пересборка итогов всех пользователей или одного пользователя"""
+        condition = "" if user_id is None else "WHERE c.user_id = ?"
+        params = () if user_id is None else (user_id,)
+        
+        async def _rebuild(connection):
+            if user_id is None:
+                await connection.execute("DELETE FROM user_totals")
+            else:
+                await connection.execute("DELETE FROM user_totals WHERE user_id = ?", params)
+            
+            cursor = await connection.execute(f"""
+                INSERT INTO user_totals (
+                    user_id, prayers_missed, prayers_completed, prayers_remaining,
+                    fasting_missed, fasting_completed, fasting_remaining
+                )
+                SELECT c.user_id, c.prayers_missed, c.prayers_completed, c.prayers_remaining,
+                       c.fasting_missed, c.fasting_completed, c.fasting_remaining
+                FROM ({COMPUTED_TOTALS_QUERY}) c
+                {condition}
+            """, params)
+            return cursor.rowcount
+        
+        count = await db_manager.write(_rebuild)
+        logger.info(f"Итоги пользователей пересобраны: {count}")
+        return count
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from ..database.repositories.user_repository import UserRepository
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+class ActivityTracker:
+    """Отложенная запись активности пользователей
+    
+    Время последней активности копится в памяти и записывается одним
+    executemany раз в ACTIVITY_FLUSH_INTERVAL секунд и при остановке бота.
+    """
+    
+    def __init__(self, flush_interval: Optional[float] = None):
+        self.flush_interval = config.ACTIVITY_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.user_repo = UserRepository()
+        self._pending: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def touch(self, telegram_id: int):
+        """Отметка активности пользователя (без обращения к БД)"""
+        self._pending[telegram_id] = datetime.now()
+    
+    def start(self):
+        """Запуск периодической записи"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self):
+        """Периодическая запись буфера"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+    
+    async def flush(self) -> int:
+        """Запись накопленной активности одной транзакцией"""
+        if not self._pending:
+            return 0
+        
+        pending, self._pending = self._pending, {}
+        try:
+            await self.user_repo.bulk_update_last_activity(pending)
+        except Exception as e:
+            logger.error(f"Ошибка записи активности пользователей: {e}")
+            # Более свежие отметки, пришедшие во время записи, не затираем
+            for telegram_id, activity in pending.items():
+                self._pending.setdefault(telegram_id, activity)
+            return 0
+        
+        logger.debug(f"Записана активность пользователей: {len(pending)}")
+        return len(pending)
+    
+    async def stop(self):
+        """Остановка периодической записи и сброс буфера"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+# Общий трекер процесса
+activity_tracker = ActivityTracker()
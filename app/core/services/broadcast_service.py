@@ -1,8 +1,13 @@
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from aiogram import Bot
 
 from ..database.repositories.user_repository import UserRepository
+from ..database.repositories.broadcast_job_repository import BroadcastJobRepository
+from ..database.models.broadcast_job import BroadcastJob
+from ..database.models.user import UserRecipient
 from .calculation_service import CalculationService
+from .delivery_service import DeliveryService
+from .media_service import media_service
 from ..config import config
 
 class BroadcastService:
@@ -10,72 +15,114 @@ class BroadcastService:
     
     def __init__(self):
         self.user_repo = UserRepository()
+        self.job_repo = BroadcastJobRepository()
         self.calc_service = CalculationService()
+        self.delivery_service = DeliveryService()
+        self.media_service = media_service
+        self._media: Dict[int, Tuple[str, str, Optional[str]]] = {}
     
-    async def send_broadcast(self, message_text: str, filters: Dict[str, Any] = None, 
-                           photo: str = None, video: str = None,
-                           exclude_disabled_notifications: bool = False) -> Dict[str, int]:
-        """Отправка рассылки с фильтрами"""
+    async def enqueue_broadcast(self, message_text: str, created_by: int,
+                                filters: Dict[str, Any] = None,
+                                photo: str = None, video: str = None,
+                                exclude_disabled_notifications: bool = False,
+                                chat_id: int = None, message_id: int = None) -> int:
+        """Постановка рассылки в очередь, возвращает номер задания
         
-        # Получаем пользователей по фильтрам
-        users = await self._get_filtered_users(filters or {}, exclude_disabled_notifications)
+        Отправку выполняет фоновый воркер; в сообщении chat_id/message_id
+        модератор видит прогресс и итоговый отчет.
+        """
+        job = BroadcastJob(
+            created_by=created_by,
+            message_text=message_text,
+            filters=filters,
+            photo=photo,
+            video=video,
+            exclude_disabled_notifications=exclude_disabled_notifications,
+            chat_id=chat_id,
+            message_id=message_id
+        )
+        return await self.job_repo.create_job(job)
+    
+    async def prepare_job(self, job: BroadcastJob):
+        """Сбор получателей нового задания (повторный сбор после сбоя безопасен)"""
+        if job.status != 'pending':
+            return
         
-        if not users:
-            return {
-                'sent': 0,
-                'errors': 0,
-                'total_users': 0
-            }
+        page: List[int] = []
+        async for user in self._get_filtered_users(job.filters, job.exclude_disabled_notifications):
+            page.append(user.telegram_id)
+            if len(page) >= config.BROADCAST_PAGE_SIZE:
+                await self.job_repo.add_recipients(job.id, page)
+                page = []
+        if page:
+            await self.job_repo.add_recipients(job.id, page)
         
-        bot = Bot(token=config.BOT_TOKEN)
-        sent_count = 0
-        error_count = 0
+        job.total = await self.job_repo.start_job(job.id)
+        job.status = 'running'
+    
+    async def deliver_next_page(self, job: BroadcastJob, bot: Bot) -> bool:
+        """Отправка следующей страницы получателей и сохранение контрольной точки
         
-        try:
-            for user in users:
-                try:
-                    if photo:
-                        await bot.send_photo(
-                            chat_id=user.telegram_id,
-                            photo=photo,
-                            caption=message_text,
-                            parse_mode="MarkdownV2"
-                        )
-                    elif video:
-                        await bot.send_video(
-                            chat_id=user.telegram_id,
-                            video=video,
-                            caption=message_text,
-                            parse_mode="MarkdownV2"
-                        )
-                    else:
-                        await bot.send_message(
-                            chat_id=user.telegram_id,
-                            text=message_text,
-                            parse_mode="MarkdownV2"
-                        )
-                    
-                    sent_count += 1
-                    
-                except Exception as e:
-                    error_count += 1
-                    # Логируем ошибки для отладки
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.warning(f"Ошибка отправки сообщения пользователю {user.telegram_id}: {e}")
-                    continue
+        Возвращает False, когда неотправленных получателей не осталось.
+        """
+        recipients = await self.job_repo.get_pending_recipients(
+            job.id, job.cursor, config.BROADCAST_PAGE_SIZE
+        )
+        if not recipients:
+            return False
         
-        finally:
-            await bot.session.close()
+        sent_ids = set()
+        media = await self._get_media(job)
+        
+        async def _send(chat_id: int, _payload):
+            # Вложение загружается один раз, остальным получателям уходит file_id
+            if media is not None:
+                kind, source, key = media
+                await self.media_service.send(
+                    bot, chat_id, kind, source, key=key,
+                    caption=job.message_text,
+                    parse_mode="MarkdownV2"
+                )
+            else:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=job.message_text,
+                    parse_mode="MarkdownV2"
+                )
+            sent_ids.add(chat_id)
+        
+        await self.delivery_service.deliver(
+            ((telegram_id, None) for telegram_id in recipients), _send
+        )
         
-        return {
-            'sent': sent_count,
-            'errors': error_count,
-            'total_users': len(users)
-        }
+        failed_ids = [telegram_id for telegram_id in recipients if telegram_id not in sent_ids]
+        await self.job_repo.save_progress(job.id, sent_ids, failed_ids, recipients[-1])
+        
+        job.cursor = recipients[-1]
+        job.sent += len(sent_ids)
+        job.errors += len(failed_ids)
+        return True
+    
+    async def _get_media(self, job: BroadcastJob) -> Optional[Tuple[str, str, Optional[str]]]:
+        """Вложение задания (тип, источник, ключ в кеше медиа); ключ вычисляется один раз на задание"""
+        if not job.photo and not job.video:
+            return None
+        
+        media = self._media.get(job.id)
+        if media is None:
+            kind, source = ('photo', job.photo) if job.photo else ('video', job.video)
+            media = (kind, source, await self.media_service.cache_key(kind, source))
+            self._media[job.id] = media
+        return media
     
-    async def _get_filtered_users(self, filters: Dict[str, Any], 
-                                  exclude_disabled_notifications: bool = False) -> List:
+    async def finish_job(self, job: BroadcastJob, status: str = 'done'):
+        """Завершение задания"""
+        self._media.pop(job.id, None)
+        await self.job_repo.finish_job(job.id, status)
+        job.status = status
+    
+    def _get_filtered_users(self, filters: Dict[str, Any], 
+                            exclude_disabled_notifications: bool = False) -> AsyncIterator[UserRecipient]:
         """Получение пользователей по фильтрам"""
         
         # Базовая фильтрация
@@ -83,19 +130,18 @@ class BroadcastService:
         city = filters.get('city')
         age_filter = filters.get('age_range')
         
-        # Получаем пользователей с базовыми фильтрами
-        min_age = None
-        max_age = None
+        # Диапазон возраста переводится в границы даты рождения один раз на запрос
+        birth_date_from = None
+        birth_date_to = None
         
         if age_filter:
             min_age, max_age = age_filter
+            birth_date_from, birth_date_to = self.calc_service.get_birth_date_range(min_age, max_age)
         
-        users = await self.user_repo.get_users_by_filters(
+        return self.user_repo.iter_users_by_filters(
             gender=gender,
             city=city,
-            min_age=min_age,
-            max_age=max_age,
+            birth_date_from=birth_date_from,
+            birth_date_to=birth_date_to,
             exclude_disabled_notifications=exclude_disabled_notifications
-        )
-        
-        return users
\ No newline at end of file
+        )
\ No newline at end of file
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from aiogram import Bot
+
+from ..database.models.broadcast_job import BroadcastJob
+from ..database.repositories.broadcast_job_repository import BroadcastJobRepository
+from .broadcast_service import BroadcastService
+from ..config import config, escape_markdown
+from ..signals import process_signals, BROADCAST_QUEUED
+
+logger = logging.getLogger(__name__)
+
+class BroadcastWorker:
+    """Фоновый исполнитель очереди рассылок
+    
+    Берет незавершенные задания из broadcast_jobs по порядку, отправляет их
+    страницами и после каждой страницы сохраняет контрольную точку, поэтому
+    после перезапуска рассылка продолжается с места остановки. Модератор
+    видит прогресс в своем сообщении и получает итоговый отчет.
+    """
+    
+    def __init__(self, poll_interval: Optional[float] = None):
+        self.poll_interval = config.BROADCAST_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.broadcast_service = BroadcastService()
+        self.job_repo = BroadcastJobRepository()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        # Задание может быть поставлено в очередь в процессе-воркере
+        process_signals.subscribe(BROADCAST_QUEUED, self.notify)
+    
+    def start(self, bot: Bot):
+        """Запуск обработки очереди (bot - общий экземпляр бота процесса)"""
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(bot))
+    
+    def notify(self):
+        """Сигнал о новом задании (без ожидания периода опроса)"""
+        self._wakeup.set()
+    
+    async def _run(self, bot: Bot):
+        """Цикл обработки заданий
+        
+        Ошибка чтения очереди или записи статуса не останавливает цикл: после
+        нее пауза растет вдвое до BROADCAST_MAX_RETRY_DELAY, а незавершенное
+        задание продолжается с контрольной точки.
+        """
+        failures = 0
+        while not self._stopping:
+            try:
+                has_job = await self._run_next(bot)
+            except Exception as e:
+                failures += 1
+                delay = min(max(self.poll_interval, 1.0) * 2 ** (failures - 1), config.BROADCAST_MAX_RETRY_DELAY)
+                logger.error(f"Ошибка очереди рассылок, повтор через {delay:.0f} с: {e}", exc_info=True)
+                await self._wait(delay)
+                continue
+            
+            failures = 0
+            if not has_job:
+                await self._wait(self.poll_interval)
+    
+    async def _run_next(self, bot: Bot) -> bool:
+        """Выполнение следующего задания; False, если очередь пуста"""
+        job = await self.job_repo.get_next_job()
+        if job is None:
+            return False
+        
+        try:
+            await self._process(job, bot)
+        except Exception as e:
+            logger.error(f"Ошибка выполнения рассылки #{job.id}: {e}", exc_info=True)
+            await self.broadcast_service.finish_job(job, 'failed')
+            await self._report(bot, job, "❌ *Ошибка при отправке рассылки*\n\n"
+                                         f"Детали: {escape_markdown(str(e))}")
+        return True
+    
+    async def _wait(self, timeout: float):
+        """Ожидание нового задания или остановки не дольше timeout секунд"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+    
+    async def _process(self, job: BroadcastJob, bot: Bot):
+        """Выполнение одного задания с продолжением с контрольной точки"""
+        if job.status == 'running':
+            logger.info(f"Продолжение рассылки #{job.id} с получателя {job.cursor}")
+        
+        await self.broadcast_service.prepare_job(job)
+        await self._report(bot, job, self._progress_text(job))
+        
+        reported_at = time.monotonic()
+        while await self.broadcast_service.deliver_next_page(job, bot):
+            if self._stopping:
+                logger.info(f"Рассылка #{job.id} приостановлена на {job.processed} из {job.total}")
+                return
+            
+            if time.monotonic() - reported_at >= config.BROADCAST_PROGRESS_INTERVAL:
+                await self._report(bot, job, self._progress_text(job))
+                reported_at = time.monotonic()
+        
+        await self.broadcast_service.finish_job(job)
+        logger.info(f"Рассылка #{job.id} завершена: отправлено {job.sent}, ошибок {job.errors}")
+        await self._report(bot, job, escape_markdown(
+            "✅ *Рассылка завершена!*\n\n"
+            "📊 Статистика:\n"
+            f"• Отправлено: {job.sent}\n"
+            f"• Ошибок: {job.errors}\n"
+            f"• Всего пользователей: {job.total}",
+            ".!-()"
+        ))
+    
+    @staticmethod
+    def _progress_text(job: BroadcastJob) -> str:
+        """Текст прогресса рассылки"""
+        return escape_markdown(
+            "📤 *Отправка рассылки...*\n\n"
+            f"• Обработано: {job.processed} из {job.total}\n"
+            f"• Отправлено: {job.sent}\n"
+            f"• Ошибок: {job.errors}",
+            ".!-()"
+        )
+    
+    async def _report(self, bot: Bot, job: BroadcastJob, text: str):
+        """Обновление сообщения модератора (ошибки не прерывают рассылку)"""
+        if not job.chat_id or not job.message_id:
+            return
+        
+        try:
+            await bot.edit_message_text(
+                text=text,
+                chat_id=job.chat_id,
+                message_id=job.message_id,
+                parse_mode="MarkdownV2"
+            )
+        except Exception as e:
+            logger.debug(f"Не удалось обновить прогресс рассылки #{job.id}: {e}")
+    
+    async def stop(self, timeout: float = 30.0):
+        """Остановка после текущей страницы (контрольная точка сохраняется)"""
+        if self._task is None:
+            return
+        
+        self._stopping = True
+        self.notify()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            logger.warning("Рассылка прервана до сохранения контрольной точки")
+        self._task = None
+
+# Общий исполнитель рассылок процесса
+broadcast_worker = BroadcastWorker()
@@ -273,6 +273,26 @@ class CalculationService:
         
         return min(int(hayd_days), period_days)
     
+    def get_birth_date_range(self, min_age: Optional[int] = None, max_age: Optional[int] = None,
+                             reference_date: date = None) -> Tuple[date, date]:
+        """Границы даты рождения (включительно) для диапазона возраста"""
+        if reference_date is None:
+            reference_date = date.today()
+        
+        def _years_ago(years: int) -> date:
+            try:
+                return reference_date.replace(year=reference_date.year - years)
+            except ValueError:
+                # 29 февраля в невисокосном году
+                return reference_date.replace(year=reference_date.year - years, day=28)
+        
+        birth_date_to = _years_ago(min_age) if min_age is not None else date.max
+        if max_age is not None:
+            birth_date_from = _years_ago(max_age + 1) + timedelta(days=1)
+        else:
+            birth_date_from = date.min
+        return birth_date_from, birth_date_to
+    
     def estimate_maturity_age(self, birth_date: date, is_female: bool) -> date:
         """Оценка даты совершеннолетия"""
         if is_female:
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from ..config import config
+from ..database.repositories.user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+# Получатель рассылки: (chat_id, данные для отправки)
+Recipient = Tuple[int, Any]
+Recipients = Union[Iterable[Recipient], AsyncIterable[Recipient]]
+SendFunction = Callable[[int, Any], Awaitable[Any]]
+
+
+class TokenBucket:
+    """Ограничитель скорости по алгоритму token bucket"""
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def pause(self, seconds: float):
+        """Приостановка выдачи токенов (например, после RetryAfter)"""
+        resume_at = time.monotonic() + seconds
+        self._tokens = 0
+        self._updated_at = max(self._updated_at, resume_at)
+    
+    async def acquire(self):
+        """Ожидание свободного токена"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._updated_at:
+                    await asyncio.sleep(self._updated_at - now)
+                    continue
+                
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# Общий лимит бота: его делят все одновременные рассылки процесса
+telegram_rate_limiter = TokenBucket(config.DELIVERY_RATE_LIMIT)
+
+
+class DeliveryService:
+    """Движок массовой доставки сообщений
+    
+    Отправляет сообщения несколькими параллельными воркерами, соблюдая
+    глобальный лимит Telegram и интервал между сообщениями в один чат.
+    При RetryAfter вся доставка приостанавливается на указанное время,
+    а сообщение отправляется повторно. Получатели, заблокировавшие бота
+    или удалившие чат, отмечаются в БД и больше не попадают в рассылки.
+    """
+    
+    def __init__(self, concurrency: int = None, rate_limit: float = None,
+                 per_chat_interval: float = None, max_retries: int = None):
+        self.concurrency = max(1, concurrency or config.DELIVERY_CONCURRENCY)
+        self.per_chat_interval = (
+            config.DELIVERY_PER_CHAT_INTERVAL if per_chat_interval is None else per_chat_interval
+        )
+        self.max_retries = config.DELIVERY_MAX_RETRIES if max_retries is None else max_retries
+        self.bucket = TokenBucket(rate_limit) if rate_limit else telegram_rate_limiter
+        self.user_repo = UserRepository()
+        self._chat_next_send: Dict[int, float] = {}
+        self._undeliverable: Dict[int, str] = {}
+    
+    async def deliver(self, recipients: Recipients, send: SendFunction) -> Dict[str, Any]:
+        """Доставка сообщений всем получателям
+        
+        recipients - (асинхронный) итератор пар (chat_id, payload),
+        send - корутина отправки одного сообщения send(chat_id, payload).
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        stats = {'sent': 0, 'errors': 0, 'undeliverable': 0, 'total': 0}
+        started_at = time.monotonic()
+        
+        async def _produce():
+            try:
+                if hasattr(recipients, '__aiter__'):
+                    async for recipient in recipients:
+                        await queue.put(recipient)
+                else:
+                    for recipient in recipients:
+                        await queue.put(recipient)
+            finally:
+                for _ in range(self.concurrency):
+                    await queue.put(None)
+        
+        async def _work():
+            while True:
+                recipient = await queue.get()
+                if recipient is None:
+                    return
+                
+                chat_id, payload = recipient
+                stats['total'] += 1
+                if await self._send_one(chat_id, payload, send):
+                    stats['sent'] += 1
+                else:
+                    stats['errors'] += 1
+                    if chat_id in self._undeliverable:
+                        stats['undeliverable'] += 1
+        
+        try:
+            await asyncio.gather(_produce(), *(_work() for _ in range(self.concurrency)))
+        finally:
+            self._chat_next_send.clear()
+            await self._save_undeliverable()
+        
+        elapsed = time.monotonic() - started_at
+        stats['elapsed'] = elapsed
+        stats['rate'] = stats['sent'] / elapsed if elapsed > 0 else 0.0
+        
+        logger.info(
+            f"Доставка завершена: отправлено {stats['sent']}, ошибок {stats['errors']} "
+            f"(недоступны {stats['undeliverable']}) за {elapsed:.1f} с ({stats['rate']:.1f} сообщ./с)"
+        )
+        return stats
+    
+    async def _send_one(self, chat_id: int, payload: Any, send: SendFunction) -> bool:
+        """Отправка одного сообщения с повторами при RetryAfter"""
+        for _ in range(self.max_retries + 1):
+            await self._wait_for_chat(chat_id)
+            await self.bucket.acquire()
+            try:
+                await send(chat_id, payload)
+                return True
+            except TelegramRetryAfter as e:
+                logger.warning(f"Превышен лимит Telegram, пауза {e.retry_after} с")
+                self.bucket.pause(e.retry_after)
+            except TelegramForbiddenError as e:
+                logger.debug(f"Пользователь {chat_id} недоступен: {e}")
+                self._undeliverable[chat_id] = 'blocked'
+                return False
+            except TelegramBadRequest as e:
+                if 'chat not found' not in e.message.lower():
+                    logger.warning(f"Ошибка отправки сообщения пользователю {chat_id}: {e}")
+                    return False
+                logger.debug(f"Чат пользователя {chat_id} не найден")
+                self._undeliverable[chat_id] = 'chat_not_found'
+                return False
+            except Exception as e:
+                logger.warning(f"Ошибка отправки сообщения пользователю {chat_id}: {e}")
+                return False
+        
+        logger.warning(f"Сообщение пользователю {chat_id} не доставлено после {self.max_retries} повторов")
+        return False
+    
+    async def _save_undeliverable(self):
+        """Запись недоступных получателей одной транзакцией"""
+        if not self._undeliverable:
+            return
+        
+        undeliverable, self._undeliverable = self._undeliverable, {}
+        try:
+            await self.user_repo.mark_undeliverable(undeliverable)
+        except Exception as e:
+            logger.error(f"Ошибка записи статуса доставки: {e}")
+    
+    async def _wait_for_chat(self, chat_id: int):
+        """Соблюдение интервала между сообщениями в один чат"""
+        if self.per_chat_interval <= 0:
+            return
+        
+        now = time.monotonic()
+        if len(self._chat_next_send) > 10000:
+            self._chat_next_send = {
+                key: value for key, value in self._chat_next_send.items() if value > now
+            }
+        
+        next_send = self._chat_next_send.get(chat_id, now)
+        self._chat_next_send[chat_id] = max(now, next_send) + self.per_chat_interval
+        if next_send > now:
+            await asyncio.sleep(next_send - now)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional, Union
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from ..database.repositories.media_repository import MediaRepository
+
+logger = logging.getLogger(__name__)
+
+# Поддерживаемые типы вложений: метод отправки bot.send_<kind>
+MEDIA_KINDS = ('photo', 'video', 'document', 'animation')
+
+# Ключ источника не передан в send и вычисляется при отправке
+_COMPUTE_KEY: Any = object()
+
+
+class MediaService:
+    """Отправка медиа с однократной загрузкой файла
+    
+    Источник вложения - путь к локальному файлу, URL или готовый file_id.
+    Файл и URL загружаются в Telegram один раз: полученный file_id
+    сохраняется в памяти и в media_cache, все следующие отправки идут по
+    нему. Пока идет первая загрузка, параллельные отправки того же
+    источника ждут ее результата. Если Telegram перестал принимать
+    file_id, он удаляется и файл загружается заново.
+    """
+    
+    def __init__(self):
+        self.media_repo = MediaRepository()
+        self._file_ids: Dict[str, str] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    async def send(self, bot: Bot, chat_id: int, kind: str, source: str,
+                   key: Optional[str] = _COMPUTE_KEY, **kwargs: Any) -> Message:
+        """Отправка вложения kind ('photo', 'video', ...) с повторным использованием file_id
+        
+        key - результат cache_key для source; при отправке многим получателям
+        его стоит вычислить один раз и передавать сюда.
+        """
+        if kind not in MEDIA_KINDS:
+            raise ValueError(f"Неподдерживаемый тип вложения: {kind}")
+        
+        if key is _COMPUTE_KEY:
+            key = await self.cache_key(kind, source)
+        if key is None:
+            # Источник уже является file_id: загружать нечего
+            return await self._send_raw(bot, chat_id, kind, source, **kwargs)
+        
+        file_id = await self._get_file_id(key)
+        if file_id:
+            try:
+                return await self._send_raw(bot, chat_id, kind, file_id, **kwargs)
+            except TelegramBadRequest as e:
+                if not self._is_file_error(e):
+                    raise
+                logger.warning(f"file_id для {key} больше не действителен, файл будет загружен заново: {e}")
+                await self._forget(key, file_id)
+        
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Файл мог загрузить другой отправитель, пока мы ждали блокировку
+            file_id = await self._get_file_id(key)
+            if file_id:
+                return await self._send_raw(bot, chat_id, kind, file_id, **kwargs)
+            
+            message = await self._send_raw(bot, chat_id, kind, self._upload_source(source), **kwargs)
+            file_id = self._extract_file_id(message, kind)
+            if file_id:
+                self._file_ids[key] = file_id
+                await self.media_repo.save_file_id(key, file_id)
+                logger.info(f"Файл {key} загружен в Telegram, file_id сохранен")
+            return message
+    
+    async def cache_key(self, kind: str, source: str) -> Optional[str]:
+        """Ключ источника в кеше; None, если источник - file_id (файл проверяется вне event loop)"""
+        return await asyncio.to_thread(self._cache_key, kind, source)
+    
+    @staticmethod
+    def _cache_key(kind: str, source: str) -> Optional[str]:
+        """Ключ источника в кеше; None, если источник - file_id"""
+        if source.startswith(('http://', 'https://')):
+            return f"{kind}:url:{source}"
+        
+        if os.path.isfile(source):
+            # Размер и время изменения в ключе: измененный файл загрузится заново
+            stat = os.stat(source)
+            return f"{kind}:file:{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns}"
+        return None
+    
+    @staticmethod
+    def _upload_source(source: str) -> Union[str, FSInputFile]:
+        """Объект для загрузки: URL Telegram скачает сам, локальный файл отправляется байтами"""
+        if source.startswith(('http://', 'https://')):
+            return source
+        return FSInputFile(source)
+    
+    async def _get_file_id(self, key: str) -> Optional[str]:
+        """file_id из памяти процесса или из БД"""
+        file_id = self._file_ids.get(key)
+        if file_id is None:
+            file_id = await self.media_repo.get_file_id(key)
+            if file_id:
+                self._file_ids[key] = file_id
+        return file_id
+    
+    async def _forget(self, key: str, file_id: str):
+        """Удаление недействительного file_id"""
+        if self._file_ids.get(key) == file_id:
+            del self._file_ids[key]
+        await self.media_repo.delete_file_id(key, file_id)
+    
+    @staticmethod
+    async def _send_raw(bot: Bot, chat_id: int, kind: str, media: Any, **kwargs: Any) -> Message:
+        """Вызов bot.send_<kind>"""
+        method = getattr(bot, f"send_{kind}")
+        return await method(chat_id=chat_id, **{kind: media}, **kwargs)
+    
+    @staticmethod
+    def _extract_file_id(message: Message, kind: str) -> Optional[str]:
+        """file_id загруженного файла из ответа Telegram"""
+        media = getattr(message, kind, None)
+        if isinstance(media, list):
+            # Для фото берем самый крупный размер
+            media = media[-1] if media else None
+        return getattr(media, 'file_id', None)
+    
+    @staticmethod
+    def _is_file_error(error: TelegramBadRequest) -> bool:
+        """Ошибка относится к file_id (устарел, неверный или недоступен)"""
+        return 'file' in error.message.lower()
+
+# Общий сервис процесса: file_id и блокировки загрузки разделяются всеми рассылками
+media_service = MediaService()
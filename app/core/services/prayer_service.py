@@ -2,8 +2,10 @@ from typing import List, Dict, Optional
 from ..database.repositories.prayer_repository import PrayerRepository
 from ..database.repositories.prayer_history_repository import PrayerHistoryRepository
 from ..database.repositories.user_repository import UserRepository
+from ..database.repositories.user_totals_repository import UserTotalsRepository
 from ..database.models.prayer import Prayer
 from ..database.models.prayer_history import PrayerHistory
+from ..database.models.user_totals import UserTotals
 from ..config import config
 
 class PrayerService:
@@ -13,6 +15,7 @@ class PrayerService:
         self.prayer_repo = PrayerRepository()
         self.history_repo = PrayerHistoryRepository()
         self.user_repo = UserRepository()
+        self.totals_repo = UserTotalsRepository()
     
     async def set_user_prayers(self, telegram_id: int, prayers_data: Dict[str, int]) -> bool:
         """Установка намазов пользователя"""
@@ -20,74 +23,26 @@ class PrayerService:
         if not user:
             return False
         
-        # Получаем ID пользователя из базы
-        user_data = await self.user_repo.get_user_by_telegram_id(telegram_id)
-        
-        for prayer_type, count in prayers_data.items():
-            if prayer_type in config.PRAYER_TYPES:
-                await self.prayer_repo.create_or_update_prayer(
-                    user_id=telegram_id, prayer_type=prayer_type, 
-                    total_missed=count, completed=0
-                )
-                
-                # Добавляем в историю
-                await self.history_repo.add_history_record(
-                    PrayerHistory(
-                        user_id=telegram_id,
-                        prayer_type=prayer_type,
-                        action='set',
-                        amount=count,
-                        previous_value=0,
-                        new_value=count,
-                        comment='Установка начального количества'
-                    )
-                )
-        
-        return True
+        return await self.prayer_repo.bulk_set_prayers(
+            user_id=telegram_id,
+            prayers_data=self._filter_prayer_types(prayers_data),
+            reset_completed=True,
+            action='set',
+            comment='Установка начального количества'
+        )
     
     async def update_prayer_count(self, telegram_id: int, prayer_type: str, 
-                                  change: int) -> bool:
-        """Изменение количества намазов"""
-        prayer = await self.prayer_repo.get_prayer(telegram_id, prayer_type)
-        if not prayer:
-            # Создаем новый намаз если не существует
-            await self.prayer_repo.create_or_update_prayer(
-                telegram_id, prayer_type, max(0, change), 0
-            )
-            
-            await self.history_repo.add_history_record(
-                PrayerHistory(
-                    user_id=telegram_id,
-                    prayer_type=prayer_type,
-                    action='add' if change > 0 else 'remove',
-                    amount=abs(change),
-                    previous_value=0,
-                    new_value=max(0, change)
-                )
-            )
-            return True
-        
-        # Обновляем существующий
-        old_value = prayer.completed
-        new_value = max(0, old_value + change)
-        
-        await self.prayer_repo.update_completed_prayers(
-            telegram_id, prayer_type, change
-        )
-        
-        # Добавляем в историю
-        await self.history_repo.add_history_record(
-            PrayerHistory(
-                user_id=telegram_id,
-                prayer_type=prayer_type,
-                action='add' if change > 0 else 'remove',
-                amount=abs(change),
-                previous_value=old_value,
-                new_value=new_value
-            )
+                                  change: int, strict: bool = False) -> Optional[Prayer]:
+        """Изменение количества восполненных намазов одной записью в БД
+        
+        Возвращает обновленный намаз, чтобы обработчику не нужно было
+        перечитывать его из базы. Со strict изменение, выводящее значение за
+        пределы [0, total_missed], не применяется и возвращается None, поэтому
+        обработчикам не нужно заранее читать намаз для проверки.
+        """
+        return await self.prayer_repo.apply_completed_change(
+            telegram_id, prayer_type, change, strict=strict
         )
-        
-        return True
     
     async def get_user_prayers(self, telegram_id: int) -> List[Prayer]:
         """Получение намазов пользователя"""
@@ -136,73 +91,35 @@ class PrayerService:
             'prayers': prayer_details
         }
     
+    async def get_user_totals(self, telegram_id: int) -> UserTotals:
+        """Получение итогов пользователя по намазам и постам (одна строка)"""
+        return await self.totals_repo.get_user_totals(telegram_id)
+    
     async def increase_missed_prayers(self, telegram_id: int, prayer_type: str, 
-                                      amount: int = 1) -> bool:
+                                      amount: int = 1) -> Prayer:
         """Увеличение количества пропущенных намазов"""
-        prayer = await self.prayer_repo.get_prayer(telegram_id, prayer_type)
-        
-        if not prayer:
-            # Создаем новый намаз
-            await self.prayer_repo.create_or_update_prayer(
-                telegram_id, prayer_type, amount, 0
-            )
-        else:
-            # Обновляем существующий
-            await self.prayer_repo.create_or_update_prayer(
-                telegram_id, prayer_type, 
-                prayer.total_missed + amount, prayer.completed
-            )
-        
-        # Добавляем в историю
-        await self.history_repo.add_history_record(
-            PrayerHistory(
-                user_id=telegram_id,
-                prayer_type=prayer_type,
-                action='add_missed',
-                amount=amount,
-                previous_value=prayer.total_missed if prayer else 0,
-                new_value=(prayer.total_missed if prayer else 0) + amount,
-                comment='Увеличение пропущенных намазов'
-            )
+        return await self.prayer_repo.add_missed_prayers(
+            telegram_id, prayer_type, amount,
+            comment='Увеличение пропущенных намазов'
         )
-        
-        return True
     
     async def update_specific_prayers(self, telegram_id: int, prayers_data: Dict[str, int]) -> bool:
-        """Обновление только указанных типов намазов"""
+        """Обновление только указанных типов намазов (восполненные сохраняются)"""
         user = await self.user_repo.get_user_by_telegram_id(telegram_id)
         if not user:
             return False
         
-        for prayer_type, count in prayers_data.items():
-            if prayer_type in config.PRAYER_TYPES:
-                # Получаем текущий намаз
-                existing_prayer = await self.prayer_repo.get_prayer(telegram_id, prayer_type)
-                
-                if existing_prayer:
-                    # Обновляем существующий (сохраняем completed)
-                    await self.prayer_repo.create_or_update_prayer(
-                        user_id=telegram_id, prayer_type=prayer_type, 
-                        total_missed=count, completed=existing_prayer.completed
-                    )
-                else:
-                    # Создаем новый
-                    await self.prayer_repo.create_or_update_prayer(
-                        user_id=telegram_id, prayer_type=prayer_type, 
-                        total_missed=count, completed=0
-                    )
-                
-                # Добавляем в историю
-                await self.history_repo.add_history_record(
-                    PrayerHistory(
-                        user_id=telegram_id,
-                        prayer_type=prayer_type,
-                        action='update',
-                        amount=count,
-                        previous_value=existing_prayer.total_missed if existing_prayer else 0,
-                        new_value=count,
-                        comment='Индивидуальное обновление количества'
-                    )
-                )
-        
-        return True
+        return await self.prayer_repo.bulk_set_prayers(
+            user_id=telegram_id,
+            prayers_data=self._filter_prayer_types(prayers_data),
+            reset_completed=False,
+            action='update',
+            comment='Индивидуальное обновление количества'
+        )
+    
+    def _filter_prayer_types(self, prayers_data: Dict[str, int]) -> Dict[str, int]:
+        """Отбор только известных типов намазов"""
+        return {
+            prayer_type: count for prayer_type, count in prayers_data.items()
+            if prayer_type in config.PRAYER_TYPES
+        }
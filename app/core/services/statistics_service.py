@@ -1,7 +1,8 @@
 from typing import Dict, List
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from ..database.repositories.prayer_repository import PrayerRepository
 from ..database.repositories.user_repository import UserRepository
+from ..database.repositories.global_stats_repository import GlobalStatsRepository
 from .calculation_service import CalculationService
 
 class StatisticsService:
@@ -10,53 +11,64 @@ class StatisticsService:
     def __init__(self):
         self.prayer_repo = PrayerRepository()
         self.user_repo = UserRepository()
+        self.global_stats_repo = GlobalStatsRepository()
         self.calc_service = CalculationService()
     
+    # Возрастные группы: (название, возраст, с которого начинается следующая группа)
+    AGE_GROUPS = [
+        ("До 18", 18),
+        ("18-24", 25),
+        ("25-34", 35),
+        ("35-44", 45),
+        ("45-54", 55),
+    ]
+    OLDEST_AGE_GROUP = "55+"
+    
     async def get_global_statistics(self) -> Dict:
-        """Получение глобальной статистики"""
-        stats = await self.prayer_repo.get_statistics()
+        """Получение глобальной статистики из сводной таблицы global_stats"""
+        stats = await self.global_stats_repo.get_all()
         
-        # Добавляем информацию о пользователях
-        all_users = await self.user_repo.get_all_registered_users()
+        # Пользователь моложе age, если родился позже этой даты
+        age_groups = [
+            (label, self.calc_service.get_birth_date_range(min_age=age)[1])
+            for label, age in self.AGE_GROUPS
+        ]
+        age_counts = await self.global_stats_repo.get_age_groups(age_groups, self.OLDEST_AGE_GROUP)
+        by_age_group = {
+            label: age_counts[label]
+            for label in [label for label, _ in self.AGE_GROUPS] + [self.OLDEST_AGE_GROUP]
+            if label in age_counts
+        }
         
+        now = datetime.now()
         user_stats = {
-            'total_registered': len(all_users),
-            'by_gender': {},
-            'by_city': {},
-            'by_age_group': {}
+            'total_registered': stats.get('users', {}).get('', 0),
+            'active_day': await self.user_repo.count_active_users(now - timedelta(days=1)),
+            'active_week': await self.user_repo.count_active_users(now - timedelta(days=7)),
+            'undeliverable': stats.get('undeliverable', {}).get('', 0),
+            'by_gender': stats.get('gender', {}),
+            'by_city': stats.get('city', {}),
+            'by_age_group': by_age_group
         }
         
-        for user in all_users:
-            # Статистика по полу
-            if user.gender:
-                user_stats['by_gender'][user.gender] = user_stats['by_gender'].get(user.gender, 0) + 1
-            
-            # Статистика по городу
-            if user.city:
-                user_stats['by_city'][user.city] = user_stats['by_city'].get(user.city, 0) + 1
-            
-            # Статистика по возрастным группам
-            if user.birth_date:
-                age = self.calc_service.calculate_age(user.birth_date)
-                age_group = self._get_age_group(age)
-                user_stats['by_age_group'][age_group] = user_stats['by_age_group'].get(age_group, 0) + 1
+        missed = stats.get('prayer_missed', {})
+        completed = stats.get('prayer_completed', {})
+        prayer_statistics = [
+            {
+                'prayer_type': prayer_type,
+                'total_missed': missed.get(prayer_type, 0),
+                'total_completed': completed.get(prayer_type, 0),
+                'total_remaining': missed.get(prayer_type, 0) - completed.get(prayer_type, 0)
+            }
+            for prayer_type in sorted(set(missed) | set(completed))
+        ]
         
         return {
-            **stats,
+            'total_users': stats.get('prayer_users', {}).get('', 0),
+            'prayer_statistics': prayer_statistics,
             'user_statistics': user_stats
         }
     
-    def _get_age_group(self, age: int) -> str:
-        """Определение возрастной группы"""
-        if age < 18:
-            return "До 18"
-        elif age < 25:
-            return "18-24"
-        elif age < 35:
-            return "25-34"
-        elif age < 45:
-            return "35-44"
-        elif age < 55:
-            return "45-54"
-        else:
-            return "55+"
+    async def reconcile_global_statistics(self) -> int:
+        """Сверка сводной статистики с исходными данными"""
+        return await self.global_stats_repo.reconcile()
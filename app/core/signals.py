@@ -0,0 +1,52 @@
+"""Сигналы, которые должны дойти до всех процессов бота
+
+При запуске с воркерами (WORKER_PROCESSES > 0) у каждого процесса свои
+кеши и фоновые задачи. Сигнал сразу обрабатывается в процессе, где он
+отправлен, и передается остальным процессам через forwarder, который
+устанавливает app.bot.sharding.
+"""
+import logging
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Изменились роли пользователей (карту ролей нужно перечитать)
+ROLES_CHANGED = "roles_changed"
+# В очередь рассылок добавлено задание
+BROADCAST_QUEUED = "broadcast_queued"
+
+
+class ProcessSignals:
+    """Подписка на сигналы и их рассылка по процессам"""
+    
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable[[], None]]] = {}
+        self._forwarder: Optional[Callable[[str], None]] = None
+    
+    def subscribe(self, name: str, handler: Callable[[], None]):
+        """Обработчик сигнала в текущем процессе"""
+        self._handlers.setdefault(name, []).append(handler)
+    
+    def set_forwarder(self, forwarder: Optional[Callable[[str], None]]):
+        """Передача сигналов другим процессам (None - один процесс)"""
+        self._forwarder = forwarder
+    
+    def publish(self, name: str):
+        """Отправка сигнала: обработка здесь и передача другим процессам"""
+        self.dispatch(name)
+        if self._forwarder is not None:
+            try:
+                self._forwarder(name)
+            except Exception as e:
+                logger.error(f"Не удалось передать сигнал {name} другим процессам: {e}")
+    
+    def dispatch(self, name: str):
+        """Обработка сигнала в текущем процессе"""
+        for handler in self._handlers.get(name, ()):
+            try:
+                handler()
+            except Exception as e:
+                logger.error(f"Ошибка обработчика сигнала {name}: {e}")
+
+# Сигналы процесса
+process_signals = ProcessSignals()
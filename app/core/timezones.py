@@ -0,0 +1,57 @@
+"""Часовые пояса пользователей"""
+import datetime
+from typing import List, Optional
+
+# Смещение от UTC в минутах для распространенных городов (без перехода на летнее время)
+CITY_UTC_OFFSETS = {
+    # UTC+2
+    'калининград': 120,
+    # UTC+3
+    'москва': 180, 'санкт-петербург': 180, 'питер': 180, 'казань': 180,
+    'набережные челны': 180, 'нижнекамск': 180, 'альметьевск': 180,
+    'зеленодольск': 180, 'бугульма': 180, 'елабуга': 180, 'чистополь': 180,
+    'лениногорск': 180, 'азнакаево': 180, 'буинск': 180, 'арск': 180,
+    'нижний новгород': 180, 'чебоксары': 180, 'йошкар-ола': 180,
+    'киров': 180, 'пенза': 180, 'волгоград': 180, 'воронеж': 180,
+    'ростов-на-дону': 180, 'краснодар': 180, 'сочи': 180,
+    'махачкала': 180, 'дербент': 180, 'грозный': 180, 'нальчик': 180,
+    'владикавказ': 180, 'черкесск': 180, 'магас': 180, 'назрань': 180,
+    'симферополь': 180, 'минск': 180, 'стамбул': 180,
+    # UTC+4
+    'самара': 240, 'тольятти': 240, 'ульяновск': 240, 'димитровград': 240,
+    'саратов': 240, 'астрахань': 240, 'ижевск': 240, 'баку': 240,
+    'дубай': 240,
+    # UTC+5
+    'уфа': 300, 'стерлитамак': 300, 'салават': 300, 'нефтекамск': 300,
+    'октябрьский': 300, 'туймазы': 300, 'оренбург': 300, 'орск': 300,
+    'екатеринбург': 300, 'челябинск': 300, 'магнитогорск': 300,
+    'тюмень': 300, 'тобольск': 300, 'пермь': 300, 'курган': 300,
+    'сургут': 300, 'нижневартовск': 300, 'ханты-мансийск': 300,
+    'нефтеюганск': 300, 'новый уренгой': 300, 'ташкент': 300,
+    'самарканд': 300, 'душанбе': 300, 'алматы': 300, 'астана': 300,
+    'шымкент': 300, 'актобе': 300,
+    # UTC+6 и восточнее
+    'омск': 360, 'бишкек': 360, 'новосибирск': 420, 'томск': 420,
+    'барнаул': 420, 'кемерово': 420, 'новокузнецк': 420,
+    'красноярск': 420, 'иркутск': 480, 'улан-удэ': 480, 'чита': 540,
+    'якутск': 540, 'владивосток': 600, 'хабаровск': 600,
+}
+
+
+def get_city_utc_offset(city: Optional[str]) -> Optional[int]:
+    """Смещение от UTC (в минутах) по названию города; None, если город неизвестен"""
+    if not city:
+        return None
+    
+    name = " ".join(city.lower().replace('ё', 'е').replace('г.', ' ').split())
+    return CITY_UTC_OFFSETS.get(name)
+
+
+def get_offsets_at_local_time(local_time: datetime.time, now_utc: datetime.datetime) -> List[int]:
+    """Смещения от UTC (в минутах), для которых в момент now_utc местное время равно local_time"""
+    now_minutes = now_utc.hour * 60 + now_utc.minute
+    target_minutes = local_time.hour * 60 + local_time.minute
+    offset = (target_minutes - now_minutes) % 1440
+    
+    # Существующие пояса лежат в диапазоне от UTC-12 до UTC+14
+    return [value for value in (offset - 1440, offset) if -720 <= value <= 840]
@@ -1,96 +1,198 @@
+"""Фоновые задачи"""
+import datetime
 import logging
+from typing import AsyncIterator, List, Optional
 from aiogram import Bot
-from typing import List
 
-from ..core.config import config, escape_markdown
-from ..core.database.repositories.user_repository import UserRepository
-from ..core.services.prayer_service import PrayerService
+from ..core.config import config
+from ..core.timezones import get_offsets_at_local_time
+from ..core.database.models.user import ReminderAudienceEntry
+from ..core.database.repositories.reminder_audience_repository import ReminderAudienceRepository
+from ..core.database.repositories.job_run_repository import JobRunRepository
+from ..core.services.delivery_service import DeliveryService
 from ..bot.utils.text_messages import text_message
 
 logger = logging.getLogger(__name__)
 
-async def send_daily_reminders():
-    """Отправка ежедневных напоминаний со статистикой"""
-    bot = Bot(token=config.BOT_TOKEN)
-    user_repo = UserRepository()
-    prayer_service = PrayerService()
+async def _iter_audience(utc_offsets: List[int]) -> AsyncIterator[ReminderAudienceEntry]:
+    """Получатели из снимков аудитории (снимок собирается сразу, если не подготовлен заранее)"""
+    audience_repo = ReminderAudienceRepository()
+    for utc_offset in utc_offsets:
+        if not await audience_repo.is_fresh(utc_offset, config.REMINDER_BUCKET_MINUTES * 60):
+            await audience_repo.build(utc_offset)
+        async for entry in audience_repo.iter_audience(utc_offset):
+            yield entry
+
+
+async def send_daily_reminders(bot: Bot, utc_offsets: List[int]) -> int:
+    """Отправка ежедневных напоминаний со статистикой пользователям часовых поясов utc_offsets"""
+    delivery_service = DeliveryService()
+    
+    async def _send(chat_id: int, message_text: str):
+        await bot.send_message(
+            chat_id=chat_id,
+            text=message_text,
+            parse_mode="MarkdownV2"
+        )
     
     try:
-        # Получаем только пользователей с включенными уведомлениями
-        users = await user_repo.get_users_with_notifications_enabled()
+        # Имена и остатки уже собраны в снимке аудитории; статичный текст
+        # шаблона экранирован заранее, для каждого получателя экранируется только имя
+        template = text_message.DAILY_REMINDER
         
-        logger.info(f"Найдено {len(users)} пользователей с включенными уведомлениями")
+        async def _recipients():
+            async for recipient in _iter_audience(utc_offsets):
+                yield recipient.telegram_id, template.render(
+                    name=recipient.display_name,
+                    remaining=recipient.remaining
+                )
         
-        sent_count = 0
-        for user in users:
-            try:
-                stats = await prayer_service.get_user_statistics(user.telegram_id)
-                
-                # Отправляем напоминание только если есть что восполнять
-                if stats['total_remaining'] > 0:
-                    message_text = escape_markdown(
-                        f"🌙 Доброй ночи, {escape_markdown(user.display_name)}!\n\n"
-                        f"📊 Твоя статистика на сегодня:\n"
-                        f"⏳ Осталось восполнить: *{stats['total_remaining']}* намазов\n\n"
-                        "🤲 Не забывай о восполнении намазов каждый день.\n"
-                        "Пусть Аллах облегчит этот путь!\n\n",
-                        ".!?()-"
-                    )
-                    
-                    await bot.send_message(
-                        chat_id=user.telegram_id,
-                        text=message_text,
-                        parse_mode="MarkdownV2"
-                    )
-                    sent_count += 1
-                
-            except Exception as e:
-                logger.error(f"Ошибка отправки уведомления пользователю {user.telegram_id}: {e}")
-                continue
+        result = await delivery_service.deliver(_recipients(), _send)
+        await ReminderAudienceRepository().delete(utc_offsets)
+        
+        logger.info(
+            f"Отправлены ежедневные напоминания (пояса {utc_offsets}) для {result['sent']} пользователей "
+            f"({result['rate']:.1f} сообщ./с)"
+        )
         
-        logger.info(f"Отправлены ежедневные напоминания для {sent_count} пользователей")
+        return result['total']
         
     except Exception as e:
         logger.error(f"Ошибка в задаче ежедневных напоминаний: {e}")
-    finally:
-        await bot.session.close()
+        raise
 
 
-async def send_evening_reminders():
-    """Отправка вечерних напоминаний о восполнении намазов"""
-    bot = Bot(token=config.BOT_TOKEN)
-    user_repo = UserRepository()
-    prayer_service = PrayerService()
+async def send_evening_reminders(bot: Bot, utc_offsets: List[int]) -> int:
+    """Отправка вечерних напоминаний о восполнении намазов пользователям часовых поясов utc_offsets"""
+    delivery_service = DeliveryService()
+    
+    async def _send(chat_id: int, message_text: str):
+        await bot.send_message(
+            chat_id=chat_id,
+            text=message_text,
+            parse_mode="MarkdownV2"
+        )
     
     try:
-        # Получаем только пользователей с включенными уведомлениями
-        users = await user_repo.get_users_with_notifications_enabled()
+        message_text = text_message.get_random_reminder()
         
-        reminder_messages = text_message.reminder_messages
+        async def _recipients():
+            async for recipient in _iter_audience(utc_offsets):
+                yield recipient.telegram_id, message_text
         
-        import random
-        message_text = escape_markdown(random.choice(reminder_messages), ".?!-()[]")
+        result = await delivery_service.deliver(_recipients(), _send)
+        await ReminderAudienceRepository().delete(utc_offsets)
         
-        sent_count = 0
-        for user in users:
-            try:
-                stats = await prayer_service.get_user_statistics(user.telegram_id)
-                
-                if stats['total_remaining'] > 0:
-                    await bot.send_message(
-                        chat_id=user.telegram_id,
-                        text=message_text,
-                        parse_mode="MarkdownV2"
-                    )
-                    sent_count += 1
-                
-            except Exception as e:
-                logger.error(f"Ошибка отправки напоминания пользователю {user.telegram_id}: {e}")
-                continue
+        logger.info(
+            f"Отправлены вечерние напоминания (пояса {utc_offsets}) для {result['sent']} пользователей "
+            f"({result['rate']:.1f} сообщ./с)"
+        )
         
-        logger.info(f"Отправлены вечерние напоминания для {sent_count} пользователей")
+        return result['total']
         
     except Exception as e:
         logger.error(f"Ошибка в задаче вечерних напоминаний: {e}")
-    finally:
-        await bot.session.close()
\ No newline at end of file
+        raise
+
+
+def _bucket_start(moment: Optional[datetime.datetime] = None) -> datetime.datetime:
+    """Начало интервала планировщика напоминаний (UTC), в который попадает moment (по умолчанию - сейчас)"""
+    moment = (moment or datetime.datetime.now(datetime.timezone.utc)).astimezone(datetime.timezone.utc)
+    return moment.replace(
+        minute=moment.minute - moment.minute % config.REMINDER_BUCKET_MINUTES,
+        second=0, microsecond=0
+    )
+
+
+def _pending_buckets(checkpoint: Optional[datetime.datetime],
+                     bucket: datetime.datetime) -> List[datetime.datetime]:
+    """Интервалы после checkpoint до bucket включительно, которые еще не отправлены
+    
+    Интервалы старше REMINDER_CATCHUP_MINUTES не досылаются: напоминание
+    пришло бы слишком поздно по местному времени.
+    """
+    if checkpoint is None:
+        return [bucket]
+    
+    step = datetime.timedelta(minutes=config.REMINDER_BUCKET_MINUTES)
+    first = checkpoint + step
+    earliest = bucket - datetime.timedelta(minutes=config.REMINDER_CATCHUP_MINUTES)
+    if first < earliest:
+        skipped = -(-(earliest - first) // step)
+        logger.warning(
+            f"Напоминания за {skipped} интервалов с {first:%Y-%m-%d %H:%M} UTC не будут досланы: "
+            f"опоздание больше {config.REMINDER_CATCHUP_MINUTES} мин"
+        )
+        first += skipped * step
+    
+    buckets = []
+    while first <= bucket:
+        buckets.append(first)
+        first += step
+    return buckets
+
+
+def _reminder_jobs():
+    """Напоминания и местное время их отправки"""
+    return (
+        (datetime.time.fromisoformat(config.EVENING_REMINDER_LOCAL_TIME), send_evening_reminders),
+        (datetime.time.fromisoformat(config.DAILY_STATISTICS_LOCAL_TIME), send_daily_reminders),
+    )
+
+
+async def prepare_reminder_audience(scheduled_at: Optional[datetime.datetime] = None) -> int:
+    """Сборка снимков аудитории для поясов следующего запуска dispatch_reminders
+    
+    Запускается за REMINDER_AUDIENCE_LEAD_MINUTES минут до отправки,
+    возвращает число получателей в собранных снимках.
+    """
+    audience_repo = ReminderAudienceRepository()
+    next_bucket = _bucket_start(scheduled_at) + datetime.timedelta(minutes=config.REMINDER_BUCKET_MINUTES)
+    
+    built = 0
+    for local_time, _ in _reminder_jobs():
+        for utc_offset in get_offsets_at_local_time(local_time, next_bucket):
+            built += await audience_repo.build(utc_offset)
+    return built
+
+
+async def dispatch_reminders(bot: Bot, scheduled_at: Optional[datetime.datetime] = None) -> int:
+    """Отправка напоминаний часовым поясам, в которых наступило время напоминания
+    
+    Запускается каждые REMINDER_BUCKET_MINUTES минут: каждый запуск отправляет
+    напоминания только пользователям нескольких поясов, поэтому нагрузка
+    распределена по суткам, а напоминание приходит в одно и то же местное время.
+    Пояса определяются по плановому времени запуска scheduled_at, а не по
+    времени старта. Последний отправленный интервал сохраняется для каждого
+    вида напоминаний, и интервалы, пропущенные опоздавшими, пропущенными или
+    упавшими запусками, досылаются следующим запуском.
+    Возвращает число обработанных получателей.
+    """
+    bucket = _bucket_start(scheduled_at)
+    job_run_repo = JobRunRepository()
+    
+    processed = 0
+    error = None
+    for local_time, job in _reminder_jobs():
+        checkpoint_id = f"reminders:{job.__name__}"
+        buckets = _pending_buckets(await job_run_repo.get_checkpoint(checkpoint_id), bucket)
+        if not buckets:
+            continue
+        
+        utc_offsets = sorted({
+            utc_offset
+            for pending in buckets
+            for utc_offset in get_offsets_at_local_time(local_time, pending)
+        })
+        if utc_offsets:
+            try:
+                processed += await job(bot, utc_offsets)
+            except Exception as e:
+                # Ошибка одной рассылки не отменяет другую; ее интервалы повторятся следующим запуском
+                error = e
+                continue
+        await job_run_repo.save_checkpoint(checkpoint_id, buckets[-1])
+    
+    if error is not None:
+        raise error
+    return processed
@@ -0,0 +1,163 @@
+"""Координация фоновых задач планировщика"""
+import asyncio
+import datetime
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+from apscheduler.events import (
+    EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED,
+    JobExecutionEvent, JobSubmissionEvent
+)
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.date import DateTrigger
+
+from ..core.config import config
+from ..core.database.repositories.job_run_repository import JobRunRepository
+
+logger = logging.getLogger(__name__)
+
+# Задача возвращает число обработанных пользователей (или None)
+JobFunction = Callable[..., Awaitable[Optional[int]]]
+
+
+class JobCoordinator:
+    """Запуск задач планировщика без наложений и с записью метрик
+    
+    Экземпляр задачи не запускается повторно, пока не завершился предыдущий
+    (max_instances=1), пропущенные запуски схлопываются в один (coalesce),
+    а опоздавшие дольше JOB_MISFIRE_GRACE_SECONDS пропускаются. Задачи одной
+    группы блокировки выполняются по очереди. Каждый запуск записывается в
+    job_runs: плановое и фактическое время старта, длительность, число
+    обработанных пользователей и скорость. Пропущенные и схлопнутые запуски
+    тоже записываются; для задач с catch_up пропущенный запуск не теряется,
+    а выполняется сразу после текущего с плановым временем пропуска.
+    """
+    
+    def __init__(self, scheduler: AsyncIOScheduler):
+        self.scheduler = scheduler
+        self.job_run_repo = JobRunRepository()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._scheduled_at: Dict[str, datetime.datetime] = {}
+        self._windows: Dict[str, Optional[float]] = {}
+        self._catch_up: Dict[str, list] = {}
+        self._pending_writes = set()
+        
+        scheduler.add_listener(self._on_submitted, EVENT_JOB_SUBMITTED)
+        scheduler.add_listener(self._on_skipped, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+    
+    def add_job(self, func: JobFunction, trigger: Any, job_id: str,
+                args: Sequence[Any] = (), lock_group: Optional[str] = None,
+                window: Optional[float] = None, pass_scheduled_at: bool = False,
+                catch_up: bool = False):
+        """Добавление задачи
+        
+        lock_group - задачи с одинаковой группой не выполняются одновременно,
+        window - время (секунды), в которое задача должна укладываться,
+        pass_scheduled_at - передавать задаче плановое время запуска
+        (аргумент scheduled_at), а не полагаться на текущее время,
+        catch_up - пропущенный запуск выполняется отдельным догоняющим
+        запуском (задача сама досылает то, что накопилось к его плановому времени).
+        """
+        self._windows[job_id] = window
+        run_args = [job_id, lock_group or job_id, func, list(args), pass_scheduled_at]
+        if catch_up:
+            self._catch_up[job_id] = run_args
+        self.scheduler.add_job(
+            self._run,
+            trigger,
+            args=run_args,
+            id=job_id,
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=config.JOB_MISFIRE_GRACE_SECONDS,
+            replace_existing=True
+        )
+    
+    def _on_submitted(self, event: JobSubmissionEvent):
+        """Запоминаем плановое время запуска (событие приходит до старта корутины)"""
+        run_times = sorted(event.scheduled_run_times)
+        self._scheduled_at[event.job_id] = run_times[-1]
+        # Схлопнутые запуски выполняются одним запуском на последнее плановое время
+        for scheduled_at in run_times[:-1]:
+            self._record_skipped(event.job_id, 'coalesced', scheduled_at)
+    
+    def _on_skipped(self, event):
+        """Запись пропущенного запуска и, для задач с catch_up, догоняющий запуск"""
+        if isinstance(event, JobExecutionEvent):
+            status, scheduled_at = 'missed', event.scheduled_run_time
+        else:
+            status, scheduled_at = 'skipped', max(event.scheduled_run_times)
+        logger.warning(f"Запуск задачи {event.job_id} на {scheduled_at} пропущен ({status})")
+        self._record_skipped(event.job_id, status, scheduled_at)
+        
+        run_args = self._catch_up.get(event.job_id)
+        if run_args is not None:
+            # Выполнится после текущего запуска группы (блокировка в _run)
+            catch_up_id = f"{event.job_id}:catch_up"
+            job_id, lock_group, func, args, pass_scheduled_at = run_args
+            self.scheduler.add_job(
+                self._run,
+                DateTrigger(timezone=datetime.timezone.utc),
+                args=[catch_up_id, lock_group, func, args, pass_scheduled_at, scheduled_at],
+                id=catch_up_id,
+                misfire_grace_time=config.JOB_MISFIRE_GRACE_SECONDS,
+                replace_existing=True
+            )
+    
+    def _record_skipped(self, job_id: str, status: str, scheduled_at: datetime.datetime):
+        """Фоновая запись пропущенного запуска в job_runs"""
+        task = asyncio.get_running_loop().create_task(
+            self.job_run_repo.record_skipped(job_id, status, scheduled_at)
+        )
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+    
+    async def flush(self, timeout: float = 5.0):
+        """Ожидание фоновых записей в job_runs (перед закрытием БД)"""
+        if self._pending_writes:
+            await asyncio.wait(set(self._pending_writes), timeout=timeout)
+    
+    async def _run(self, job_id: str, lock_group: str, func: JobFunction, args: list,
+                   pass_scheduled_at: bool = False, scheduled_at: Optional[datetime.datetime] = None):
+        """Выполнение задачи под блокировкой группы с записью в job_runs
+        
+        scheduled_at передается догоняющему запуску: плановое время пропущенного запуска.
+        """
+        submitted_at = self._scheduled_at.pop(job_id, None)
+        scheduled_at = scheduled_at or submitted_at or datetime.datetime.now(datetime.timezone.utc)
+        
+        lock = self._locks.setdefault(lock_group, asyncio.Lock())
+        if lock.locked():
+            logger.info(f"Задача {job_id} ждет завершения другой задачи группы {lock_group}")
+        
+        async with lock:
+            started_at = datetime.datetime.now(datetime.timezone.utc)
+            run_id = await self.job_run_repo.start_run(job_id, scheduled_at, started_at)
+            started = time.monotonic()
+            
+            try:
+                if pass_scheduled_at:
+                    processed = await func(*args, scheduled_at=scheduled_at) or 0
+                else:
+                    processed = await func(*args) or 0
+            except Exception as e:
+                duration = time.monotonic() - started
+                logger.error(f"Ошибка задачи {job_id}: {e}", exc_info=True)
+                await self.job_run_repo.finish_run(run_id, 'failed', duration, error=str(e))
+                return
+            
+            duration = time.monotonic() - started
+            await self.job_run_repo.finish_run(run_id, 'success', duration, processed)
+        
+        lag = (started_at - scheduled_at).total_seconds()
+        logger.info(
+            f"Задача {job_id} выполнена: обработано {processed} за {duration:.1f} с, "
+            f"задержка старта {lag:.1f} с"
+        )
+        window = self._windows.get(job_id)
+        if window is not None and lag + duration > window:
+            logger.warning(
+                f"Задача {job_id} не укладывается в интервал {window:.0f} с "
+                f"(задержка {lag:.1f} с + выполнение {duration:.1f} с)"
+            )
@@ -0,0 +1,25 @@
+"""Фоновые задачи обслуживания БД"""
+import logging
+
+from ..core.database.repositories.user_totals_repository import UserTotalsRepository
+from ..core.services.statistics_service import StatisticsService
+
+logger = logging.getLogger(__name__)
+
+async def reconcile_statistics() -> int:
+    """Сверка денормализованных итогов и сводной статистики с исходными данными
+    
+    Возвращает число пользователей с расходящимися итогами.
+    """
+    try:
+        totals_repo = UserTotalsRepository()
+        inconsistent = await totals_repo.find_inconsistent_users(limit=1000)
+        if inconsistent:
+            logger.warning(f"Итоги пользователей расходились с данными: {len(inconsistent)}, пересборка")
+            await totals_repo.rebuild()
+        
+        await StatisticsService().reconcile_global_statistics()
+        return len(inconsistent)
+    except Exception as e:
+        logger.error(f"Ошибка в задаче сверки статистики: {e}")
+        raise
@@ -1,29 +1,27 @@
 import logging
 from aiogram import Bot
 
-from ..core.config import config, escape_markdown
+from ..core.config import escape_markdown
 from ..core.database.repositories.user_repository import UserRepository
 from ..core.services.prayer_service import PrayerService
 from ..bot.utils.text_messages import text_message
 
 logger = logging.getLogger(__name__)
 
-async def send_evening_reminders():
+async def send_evening_reminders(bot: Bot):
     """Отправка вечерних напоминаний о восполнении намазов"""
-    bot = Bot(token=config.BOT_TOKEN)
     user_repo = UserRepository()
     prayer_service = PrayerService()
     
     try:
-        users = await user_repo.get_all_registered_users()
-        
         reminder_messages = text_message.reminder_messages
         
         import random
         message_text = escape_markdown(random.choice(reminder_messages), ".?!-()[]")
         
         sent_count = 0
-        for user in users:
+        # Пользователи, заблокировавшие бота, пропускаются фильтром iter_users_by_filters
+        async for user in user_repo.iter_users_by_filters():
             try:
                 stats = await prayer_service.get_user_statistics(user.telegram_id)
                 
@@ -43,5 +41,3 @@ async def send_evening_reminders():
         
     except Exception as e:
         logger.error(f"Ошибка в задаче вечерних напоминаний: {e}")
-    finally:
-        await bot.session.close()
@@ -1,33 +1,65 @@
 import asyncio
+from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import logging
 
 from ..core.config import config
-from .daily_notifications import send_daily_reminders, send_evening_reminders
+from .daily_notifications import dispatch_reminders, prepare_reminder_audience
+from .maintenance import reconcile_statistics
+from .job_coordinator import JobCoordinator
 # from .prayer_reminders import send_evening_reminders, send_daily_reminders
 
 logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
+job_coordinator = JobCoordinator(scheduler)
 
-def start_scheduler():
-    """Запуск планировщика задач"""
+def start_scheduler(bot: Bot):
+    """Запуск планировщика задач (bot - общий экземпляр бота процесса)"""
     
-    # Ежедневные напоминания в указанное время
-    scheduler.add_job(
-        send_evening_reminders,
-        # CronTrigger(hour=13, minute=25,second=50),
-        CronTrigger(hour=17, minute=0,second=0),
-        id='evening_reminders'
+    # Вечерние напоминания и ежедневная статистика по местному времени:
+    # каждый запуск обслуживает только пояса, в которых наступило время отправки;
+    # пропущенный запуск догоняется сразу, а не только следующим по расписанию
+    job_coordinator.add_job(
+        dispatch_reminders,
+        CronTrigger(minute=f"*/{config.REMINDER_BUCKET_MINUTES}", second=0, timezone="UTC"),
+        job_id='reminders',
+        args=[bot],
+        lock_group='delivery',
+        window=config.REMINDER_BUCKET_MINUTES * 60,
+        pass_scheduled_at=True,
+        catch_up=True
     )
     
-    # Дополнительная задача для отправки ежедневной статистики
-    scheduler.add_job(
-        send_daily_reminders,
-        CronTrigger(hour=19, minute=0, second=0),  # 22:00 ежедневно
-        id='daily_statistics'
+    # Снимок аудитории собирается за несколько минут до каждого запуска рассылки
+    bucket = config.REMINDER_BUCKET_MINUTES
+    lead = min(max(1, config.REMINDER_AUDIENCE_LEAD_MINUTES), bucket - 1)
+    job_coordinator.add_job(
+        prepare_reminder_audience,
+        CronTrigger(minute=",".join(str(minute) for minute in range(bucket - lead, 60, bucket)),
+                    second=0, timezone="UTC"),
+        job_id='reminder_audience',
+        lock_group='maintenance',
+        pass_scheduled_at=True
+    )
+    
+    # Ночная сверка сводной статистики и итогов пользователей
+    job_coordinator.add_job(
+        reconcile_statistics,
+        CronTrigger(hour=0, minute=30, second=0, timezone="UTC"),  # 03:30 по Москве
+        job_id='reconcile_statistics',
+        lock_group='maintenance'
     )
     
     scheduler.start()
     logger.info("📅 Планировщик задач запущен")
+
+async def stop_scheduler():
+    """Остановка планировщика до закрытия БД (выполняющиеся задачи отменяются)"""
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+        # AsyncIOScheduler выполняет shutdown в следующей итерации цикла событий
+        await asyncio.sleep(0)
+    await job_coordinator.flush()
+    logger.info("📅 Планировщик задач остановлен")
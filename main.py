@@ -1,12 +1,19 @@
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 
 from app.core.config import config
 from app.core.database.connection import db_manager
+from app.core.database.repositories.admin_repository import AdminRepository
+from app.core.database.repositories.user_repository import UserRepository
+from app.bot.client import create_bot
+from app.bot.dispatcher import create_dispatcher
+from app.bot.sharding import ShardingDispatcher
+from app.bot.storage import SQLiteStorage
+from app.bot.webhook import run_webhook
 from app.bot.handlers import register_all_handlers
-from app.tasks.scheduler import start_scheduler
+from app.core.services.activity_tracker import activity_tracker
+from app.core.services.broadcast_worker import broadcast_worker
+from app.tasks.scheduler import start_scheduler, stop_scheduler
 from app import __version__, __author__
 
 # Настройка логирования
@@ -22,27 +29,57 @@ async def main():
 
     # logger.info("🚀 Запуск Яшел Трекер...")
     
-    # Инициализация базы данных
+    # Инициализация пула подключений и базы данных
+    await db_manager.init_pool()
     await db_manager.initialize_database()
+    if not await db_manager.health_check():
+        raise RuntimeError("База данных недоступна")
     
-    # Создание бота и диспетчера
-    bot = Bot(token=config.BOT_TOKEN)
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+    # Загрузка карты ролей для фильтров доступа
+    await AdminRepository().load_roles()
     
-    # Регистрация обработчиков
-    register_all_handlers(dp)
+    # Часовые пояса пользователей, зарегистрированных до их появления
+    await UserRepository().backfill_utc_offsets()
     
-    # Запуск планировщика задач
-    start_scheduler()
+    # Создание бота и диспетчера: один бот (и одна HTTP-сессия) на процесс
+    # используется обработчиками, задачами и рассылками
+    bot = create_bot()
+    storage = None
+    if config.WORKER_PROCESSES > 0:
+        # Обновления обрабатывают воркеры (у каждого свои хранилище FSM и трекер активности);
+        # обработчики нужны только для списка типов обновлений
+        dp = ShardingDispatcher(config.WORKER_PROCESSES)
+        register_all_handlers(dp)
+        dp.start_workers()
+    else:
+        storage = SQLiteStorage()
+        dp = create_dispatcher(storage)
+        activity_tracker.start()
+    
+    # Планировщик и очередь рассылок работают только в основном процессе
+    start_scheduler(bot)
+    broadcast_worker.start(bot)
     
     try:
-        logger.info("✅ Бот запущен и готов к работе")
-        await dp.start_polling(bot)
+        logger.info(f"✅ Бот запущен и готов к работе (режим: {config.BOT_MODE})")
+        if config.BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            # Webhook, оставшийся от запуска в режиме webhook, мешает getUpdates
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     except KeyboardInterrupt:
         logger.info("🛑 Получен сигнал остановки")
     finally:
+        await stop_scheduler()
+        if isinstance(dp, ShardingDispatcher):
+            await dp.stop_workers()
+        await broadcast_worker.stop()
         await bot.session.close()
+        if storage is not None:
+            await activity_tracker.stop()
+            await storage.close()
+        await db_manager.close()
         logger.info("👋 Бот остановлен")
 
 if __name__ == "__main__":
@@ -18,7 +18,11 @@ CREATE TABLE IF NOT EXISTS users (
     hayd_average_days REAL DEFAULT NULL,
     childbirth_count INTEGER DEFAULT 0,
     childbirth_data TEXT DEFAULT NULL,
-    daily_notifications_enabled INTEGER DEFAULT 1
+    daily_notifications_enabled INTEGER DEFAULT 1,
+    delivery_status TEXT DEFAULT 'active',
+    delivery_failures INTEGER DEFAULT 0,
+    delivery_failed_at DATETIME,
+    utc_offset INTEGER
 );
 
 -- Таблица намазов
@@ -59,12 +63,314 @@ CREATE TABLE IF NOT EXISTS admins (
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Итоги пользователей по намазам и постам
+-- (триггеры, поддерживающие таблицу, создаются приложением при старте)
+CREATE TABLE IF NOT EXISTS user_totals (
+    user_id INTEGER PRIMARY KEY,
+    prayers_missed INTEGER NOT NULL DEFAULT 0,
+    prayers_completed INTEGER NOT NULL DEFAULT 0,
+    prayers_remaining INTEGER NOT NULL DEFAULT 0,
+    fasting_missed INTEGER NOT NULL DEFAULT 0,
+    fasting_completed INTEGER NOT NULL DEFAULT 0,
+    fasting_remaining INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Сводная статистика для модераторов
+-- (триггеры, поддерживающие таблицу, создаются приложением при старте)
+CREATE TABLE IF NOT EXISTS global_stats (
+    dimension TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    value INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, bucket)
+);
+
+-- Состояния FSM (данные хранятся в компактном JSON)
+CREATE TABLE IF NOT EXISTS fsm_states (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data TEXT,
+    updated_at REAL NOT NULL
+);
+
+-- Очередь рассылок и статус доставки каждому получателю
+CREATE TABLE IF NOT EXISTS broadcast_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_by INTEGER NOT NULL,
+    chat_id INTEGER,
+    message_id INTEGER,
+    message_text TEXT NOT NULL,
+    photo TEXT,
+    video TEXT,
+    filters TEXT,
+    exclude_disabled_notifications BOOLEAN DEFAULT FALSE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    cursor INTEGER NOT NULL DEFAULT -1,
+    total INTEGER NOT NULL DEFAULT 0,
+    sent INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    started_at DATETIME,
+    finished_at DATETIME
+);
+
+CREATE TABLE IF NOT EXISTS broadcast_recipients (
+    job_id INTEGER NOT NULL,
+    telegram_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    PRIMARY KEY (job_id, telegram_id),
+    FOREIGN KEY (job_id) REFERENCES broadcast_jobs (id)
+) WITHOUT ROWID;
+
+-- file_id загруженных в Telegram медиафайлов (ключ - источник файла)
+CREATE TABLE IF NOT EXISTS media_cache (
+    key TEXT PRIMARY KEY,
+    file_id TEXT NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Снимок аудитории напоминаний, собираемый заранее для ближайших часовых поясов
+CREATE TABLE IF NOT EXISTS reminder_audience (
+    utc_offset INTEGER NOT NULL,
+    telegram_id INTEGER NOT NULL,
+    display_name TEXT NOT NULL,
+    remaining INTEGER NOT NULL,
+    built_at REAL NOT NULL,
+    PRIMARY KEY (utc_offset, telegram_id)
+) WITHOUT ROWID;
+
+-- История запусков фоновых задач
+CREATE TABLE IF NOT EXISTS job_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    scheduled_at DATETIME,
+    started_at DATETIME,
+    finished_at DATETIME,
+    lag REAL,
+    duration REAL,
+    processed INTEGER DEFAULT 0,
+    rate REAL,
+    error TEXT
+);
+
+-- Последняя обработанная плановая отметка задачи (например, интервал напоминаний)
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+    job_id TEXT PRIMARY KEY,
+    checkpoint DATETIME NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Индексы для оптимизации
 CREATE INDEX IF NOT EXISTS idx_users_telegram_id ON users(telegram_id);
+CREATE INDEX IF NOT EXISTS idx_users_registered_gender_birth_date ON users(is_registered, gender, birth_date);
+CREATE INDEX IF NOT EXISTS idx_users_audience ON users(is_registered, delivery_status, telegram_id, gender, birth_date, daily_notifications_enabled);
+CREATE INDEX IF NOT EXISTS idx_users_last_activity ON users(last_activity);
+CREATE INDEX IF NOT EXISTS idx_users_utc_offset ON users(utc_offset, telegram_id);
 CREATE INDEX IF NOT EXISTS idx_prayers_user_id ON prayers(user_id);
 CREATE INDEX IF NOT EXISTS idx_prayer_history_user_id ON prayer_history(user_id);
 CREATE INDEX IF NOT EXISTS idx_admins_telegram_id ON admins(telegram_id);
+CREATE INDEX IF NOT EXISTS idx_fsm_states_updated_at ON fsm_states(updated_at);
+CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_status ON broadcast_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_job_runs_job_id ON job_runs(job_id, started_at);
+
+-- Триггеры, поддерживающие таблицу user_totals при каждой записи
+-- (те же, что создает DatabaseConnection._create_user_totals_triggers)
+CREATE TRIGGER IF NOT EXISTS trg_prayers_totals_insert AFTER INSERT ON prayers BEGIN
+    INSERT INTO user_totals (user_id, prayers_missed, prayers_completed, prayers_remaining)
+    SELECT NEW.user_id,
+           COALESCE(SUM(total_missed), 0),
+           COALESCE(SUM(completed), 0),
+           COALESCE(SUM(MAX(0, total_missed - completed)), 0)
+    FROM prayers WHERE user_id = NEW.user_id
+    ON CONFLICT(user_id) DO UPDATE SET
+        prayers_missed = excluded.prayers_missed,
+        prayers_completed = excluded.prayers_completed,
+        prayers_remaining = excluded.prayers_remaining,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_prayers_totals_update AFTER UPDATE OF total_missed, completed ON prayers BEGIN
+    INSERT INTO user_totals (user_id, prayers_missed, prayers_completed, prayers_remaining)
+    SELECT NEW.user_id,
+           COALESCE(SUM(total_missed), 0),
+           COALESCE(SUM(completed), 0),
+           COALESCE(SUM(MAX(0, total_missed - completed)), 0)
+    FROM prayers WHERE user_id = NEW.user_id
+    ON CONFLICT(user_id) DO UPDATE SET
+        prayers_missed = excluded.prayers_missed,
+        prayers_completed = excluded.prayers_completed,
+        prayers_remaining = excluded.prayers_remaining,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_prayers_totals_delete AFTER DELETE ON prayers BEGIN
+    INSERT INTO user_totals (user_id, prayers_missed, prayers_completed, prayers_remaining)
+    SELECT OLD.user_id,
+           COALESCE(SUM(total_missed), 0),
+           COALESCE(SUM(completed), 0),
+           COALESCE(SUM(MAX(0, total_missed - completed)), 0)
+    FROM prayers WHERE user_id = OLD.user_id
+    ON CONFLICT(user_id) DO UPDATE SET
+        prayers_missed = excluded.prayers_missed,
+        prayers_completed = excluded.prayers_completed,
+        prayers_remaining = excluded.prayers_remaining,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_totals_insert AFTER INSERT ON users BEGIN
+    INSERT INTO user_totals (user_id, fasting_missed, fasting_completed, fasting_remaining)
+    VALUES (
+        NEW.telegram_id,
+        COALESCE(NEW.fasting_missed_days, 0),
+        COALESCE(NEW.fasting_completed_days, 0),
+        MAX(0, COALESCE(NEW.fasting_missed_days, 0) - COALESCE(NEW.fasting_completed_days, 0))
+    )
+    ON CONFLICT(user_id) DO UPDATE SET
+        fasting_missed = excluded.fasting_missed,
+        fasting_completed = excluded.fasting_completed,
+        fasting_remaining = excluded.fasting_remaining,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_totals_update AFTER UPDATE OF fasting_missed_days, fasting_completed_days ON users BEGIN
+    INSERT INTO user_totals (user_id, fasting_missed, fasting_completed, fasting_remaining)
+    VALUES (
+        NEW.telegram_id,
+        COALESCE(NEW.fasting_missed_days, 0),
+        COALESCE(NEW.fasting_completed_days, 0),
+        MAX(0, COALESCE(NEW.fasting_missed_days, 0) - COALESCE(NEW.fasting_completed_days, 0))
+    )
+    ON CONFLICT(user_id) DO UPDATE SET
+        fasting_missed = excluded.fasting_missed,
+        fasting_completed = excluded.fasting_completed,
+        fasting_remaining = excluded.fasting_remaining,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_totals_delete AFTER DELETE ON users BEGIN
+    DELETE FROM user_totals WHERE user_id = OLD.telegram_id;
+END;
+
+-- Триггеры, инкрементально поддерживающие таблицу global_stats
+-- (те же, что создает DatabaseConnection._create_global_stats_triggers)
+CREATE TRIGGER IF NOT EXISTS trg_users_stats_insert AFTER INSERT ON users BEGIN
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'users', '', 1 WHERE NEW.is_registered = TRUE
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'gender', NEW.gender, 1 WHERE NEW.is_registered = TRUE AND COALESCE(NEW.gender, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'city', NEW.city, 1 WHERE NEW.is_registered = TRUE AND COALESCE(NEW.city, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'birth_date', NEW.birth_date, 1 WHERE NEW.is_registered = TRUE AND COALESCE(NEW.birth_date, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_stats_update AFTER UPDATE OF is_registered, gender, city, birth_date ON users BEGIN
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'users', '', -1 WHERE OLD.is_registered = TRUE
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'gender', OLD.gender, -1 WHERE OLD.is_registered = TRUE AND COALESCE(OLD.gender, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'city', OLD.city, -1 WHERE OLD.is_registered = TRUE AND COALESCE(OLD.city, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'birth_date', OLD.birth_date, -1 WHERE OLD.is_registered = TRUE AND COALESCE(OLD.birth_date, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'users', '', 1 WHERE NEW.is_registered = TRUE
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'gender', NEW.gender, 1 WHERE NEW.is_registered = TRUE AND COALESCE(NEW.gender, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'city', NEW.city, 1 WHERE NEW.is_registered = TRUE AND COALESCE(NEW.city, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'birth_date', NEW.birth_date, 1 WHERE NEW.is_registered = TRUE AND COALESCE(NEW.birth_date, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_stats_delete AFTER DELETE ON users BEGIN
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'users', '', -1 WHERE OLD.is_registered = TRUE
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'gender', OLD.gender, -1 WHERE OLD.is_registered = TRUE AND COALESCE(OLD.gender, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'city', OLD.city, -1 WHERE OLD.is_registered = TRUE AND COALESCE(OLD.city, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'birth_date', OLD.birth_date, -1 WHERE OLD.is_registered = TRUE AND COALESCE(OLD.birth_date, '') != ''
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_undeliverable_insert AFTER INSERT ON users BEGIN
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'undeliverable', '', 1 WHERE NEW.delivery_status != 'active'
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_undeliverable_update AFTER UPDATE OF delivery_status ON users WHEN OLD.delivery_status IS NOT NEW.delivery_status BEGIN
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'undeliverable', '', -1 WHERE OLD.delivery_status != 'active'
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'undeliverable', '', 1 WHERE NEW.delivery_status != 'active'
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_undeliverable_delete AFTER DELETE ON users BEGIN
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'undeliverable', '', -1 WHERE OLD.delivery_status != 'active'
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_prayers_stats_insert AFTER INSERT ON prayers BEGIN
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'prayer_missed', NEW.prayer_type, NEW.total_missed WHERE 1
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'prayer_completed', NEW.prayer_type, NEW.completed WHERE 1
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'prayer_users', '', 1 WHERE (SELECT COUNT(*) FROM prayers WHERE user_id = NEW.user_id) = 1
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_prayers_stats_update AFTER UPDATE OF total_missed, completed ON prayers BEGIN
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'prayer_missed', NEW.prayer_type, NEW.total_missed - OLD.total_missed WHERE 1
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'prayer_completed', NEW.prayer_type, NEW.completed - OLD.completed WHERE 1
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_prayers_stats_delete AFTER DELETE ON prayers BEGIN
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'prayer_missed', OLD.prayer_type, -OLD.total_missed WHERE 1
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'prayer_completed', OLD.prayer_type, -OLD.completed WHERE 1
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+    INSERT INTO global_stats (dimension, bucket, value)
+    SELECT 'prayer_users', '', -1 WHERE NOT EXISTS (SELECT 1 FROM prayers WHERE user_id = OLD.user_id)
+    ON CONFLICT(dimension, bucket) DO UPDATE SET value = value + excluded.value;
+END;
 
 -- Миграция для существующих БД: добавление поля daily_notifications_enabled
 -- (эта команда будет игнорирована, если поле уже существует)
-ALTER TABLE users ADD COLUMN daily_notifications_enabled INTEGER DEFAULT 1;
\ No newline at end of file
+ALTER TABLE users ADD COLUMN daily_notifications_enabled INTEGER DEFAULT 1;
+
+-- Миграция для существующих БД: статус доставки и часовой пояс пользователя
+ALTER TABLE users ADD COLUMN delivery_status TEXT DEFAULT 'active';
+ALTER TABLE users ADD COLUMN delivery_failures INTEGER DEFAULT 0;
+ALTER TABLE users ADD COLUMN delivery_failed_at DATETIME;
+ALTER TABLE users ADD COLUMN utc_offset INTEGER;
@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database.connection import db_manager
+from app.core.database.repositories.user_totals_repository import UserTotalsRepository
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def run(check_only: bool, user_id: int = None):
+    """Проверка и пересборка таблицы user_totals"""
+    totals_repo = UserTotalsRepository()
+    
+    await db_manager.init_pool()
+    try:
+        await db_manager.initialize_database()
+        
+        inconsistent = await totals_repo.find_inconsistent_users()
+        if inconsistent:
+            logger.warning(f"Найдены расхождения в итогах пользователей: {inconsistent}")
+        else:
+            logger.info("Итоги пользователей согласованы с исходными данными")
+        
+        if not check_only:
+            await totals_repo.rebuild(user_id)
+    finally:
+        await db_manager.close()
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Проверка и пересборка итогов пользователей")
+    parser.add_argument("--check", action="store_true", help="только проверить, без пересборки")
+    parser.add_argument("--user-id", type=int, default=None, help="пересобрать итоги одного пользователя")
+    args = parser.parse_args()
+    
+    asyncio.run(run(args.check, args.user_id))
+
+if __name__ == "__main__":
+    main()
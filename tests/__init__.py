@@ -0,0 +1 @@
+"""Тесты Яшел Трекер"""
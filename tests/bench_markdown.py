@@ -0,0 +1,56 @@
+"""Микробенчмарк экранирования MarkdownV2
+
+Сравнивает прежний цикл replace с escape_markdown без кеша и с кешем,
+а также сборку ежедневного напоминания прежним способом и через
+MarkdownTemplate.
+
+Запуск: python -m tests.bench_markdown [число повторов]
+"""
+import sys
+import timeit
+
+from app.core.config import escape_markdown, escape_markdown_uncached
+from app.bot.utils.text_messages import MarkdownBuilder, text_message
+from tests.test_markdown import MarkdownTemplateTest, escape_markdown_replace
+
+SHORT_TEXT = "📈 Прогресс: [████░░░░░░] 40.0%"
+LONG_TEXT = text_message.HELP_TEXT.replace("\\", "")
+NAMES = [f"user_{index}.{index % 7}" for index in range(1000)]
+
+
+def _render_builder(index):
+    """Сборка строки экспорта через MarkdownBuilder"""
+    return MarkdownBuilder().raw("• Имя: ").line(NAMES[index % len(NAMES)]).raw("• Прогресс: ").line("40.0%").build()
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    cases = (
+        ("короткий текст: replace", lambda: escape_markdown_replace(SHORT_TEXT)),
+        ("короткий текст: без кеша", lambda: escape_markdown_uncached(SHORT_TEXT)),
+        ("короткий текст: escape_markdown (кеш)", lambda: escape_markdown(SHORT_TEXT)),
+        (f"текст справки ({len(LONG_TEXT)} симв.): replace", lambda: escape_markdown_replace(LONG_TEXT)),
+        (f"текст справки ({len(LONG_TEXT)} симв.): без кеша", lambda: escape_markdown_uncached(LONG_TEXT)),
+        (f"текст справки ({len(LONG_TEXT)} симв.): escape_markdown (кеш)", lambda: escape_markdown(LONG_TEXT)),
+    )
+    
+    print(f"Повторов: {number}")
+    for title, func in cases:
+        seconds = timeit.timeit(func, number=number)
+        print(f"{title:<55} {seconds * 1e6 / number:8.2f} мкс")
+    
+    counter = iter(range(10 ** 9))
+    render_cases = (
+        ("напоминание: прежняя сборка", lambda: MarkdownTemplateTest.render_daily_reminder_replace(
+            NAMES[next(counter) % len(NAMES)], 42)),
+        ("напоминание: MarkdownTemplate.render", lambda: text_message.DAILY_REMINDER.render(
+            name=NAMES[next(counter) % len(NAMES)], remaining=42)),
+        ("строки экспорта: MarkdownBuilder", lambda: _render_builder(next(counter))),
+    )
+    for title, func in render_cases:
+        seconds = timeit.timeit(func, number=number)
+        print(f"{title:<55} {seconds * 1e6 / number:8.2f} мкс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Эталонные тесты экранирования MarkdownV2
+
+Новое экранирование (замена только встречающихся символов и кеш
+результатов) сравнивается с прежней реализацией - циклом text.replace
+по каждому спецсимволу.
+
+Запуск: python -m unittest discover -s tests
+"""
+import random
+import unittest
+
+from app.core.config import MARKDOWN_SPECIAL_CHARS, escape_markdown, escape_markdown_uncached
+from app.bot.utils.text_messages import MarkdownBuilder, MarkdownTemplate, text_message
+
+
+def escape_markdown_replace(text, chars=MARKDOWN_SPECIAL_CHARS):
+    """Прежняя реализация escape_markdown (эталон)"""
+    for char in chars:
+        text = text.replace(char, '\\' + char)
+    return text
+
+
+# Наборы символов, с которыми escape_markdown вызывается в обработчиках и задачах
+CHAR_SETS = (
+    MARKDOWN_SPECIAL_CHARS,
+    ".!?()-",
+    ".!?()-[]",
+    "()-?.!_=",
+    "-.!?[]()",
+    ".?!-()[]",
+    "-.!?",
+    "\\`",
+)
+
+GOLDEN_TEXTS = (
+    "",
+    "Без спецсимволов",
+    "a.b_c!",
+    "Имя_с*звездочкой [и] (скобками)",
+    "📈 Прогресс: 12.5%",
+    "📊 [████░░░░░░] 40.0%",
+    "https://t.me/yashel_tracker",
+    "@timer_hub",
+    "Дата: 15.03.1990 - 20.04.2000",
+    "`code` {braces} #hash +plus =eq |pipe ~tilde ^caret >gt",
+    "уже \\экранированный\\. текст",
+    "Не забывай ради Кого, ты это делаешь?",
+)
+
+
+class EscapeMarkdownTest(unittest.TestCase):
+    """escape_markdown совпадает с прежним циклом replace"""
+    
+    def test_golden_texts(self):
+        for chars in CHAR_SETS:
+            for text in GOLDEN_TEXTS:
+                with self.subTest(text=text, chars=chars):
+                    expected = escape_markdown_replace(text, chars)
+                    self.assertEqual(escape_markdown(text, chars), expected)
+                    self.assertEqual(escape_markdown_uncached(text, chars), expected)
+    
+    def test_literal_results(self):
+        self.assertEqual(escape_markdown("a.b_c!"), "a\\.b\\_c\\!")
+        self.assertEqual(escape_markdown("📈 Прогресс: 12.5%"), "📈 Прогресс: 12\\.5%")
+        self.assertEqual(escape_markdown("(1) [2]", ".!?()-"), "\\(1\\) [2]")
+        self.assertEqual(escape_markdown("a\\b"), "a\\\\b")
+    
+    def test_random_texts(self):
+        rng = random.Random(20251017)
+        alphabet = MARKDOWN_SPECIAL_CHARS + "abcЯшел 📊\n"
+        for _ in range(2000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            chars = rng.choice(CHAR_SETS + ("_\\", ".\\!"))
+            self.assertEqual(escape_markdown_uncached(text, chars), escape_markdown_replace(text, chars))
+    
+    def test_repeated_calls_use_cache(self):
+        text = "Повторяющийся текст справки (1)."
+        self.assertIs(escape_markdown(text), escape_markdown(text))
+    
+    def test_help_text(self):
+        # HELP_TEXT экранируется при импорте: результат не должен зависеть от реализации
+        self.assertNotIn("\\\\", text_message.HELP_TEXT)
+        self.assertIn("\\.", text_message.HELP_TEXT)
+
+
+class MarkdownTemplateTest(unittest.TestCase):
+    """MarkdownTemplate.render дает тот же текст, что прежняя сборка сообщения"""
+    
+    @staticmethod
+    def render_daily_reminder_replace(name, remaining):
+        """Прежняя сборка ежедневного напоминания (двойное экранирование имени)"""
+        return escape_markdown_replace(
+            f"🌙 Доброй ночи, {escape_markdown_replace(name)}!\n\n"
+            f"📊 Твоя статистика на сегодня:\n"
+            f"⏳ Осталось восполнить: *{remaining}* намазов\n\n"
+            "🤲 Не забывай о восполнении намазов каждый день.\n"
+            "Пусть Аллах облегчит этот путь!\n\n",
+            ".!?()-"
+        )
+    
+    def test_daily_reminder_matches_previous_output(self):
+        # Имена без символов ".!?()-" прежний код экранировал один раз
+        for name in ("Айдар", "брат", "user_name", "*star*", "a[b]c", "Имя {в скобках}"):
+            for remaining in (1, 42, 100000):
+                with self.subTest(name=name, remaining=remaining):
+                    self.assertEqual(
+                        text_message.DAILY_REMINDER.render(name=name, remaining=remaining),
+                        self.render_daily_reminder_replace(name, remaining)
+                    )
+    
+    def test_daily_reminder_escapes_name_once(self):
+        text = text_message.DAILY_REMINDER.render(name="А.Б.", remaining=3)
+        self.assertTrue(text.startswith("🌙 Доброй ночи, А\\.Б\\.\\!\n\n"))
+    
+    def test_literal_braces_and_fields(self):
+        template = MarkdownTemplate("{{x}} = {value}!")
+        self.assertEqual(template.fields, ["value"])
+        self.assertEqual(template.render(value="1.5"), "{x} = 1\\.5\\!")
+    
+    def test_evening_reminders(self):
+        for text, escaped in zip(text_message.reminder_messages, text_message.ESCAPED_REMINDER_MESSAGES):
+            self.assertEqual(escaped, escape_markdown_replace(text, ".?!-()[]"))
+        self.assertIn(text_message.get_random_reminder(), text_message.ESCAPED_REMINDER_MESSAGES)
+
+
+class MarkdownBuilderTest(unittest.TestCase):
+    """MarkdownBuilder собирает тот же текст, что ручное экранирование"""
+    
+    def test_segments(self):
+        text = (
+            MarkdownBuilder()
+            .raw("*Заголовок*\n")
+            .text("a.b ")
+            .bold("(1)")
+            .raw(" ")
+            .code("id`1")
+            .raw("\n")
+            .line("Итог: 50.0%")
+            .build()
+        )
+        self.assertEqual(text, "*Заголовок*\na\\.b *\\(1\\)* `id\\`1`\nИтог: 50\\.0%\n")
+    
+    def test_matches_manual_escaping(self):
+        values = ("Айдар", "Казань", "15.03.1990", "Не указан", "admin")
+        manual = "".join(f"• Поле: {escape_markdown_replace(value)}\n" for value in values)
+        builder = MarkdownBuilder()
+        for value in values:
+            builder.raw("• Поле: ").line(value)
+        self.assertEqual(builder.build(), manual)
+    
+    def test_non_string_values(self):
+        self.assertEqual(MarkdownBuilder().text(-1.5).line(3).build(), "\\-1\\.5" + "3\n")
+
+
+if __name__ == "__main__":
+    unittest.main()